@@ -0,0 +1,383 @@
+"""
+Offline benchmarks for the crawler's hot paths.
+
+Everything runs against tests/html_samples and generated fixtures; archives
+are served by the local replay server, so no network access is needed. Run from
+the crawler directory:
+
+    python -m benchmarks.bench_crawler -o bench.json
+    python -m benchmarks.bench_crawler --compare bench.json
+
+With --compare, a case whose median time grew by more than --threshold
+(default 20%) and by at least 2 ms over the baseline is reported as a
+regression and the run exits with status 1.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import crawler
+from benchmarks.replay_server import ReplayServer, ReplaySite
+from tests.zip_fixtures import make_payload, make_zip
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "html_samples")
+MiB = 1024 * 1024
+DEFAULT_THRESHOLD = 0.2
+MIN_REGRESSION_S = 0.002  # slowdowns smaller than this are timer noise
+SYNTHETIC_COMMENTS = 400  # comments on the synthetic large crackme page
+CRAWLER_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# Sizes in bytes, per suite size
+DOWNLOAD_SIZES = {"quick": [256 * 1024], "full": [1 * MiB, 16 * MiB, 64 * MiB]}
+ZIP_SIZES = {"quick": [64 * 1024], "full": [1 * MiB, 16 * MiB]}
+# make_zip encrypts in pure Python, so protected archives stay smaller
+PROTECTED_ZIP_SIZES = {"quick": [16 * 1024], "full": [256 * 1024, 1 * MiB]}
+PAGES = {"quick": 2, "full": 20}  # pages parsed per timed run
+REPEATS = {"quick": 2, "full": 5}
+
+
+@dataclass
+class BenchResult:
+    name: str
+    repeats: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    items: int = 1  # work units per run: pages, bytes, ...
+    unit: str = "op"
+
+    @property
+    def throughput(self) -> float:
+        """Work units per second, at the median."""
+        return self.items / self.median_s if self.median_s else 0.0
+
+    def as_record(self) -> Dict[str, object]:
+        record = asdict(self)
+        record["throughput"] = round(self.throughput, 2)
+        return record
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], object]
+    items: int = 1
+    unit: str = "op"
+    setup: Optional[Callable[[], None]] = None  # runs untimed before each run
+
+
+def measure(case: Case, repeats: int) -> BenchResult:
+    """Time a case `repeats` times after one warm-up run."""
+    times = []
+    for attempt in range(repeats + 1):
+        if case.setup:
+            case.setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            case.run()
+            elapsed = time.perf_counter() - started
+        if attempt:  # Discard the warm-up
+            times.append(elapsed)
+    return BenchResult(
+        case.name,
+        repeats,
+        min(times),
+        statistics.median(times),
+        statistics.fmean(times),
+        case.items,
+        case.unit,
+    )
+
+
+def _size_label(size: int) -> str:
+    return f"{size // MiB}MiB" if size >= MiB else f"{size // 1024}KiB"
+
+
+# --- Parsing ---
+def _load_sample(name: str) -> str:
+    with open(os.path.join(SAMPLES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def synthetic_page(html: str, comments: int = SYNTHETIC_COMMENTS) -> str:
+    """The sample crackme page with its comment section repeated many times."""
+    section = re.search(r'(<div[^>]*id="comments"[^>]*>)(.*?)(</div>)', html, re.S)
+    if not section:
+        raise ValueError("sample page has no comments section")
+    entries = re.findall(r"<p>.*?</p>", section.group(2), re.S)
+    body = "\n".join(entries[i % len(entries)] for i in range(comments))
+    return html[: section.start(2)] + body + html[section.end(2) :]
+
+
+def bench_parsing(pages: int) -> Iterator[Case]:
+    html = _load_sample("sample_provided.html")
+    for name, page in (("sample", html), ("many_comments", synthetic_page(html))):
+        soup = crawler.strain_crackme_page(page)
+        yield Case(
+            f"strain_page[{name}]",
+            lambda page=page: [crawler.strain_crackme_page(page) for _ in range(pages)],
+            pages,
+            "page",
+        )
+        yield Case(
+            f"parse_crackme[{name}]",
+            lambda soup=soup: [crawler.parse_crackme(soup) for _ in range(pages)],
+            pages,
+            "page",
+        )
+        yield Case(
+            f"extract_crackme[{name}]",
+            lambda page=page: [crawler.extract_crackme(page) for _ in range(pages)],
+            pages,
+            "page",
+        )
+
+    info = crawler.extract_crackme(html)
+    renders = pages * 50
+    yield Case(
+        "generate_markdown",
+        lambda: [
+            crawler.generate_markdown(info.title, info.details, info.description)
+            for _ in range(renders)
+        ],
+        renders,
+        "readme",
+    )
+
+
+# --- Downloads ---
+def bench_downloads(sizes: List[int], workdir: str) -> Iterator[Case]:
+    files = {
+        f"/{_size_label(size)}.zip": ("application/zip", make_payload(size))
+        for size in sizes
+    }
+    target = os.path.join(workdir, "downloads")
+
+    def clean() -> None:
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target)
+
+    session = crawler.make_session(1, limiter=crawler.RateLimiter(1000.0))
+    with ReplayServer(ReplaySite(files)) as server, session:
+        for path, (_, body) in files.items():
+            url = server.url + path
+            yield Case(
+                f"download_file[{path[1:-4]}]",
+                lambda url=url: crawler.download_file(url, target, session),
+                len(body),
+                "byte",
+                setup=clean,
+            )
+
+
+# --- Extraction ---
+def _zip_cases(sizes: List[int], protected_sizes: List[int]) -> Iterator[Tuple]:
+    """(name, archive bytes, password, uncompressed size) for each zip case."""
+    for size in sizes:
+        label = _size_label(size)
+        files = {"crackme.bin": make_payload(size)}
+        yield f"stored[{label}]", make_zip(files), None, size
+        yield (
+            f"deflated[{label}]",
+            make_zip(files, compression=zipfile.ZIP_DEFLATED),
+            None,
+            size,
+        )
+        inner = make_zip({"inner.bin": make_payload(size // 2)})
+        outer = make_zip({"a.bin": make_payload(size // 2), "inner.zip": inner})
+        yield f"nested[{label}]", outer, None, size
+    for size in protected_sizes:
+        archive = make_zip({"crackme.bin": make_payload(size)}, password="crackmes.one")
+        yield f"protected[{_size_label(size)}]", archive, "crackmes.one", size
+
+
+def bench_unzip(
+    sizes: List[int], protected_sizes: List[int], workdir: str
+) -> Iterator[Case]:
+    zip_path = os.path.join(workdir, "bench.zip")
+    target = os.path.join(workdir, "extract")
+
+    def clean() -> None:
+        shutil.rmtree(target, ignore_errors=True)
+
+    for name, archive, password, size in _zip_cases(sizes, protected_sizes):
+        with open(zip_path, "wb") as f:
+            f.write(archive)
+        yield Case(
+            f"unzip_file[{name}]",
+            lambda password=password: crawler.unzip_file(zip_path, password, target),
+            size,
+            "byte",
+            setup=clean,
+        )
+        if password:
+            yield Case(
+                f"find_zip_password[{name}]",
+                lambda password=password: crawler.find_zip_password(
+                    zip_path, ["wrong", "guess", password]
+                ),
+                3,
+                "candidate",
+            )
+
+
+# --- Startup ---
+def _python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter in the crawler directory, bypassing any daemon."""
+    env = dict(os.environ, GET_CRACKME_NO_DAEMON="1", PYTHONPATH=CRAWLER_DIR)
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=CRAWLER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time() -> float:
+    """Seconds spent importing crawler, as reported by -X importtime."""
+    stderr = _python("-X", "importtime", "-c", "import crawler").stderr
+    for line in reversed(stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "crawler":
+            return int(fields[1]) / 1e6
+    raise ValueError("crawler missing from the -X importtime output")
+
+
+def bench_startup() -> Iterator[Case]:
+    yield Case("startup[import]", import_time)
+    yield Case("startup[--help]", lambda: _python("get_crackme.py", "--help"))
+
+
+# --- Running and comparing ---
+def run_suite(suite: str = "full", only: Optional[str] = None) -> List[BenchResult]:
+    """Run every benchmark (or those whose name contains `only`) and return the results."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="crawler-bench-") as workdir:
+        groups = (
+            bench_startup(),
+            bench_parsing(PAGES[suite]),
+            bench_downloads(DOWNLOAD_SIZES[suite], workdir),
+            bench_unzip(ZIP_SIZES[suite], PROTECTED_ZIP_SIZES[suite], workdir),
+        )
+        for group in groups:
+            for case in group:
+                if only and only not in case.name:
+                    continue
+                result = measure(case, REPEATS[suite])
+                print(_format_result(result), file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def _format_result(result: BenchResult) -> str:
+    rate = result.throughput
+    if result.unit == "byte":
+        rate_text = f"{rate / MiB:10.1f} MiB/s"
+    else:
+        rate_text = f"{rate:10.1f} {result.unit}/s"
+    return f"{result.name:<40} {result.median_s * 1000:10.2f} ms {rate_text}"
+
+
+def results_document(results: List[BenchResult], suite: str) -> Dict[str, object]:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "suite": suite,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {result.name: result.as_record() for result in results},
+    }
+
+
+def compare(
+    baseline: Dict[str, object],
+    current: Dict[str, object],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Tuple[str, float]]:
+    """
+    Cases whose median time grew by more than `threshold` (a fraction) and
+    by more than MIN_REGRESSION_S over the baseline, as (name, ratio of
+    current to baseline median) pairs.
+    """
+    old_results = baseline.get("results", {})
+    regressions = []
+    for name, record in current.get("results", {}).items():
+        old = old_results.get(name)
+        if not old or not old["median_s"]:
+            continue
+        ratio = record["median_s"] / old["median_s"]
+        slower_by = record["median_s"] - old["median_s"]
+        if ratio > 1 + threshold and slower_by > MIN_REGRESSION_S:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run the crawler benchmarks offline and save the results as JSON."
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="PATH", help="Write the results to PATH as JSON."
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="Compare against a previous results file and flag regressions.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Slowdown that counts as a regression, as a fraction "
+        f"(default: {DEFAULT_THRESHOLD}).",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Small inputs and fewer repeats, for a smoke run.",
+    )
+    parser.add_argument(
+        "-k",
+        dest="only",
+        metavar="TEXT",
+        help="Only run cases whose name contains TEXT.",
+    )
+    args = parser.parse_args(argv)
+
+    suite = "quick" if args.quick else "full"
+    document = results_document(run_suite(suite, args.only), suite)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, document, args.threshold)
+    for name, ratio in regressions:
+        print(f"Regression: {name} is {ratio:.2f}x the baseline", file=sys.stderr)
+    if not regressions:
+        print("No regressions against the baseline.", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
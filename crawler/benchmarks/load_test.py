@@ -0,0 +1,230 @@
+"""
+Drive the crawler against the local replay server and report throughput.
+
+Each run starts from an empty output directory, walks every listing page
+like `get-crackme crawl --pages 1..` and scrapes what it finds. Giving
+several --jobs or --rate values runs every combination, which makes it easy
+to pick worker counts and rate limits without touching the live site:
+
+    python -m benchmarks.load_test --crackmes 200 --jobs 4 8 16 --latency 0.05
+    python -m benchmarks.load_test --engine async --error-rate 0.05 --json load.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import crawler
+from benchmarks.replay_server import (
+    ReplayServer,
+    add_fault_arguments,
+    faults_from_args,
+    site_from_args,
+)
+
+MiB = 1024 * 1024
+
+
+@dataclass
+class LoadResult:
+    engine: str
+    jobs: int
+    rate: float
+    seconds: float
+    crackmes: int
+    failed: int
+    pages: int  # crackme and listing pages served successfully
+    download_bytes: int
+    requests: int
+    errors: int  # injected 429/5xx responses, each retried by the crawler
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def mib_per_s(self) -> float:
+        return self.download_bytes / MiB / self.seconds if self.seconds else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed / self.crackmes if self.crackmes else 0.0
+
+    def as_record(self) -> Dict[str, object]:
+        record = asdict(self)
+        record.update(
+            pages_per_s=round(self.pages_per_s, 2),
+            mib_per_s=round(self.mib_per_s, 2),
+            error_rate=round(self.error_rate, 4),
+            failure_rate=round(self.failure_rate, 4),
+        )
+        return record
+
+
+def run_load(
+    server: ReplayServer,
+    engine: str = "threads",
+    jobs: int = crawler.DEFAULT_JOBS,
+    rate: float = 0.0,
+    retries: int = crawler.DEFAULT_HTTP_RETRIES,
+    max_per_host: Optional[int] = None,
+    quiet: bool = True,
+    processes: Optional[int] = None,
+) -> LoadResult:
+    """Crawl every listing page of `server` into a fresh directory and measure it."""
+    server.reset_stats()
+    limiter = crawler.RateLimiter(rate, max_per_host)
+    session = crawler.make_session(jobs, limiter=limiter, retries=retries)
+    options = crawler.ScrapeOptions(base_url=server.url)
+    output = io.StringIO() if quiet else None
+    with (
+        tempfile.TemporaryDirectory(prefix="crawler-load-") as out_dir,
+        session,
+        contextlib.redirect_stdout(output or sys.stdout),
+        contextlib.redirect_stderr(output or sys.stderr),
+    ):
+        started = time.perf_counter()
+        ids = crawler.iter_listing_ids(1, None, session, base_url=server.url)
+        if engine == "async":
+            results = crawler.scrape_batch_async(
+                ids,
+                out_dir,
+                jobs=jobs,
+                limiter=limiter,
+                retries=retries,
+                options=options,
+            )
+        elif engine == "staged":
+            results = crawler.scrape_batch_staged(
+                ids,
+                out_dir,
+                jobs=jobs,
+                processes=processes,
+                session=session,
+                options=options,
+            )
+        else:
+            results = crawler.scrape_batch(
+                ids, out_dir, jobs=jobs, session=session, options=options
+            )
+        seconds = time.perf_counter() - started
+
+    stats = server.stats
+    return LoadResult(
+        engine=engine,
+        jobs=jobs,
+        rate=rate,
+        seconds=seconds,
+        crackmes=len(results),
+        failed=sum(not result.ok for result in results),
+        pages=stats.served["page"] + stats.served["listing"],
+        download_bytes=sum(r.timings.download_bytes for r in results),
+        requests=stats.total,
+        errors=stats.injected,
+    )
+
+
+def _format_row(result: LoadResult) -> str:
+    return (
+        f"{result.engine:<8} {result.jobs:>4} {result.rate or 'off':>6} "
+        f"{result.seconds:>8.2f} {result.pages_per_s:>9.1f} {result.mib_per_s:>8.2f} "
+        f"{result.error_rate:>7.1%} {result.failed:>6}/{result.crackmes}"
+    )
+
+
+HEADER = (
+    f"{'engine':<8} {'jobs':>4} {'rate':>6} {'seconds':>8} {'pages/s':>9} "
+    f"{'MiB/s':>8} {'errors':>7} {'failed':>6}"
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Load-test the crawler against a local replay server."
+    )
+    add_fault_arguments(parser)
+    parser.add_argument(
+        "--engine",
+        choices=crawler.ENGINES,
+        default="threads",
+        help="Crawler concurrency backend (default: threads).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        nargs="+",
+        default=[crawler.DEFAULT_JOBS],
+        help="Worker counts to try (default: the crawler's default).",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        nargs="+",
+        default=[0.0],
+        help="Rate limits to try, in requests per second; 0 for none (default: 0).",
+    )
+    parser.add_argument(
+        "--max-per-host", type=int, metavar="N", help="Passed on to the crawler."
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=crawler.DEFAULT_HTTP_RETRIES,
+        help="Passed on to the crawler.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        metavar="N",
+        help="Parse and unzip processes for --engine staged.",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="Also write the results to PATH as JSON."
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Show the crawler's own output.",
+    )
+    args = parser.parse_args(argv)
+
+    site = site_from_args(args)
+    results = []
+    with ReplayServer(site, faults_from_args(args), seed=args.seed) as server:
+        print(f"{len(site.crackme_ids)} crackmes at {server.url}", file=sys.stderr)
+        print(HEADER)
+        for jobs, rate in itertools.product(args.jobs, args.rate):
+            result = run_load(
+                server,
+                args.engine,
+                jobs,
+                rate,
+                args.retries,
+                args.max_per_host,
+                quiet=not args.verbose,
+                processes=args.processes,
+            )
+            print(_format_row(result), flush=True)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([result.as_record() for result in results], f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
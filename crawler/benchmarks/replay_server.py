@@ -0,0 +1,433 @@
+"""
+A local stand-in for crackmes.one that serves crackme pages, /lasts/N
+listing pages and archives, either generated from tests/html_samples or
+replayed from a crawler --cache directory. Latency, a per-response bandwidth
+cap and injected 429/5xx errors can be configured to mimic a slow or busy
+site.
+
+    python -m benchmarks.replay_server --crackmes 500 --latency 0.05 --error-rate 0.02
+    get-crackme crawl --pages 1.. --base-url http://127.0.0.1:8765 -o /tmp/replay
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from tests.zip_fixtures import make_payload, make_zip
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "html_samples")
+DEFAULT_PORT = 8765
+DEFAULT_PER_PAGE = 25  # crackmes per listing page, like the real site
+DEFAULT_ARCHIVE_SIZE = 16 * 1024
+ARCHIVE_PASSWORD = "crackmes.one"
+THROTTLE_STATUSES = (429, 503)  # sent with a Retry-After header
+SAMPLE_ID = "685048992b84be7ea7743940"
+CRACKME_PATH_RE = re.compile(r"^/crackme/([0-9a-fA-F]+)/?$")
+ROW_RE = re.compile(r"<tr>\s*<td><a href=\"/crackme/.*?</tr>", re.S)
+DOWNLOAD_LINK_RE = re.compile(rb'<a\s+href="([^"]+)"[^>]*btn-download')
+WRITEUP_LINK_RE = re.compile(rb'href="(/static/solution/[^"]+)"')
+WRITEUP_SIZE = 4 * 1024
+
+
+@dataclass
+class Faults:
+    """How badly the replay server behaves."""
+
+    latency: float = 0.0  # seconds before every response
+    jitter: float = 0.0  # up to this many extra seconds, uniformly random
+    bandwidth: Optional[float] = None  # bytes per second for each response body
+    error_rate: float = 0.0  # fraction of requests answered with an error
+    error_statuses: Tuple[int, ...] = (429, 500, 503)
+    retry_after: int = 1  # seconds, for 429 and 503
+
+
+@dataclass
+class ServerStats:
+    """What the replay server has served, by route kind and status."""
+
+    requests: Counter = field(default_factory=Counter)  # kind -> count
+    served: Counter = field(default_factory=Counter)  # kind -> 200 responses
+    statuses: Counter = field(default_factory=Counter)  # status -> count
+    injected: int = 0  # error responses picked by the fault injector
+    bytes_sent: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+    def as_record(self) -> Dict[str, object]:
+        return {
+            "requests": dict(self.requests),
+            "served": dict(self.served),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "injected": self.injected,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+def _route_kind(path: str) -> str:
+    if path.startswith("/lasts/"):
+        return "listing"
+    if CRACKME_PATH_RE.match(path):
+        return "page"
+    if path.startswith("/static/solution/"):
+        return "writeup"
+    return "archive"
+
+
+class ReplaySite:
+    """The routes a ReplayServer answers: path -> (content type, body)."""
+
+    def __init__(self, routes: Dict[str, Tuple[str, bytes]]) -> None:
+        self.routes = routes
+
+    @property
+    def crackme_ids(self) -> List[str]:
+        return [
+            match.group(1) for match in map(CRACKME_PATH_RE.match, self.routes) if match
+        ]
+
+    @classmethod
+    def synthetic(
+        cls,
+        count: int,
+        per_page: int = DEFAULT_PER_PAGE,
+        archive_size: int = DEFAULT_ARCHIVE_SIZE,
+        password: Optional[str] = ARCHIVE_PASSWORD,
+    ) -> "ReplaySite":
+        """
+        `count` crackmes made from the sample page, each with its own ID,
+        title and author, spread over listing pages newest first. They share
+        one archive, since make_zip encrypts slowly, and the sample's writeups.
+        """
+        with open(
+            os.path.join(SAMPLES_DIR, "sample_provided.html"), encoding="utf-8"
+        ) as f:
+            page = f.read()
+        with open(
+            os.path.join(SAMPLES_DIR, "sample_listing.html"), encoding="utf-8"
+        ) as f:
+            listing = f.read()
+        row = ROW_RE.search(listing).group(0)
+        archive = make_zip(
+            {"crackme.bin": make_payload(archive_size)}, password=password
+        )
+
+        routes = _writeup_routes([page.encode("utf-8")])
+        rows = []
+        for index in range(count):
+            crackme_id = f"{0x5EED0000 + index:08x}" + SAMPLE_ID[8:]
+            author = f"replay{index % 50}"
+            html = (
+                page.replace(SAMPLE_ID, crackme_id)
+                .replace("mirunaf", author)
+                .replace("Very easy", f"Replay crackme {index}")
+            )
+            routes[f"/crackme/{crackme_id}"] = ("text/html", html.encode("utf-8"))
+            routes[f"/static/crackme/{crackme_id}.zip"] = ("application/zip", archive)
+            rows.append(
+                row.replace("68db2563224c0ec5dcedc43f", crackme_id)
+                .replace("dollhead", author)
+                .replace("keygenme 2", f"Replay crackme {index}")
+            )
+
+        empty = ROW_RE.sub("", listing)
+        pages = [rows[start : start + per_page] for start in range(0, count, per_page)]
+        # The page after the last one is empty, which ends an open-ended crawl
+        for number, page_rows in enumerate(pages + [[]], start=1):
+            body = empty.replace("<tbody>", "<tbody>" + "".join(page_rows), 1)
+            routes[f"/lasts/{number}"] = ("text/html", body.encode("utf-8"))
+        return cls(routes)
+
+    @classmethod
+    def from_cache(
+        cls,
+        directory: str,
+        archive_size: int = DEFAULT_ARCHIVE_SIZE,
+        password: Optional[str] = ARCHIVE_PASSWORD,
+    ) -> "ReplaySite":
+        """
+        Replay the pages recorded in a crawler --cache directory. The cache
+        only holds pages, so every download link gets a generated archive.
+        """
+        routes: Dict[str, Tuple[str, bytes]] = {}
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            key = name[: -len(".json")]
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(os.path.join(directory, key + ".body"), "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError):
+                continue
+            path = urlsplit(meta["url"]).path
+            routes[path] = (meta.get("content_type") or "text/html", body)
+
+        archive = make_zip(
+            {"crackme.bin": make_payload(archive_size)}, password=password
+        )
+        for _, body in list(routes.values()):
+            for href in DOWNLOAD_LINK_RE.findall(body):
+                path = urlsplit(href.decode()).path
+                routes.setdefault(path, ("application/zip", archive))
+        for path, route in _writeup_routes(
+            [body for _, body in routes.values()]
+        ).items():
+            routes.setdefault(path, route)
+        return cls(routes)
+
+
+def _writeup_routes(pages: List[bytes]) -> Dict[str, Tuple[str, bytes]]:
+    """A small generated attachment for every writeup linked from `pages`."""
+    attachment = make_zip({"solution.txt": make_payload(WRITEUP_SIZE)})
+    return {
+        href.decode(): ("application/zip", attachment)
+        for page in pages
+        for href in WRITEUP_LINK_RE.findall(page)
+    }
+
+
+class ReplayServer:
+    """
+    Threaded HTTP server for a ReplaySite. Use as a context manager; the
+    site is reachable at `url` while it is open.
+    """
+
+    def __init__(
+        self,
+        site: ReplaySite,
+        faults: Optional[Faults] = None,
+        port: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.site = site
+        self.faults = faults or Faults()
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "ReplayServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = ServerStats()
+
+    def _pick_fault(self) -> Tuple[float, Optional[int]]:
+        """The delay before responding, and the error status to inject, if any."""
+        faults = self.faults
+        with self._lock:
+            delay = faults.latency + self._random.uniform(0, faults.jitter)
+            error = None
+            if faults.error_statuses and self._random.random() < faults.error_rate:
+                error = self._random.choice(faults.error_statuses)
+        return delay, error
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        path = urlsplit(handler.path).path
+        delay, error = self._pick_fault()
+        if delay:
+            time.sleep(delay)
+
+        route = self.site.routes.get(path)
+        headers = {}
+        if error:
+            status, content_type, body = error, "text/plain", b"injected error"
+            if status in THROTTLE_STATUSES:
+                headers["Retry-After"] = str(self.faults.retry_after)
+        elif route is None:
+            status, content_type, body = 404, "text/plain", b"not found"
+        else:
+            status = 200
+            content_type, body = route
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        sent = 0
+        if handler.command != "HEAD":
+            sent = self._send_body(handler, body)
+        with self._lock:
+            kind = _route_kind(path)
+            self.stats.requests[kind] += 1
+            if status == 200:
+                self.stats.served[kind] += 1
+            self.stats.statuses[status] += 1
+            self.stats.injected += bool(error)
+            self.stats.bytes_sent += sent
+
+    def _send_body(self, handler: BaseHTTPRequestHandler, body: bytes) -> int:
+        """Write `body`, paced to the bandwidth cap. Returns the bytes sent."""
+        bandwidth = self.faults.bandwidth
+        if not bandwidth:
+            handler.wfile.write(body)
+            return len(body)
+        chunk = max(1024, int(bandwidth / 20))  # ~20 writes per second
+        started = time.monotonic()
+        sent = 0
+        try:
+            for offset in range(0, len(body), chunk):
+                handler.wfile.write(body[offset : offset + chunk])
+                sent += len(body[offset : offset + chunk])
+                ahead = sent / bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up mid-transfer
+        return sent
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte count such as '512', '64KiB' or '5MiB' for argparse."""
+    match = re.fullmatch(
+        r"(\d+(?:\.\d+)?)\s*(|k|kib|m|mib|g|gib)", value.strip().lower()
+    )
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    factor = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}[match.group(2)[:1]]
+    return int(float(match.group(1)) * factor)
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """The site and fault options shared with the load test."""
+    parser.add_argument(
+        "--crackmes",
+        type=int,
+        default=100,
+        help="Number of synthetic crackmes to serve (default: 100).",
+    )
+    parser.add_argument(
+        "--from-cache",
+        metavar="DIR",
+        help="Replay the pages recorded in a crawler --cache directory instead.",
+    )
+    parser.add_argument(
+        "--archive-size",
+        type=parse_size,
+        default=DEFAULT_ARCHIVE_SIZE,
+        metavar="SIZE",
+        help="Size of the file inside each archive, e.g. 64KiB or 2MiB.",
+    )
+    parser.add_argument(
+        "--plain-archives",
+        action="store_true",
+        help="Serve unencrypted archives. Decrypting ZipCrypto is CPU-bound in "
+        "Python and can hide network effects.",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds before each response."
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Up to this many extra seconds per response, at random.",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=parse_size,
+        metavar="SIZE",
+        help="Cap each response body at SIZE bytes per second, e.g. 2MiB.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with an injected error.",
+    )
+    parser.add_argument(
+        "--error-statuses",
+        type=lambda value: tuple(int(s) for s in value.split(",")),
+        default=(429, 500, 503),
+        metavar="CODES",
+        help="Comma-separated statuses to inject (default: 429,500,503).",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Seed for the injected errors and jitter."
+    )
+
+
+def site_from_args(args: argparse.Namespace) -> ReplaySite:
+    password = None if args.plain_archives else ARCHIVE_PASSWORD
+    if args.from_cache:
+        return ReplaySite.from_cache(args.from_cache, args.archive_size, password)
+    return ReplaySite.synthetic(
+        args.crackmes, archive_size=args.archive_size, password=password
+    )
+
+
+def faults_from_args(args: argparse.Namespace) -> Faults:
+    return Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        error_statuses=args.error_statuses,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve a local, offline stand-in for crackmes.one."
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT}).",
+    )
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    site = site_from_args(args)
+    with ReplayServer(site, faults_from_args(args), args.port, args.seed) as server:
+        print(
+            f"Serving {len(site.crackme_ids)} crackmes at {server.url} "
+            f"(use --base-url {server.url}). Ctrl+C to stop."
+        )
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    print(json.dumps(server.stats.as_record()))
+
+
+if __name__ == "__main__":
+    main()
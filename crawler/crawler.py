@@ -3,57 +3,1135 @@
 A script to scrape crackme details from crackmes.one.
 """
 
+from __future__ import annotations
+
 import argparse
+import contextvars
+import functools
+import getpass
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import math
 import os
+import queue
+import random
 import sys
 import re  # Import re for regex matching
-from typing import Dict, Optional
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
 from urllib.parse import urljoin
-import zipfile
+import zlib
+
 
-import requests
-from bs4 import BeautifulSoup, Tag
+# Imported by the functions that use them, the first time one runs, so --help,
+# usage errors and handing a job to the daemon import none of these modules,
+# and catalog queries only sqlite3.
+if TYPE_CHECKING:
+    import aiohttp
+    import asyncio
+    import bs4
+    import concurrent.futures
+    import multiprocessing
+    import pstats
+    import requests
+    import socketserver
+    import sqlite3
+    import zipfile
+    from concurrent.futures import Future
 
 # --- Constants ---
 BASE_URL = "https://crackmes.one"
 USER_AGENT = "Mozilla/5.0"
+DEFAULT_JOBS = 4
+WRITEUP_JOBS = 2  # extra downloads per crackme, next to its archive
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # seconds
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024  # bytes
+LARGE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes
+LARGE_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024  # bytes
+DEFAULT_LARGE_ARCHIVE_SIZE = 64  # MiB, archives above go to the --schedule size lane
+LARGE_LANE_JOBS = 1  # large archives downloaded at a time by --schedule size
+SIZE_PROBE_WINDOW = 64  # IDs probed and reordered together by --schedule size
+DEFAULT_DOWNLOAD_RETRIES = 5
+DEFAULT_TIMEOUT = 30  # seconds to connect or wait for data
+DEFAULT_RATE = 5.0  # requests per second
+DEFAULT_HTTP_RETRIES = 4
+RETRY_BACKOFF_BASE = 1.0  # seconds, doubled on every attempt
+RETRY_BACKOFF_MAX = 60.0  # seconds
+MAX_RETRY_AFTER = 300.0  # seconds, longer Retry-After values are capped
+MIN_RATE = 0.1  # requests per second, the floor when backing off
+RATE_RECOVERY_STEPS = 20  # successes needed to climb back to the full rate
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+PHASES = (
+    "connect",  # DNS lookup and TCP/TLS connect, overlaps fetch and download
+    "fetch",
+    "parse",
+    "extract",
+    "download",
+    "writeups",  # Attachment downloads, running alongside download and unzip
+    "probe",
+    "unzip",
+    "write",
+    "catalog",
+    "total",
+)
+METRIC_PERCENTILES = (50, 90, 99)
+PROFILE_TOP = 25  # functions listed after a --profile run
+THROTTLE_STATUSES = frozenset({429, 503})
+DEFAULT_ZIP_PASSWORDS = ("crackmes.one", "crackmes.de")
+DEFAULT_MAX_ZIP_DEPTH = 5  # archive levels, the download itself being level 1
+DEFAULT_MAX_EXTRACT_BYTES = 1024 * 1024 * 1024  # bytes
+DEFAULT_MAX_ZIP_RATIO = 200.0
+ZIP_RATIO_CHECK_THRESHOLD = 1024 * 1024  # bytes, small members may compress well
+# lxml parses several times faster than the stdlib parser when it's installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+FICLONE = 0x40049409  # Linux ioctl that reflinks (copy-on-write clones) a file
+ENGINES = ("threads", "async", "staged")
+SCHEDULES = ("input", "size")
+LAYOUTS = ("flat", "sharded")
+SHARDS_DIR = "by-id"  # Holds the per-ID crackme directories of a sharded tree
+WRITEUPS_DIR = "writeups"  # Writeup attachments, inside each crackme directory
+PARQUET_ROW_GROUP = 10_000  # crackmes per Parquet row group
+RENDER_CHUNK = 64  # READMEs handed to a render process at a time
+CRACKME_LINK_RE = re.compile(r"^/crackme/([0-9a-fA-F]+)/?$")
+ARCHIVE_PATH = "/static/crackme/{}.zip"  # Where crackme pages link their download
+ARCHIVE_NAME_RE = re.compile(r"^([0-9a-fA-F]{24})\.zip$")
+SYNC_STATE_FILE = ".get-crackme-state.json"
+CATALOG_FILE = ".get-crackme-catalog.sqlite"
+SOCKET_ENV = "GET_CRACKME_SOCKET"  # Where the daemon listens
+NO_DAEMON_ENV = "GET_CRACKME_NO_DAEMON"  # Set to always run in-process
+UPLOAD_DATE_FORMAT = "%I:%M %p %m/%d/%Y"  # As shown on crackme pages
+DEFAULT_SYNC_STOP_AFTER = 10
+LISTING_FAILURE_LIMIT = 3  # unreadable pages in a row that end an open-ended walk
 
 
-def get_soup(url: str) -> Optional[BeautifulSoup]:
-    """Fetch the URL and return a BeautifulSoup object."""
+class ScrapeError(Exception):
+    """Raised when a crackme page cannot be scraped or saved."""
+
+
+@dataclass
+class CrackmeComment:
+    """A comment left on a crackme page."""
+
+    author: str
+    posted: str  # As shown on the page, e.g. '1:02 PM 06/17/2025'
+    text: str
+
+
+@dataclass
+class CrackmeWriteup:
+    """A writeup (solution) posted on a crackme page."""
+
+    author: str
+    text: str
+    url: Optional[str] = None  # The attachment, usually a zip
+
+
+@dataclass
+class CrackmeInfo:
+    """Metadata extracted from a crackme page."""
+
+    title: str
+    author: str
+    details: Dict[str, str]
+    description: str
+    download_url: Optional[str] = None
+    comments: List[CrackmeComment] = field(default_factory=list)
+    writeups: List[CrackmeWriteup] = field(default_factory=list)
+
+
+@dataclass
+class ScrapeOptions:
+    """Settings applied to every crackme scraped in a run."""
+
+    chunk_size: Optional[int] = None  # Download read size, None picks by size
+    store: Optional["BlobStore"] = None  # Shared archive store for deduplication
+    wordlist: Tuple[str, ...] = ()  # Extra zip password candidates
+    limits: "ExtractLimits" = field(default_factory=lambda: ExtractLimits())
+    catalog: Optional["Catalog"] = None  # Index every scraped crackme here
+    layout: str = "flat"  # One of LAYOUTS
+    export: Optional["ExportWriter"] = None  # Stream a record per crackme here
+    writeups: bool = True  # Download writeup attachments
+    filter: Optional["CrackmeFilter"] = None  # Checked again on each crackme page
+    max_archive_bytes: Optional[int] = None  # Larger archives aren't downloaded
+    bandwidth: Optional[float] = None  # Bytes per second cap on archive downloads
+    base_url: str = field(default_factory=lambda: BASE_URL)  # Site to scrape
+
+
+@dataclass
+class PhaseTimings:
+    """Seconds spent in each phase of one scrape, plus the bytes downloaded."""
+
+    phases: Dict[str, float] = field(default_factory=dict)
+    download_bytes: int = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def merge(self, other: "PhaseTimings") -> None:
+        for phase, seconds in other.phases.items():
+            self.add(phase, seconds)
+        self.download_bytes += other.download_bytes
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def as_record(self) -> Dict[str, object]:
+        record: Dict[str, object] = {
+            "phases": {p: round(t, 6) for p, t in self.phases.items()},
+            "download_bytes": self.download_bytes,
+        }
+        download_time = self.phases.get("download")
+        if self.download_bytes and download_time:
+            record["download_bytes_per_s"] = round(self.download_bytes / download_time)
+        return record
+
+
+# The timings of the scrape running in the current thread or task, so helpers
+# deep in the call stack (connections, zip probing) can report into it
+_current_timings: contextvars.ContextVar[Optional[PhaseTimings]] = (
+    contextvars.ContextVar("current_timings", default=None)
+)
+
+
+@contextmanager
+def _timed(phase: str) -> Iterator[None]:
+    """Time a block into the current scrape's timings, if one is being measured."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.phase(phase):
+        yield
+
+
+@contextmanager
+def _recording(timings: PhaseTimings) -> Iterator[PhaseTimings]:
+    """Make `timings` the current scrape's timings for the enclosed block."""
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def _timed_phase(phase: str):
+    """Decorator form of _timed."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _count_download(received: int) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.download_bytes += received
+
+
+@dataclass
+class ScrapeResult:
+    """Outcome of scraping a single crackme."""
+
+    crackme_id: str
+    ok: bool
+    directory: Optional[str] = None
+    error: Optional[str] = None
+    password: Optional[str] = None  # Zip password that worked, if any
+    timings: PhaseTimings = field(default_factory=PhaseTimings)
+    info: Optional[CrackmeInfo] = None
+    extracted: Optional[bool] = None  # None when there was no archive
+    digest: Optional[str] = None  # SHA-256 of the archive, if the run needed it
+    skipped: Optional[str] = None  # Why the run's filter left it out
+
+
+# --- Rate Limiting ---
+class RateLimiter:
+    """
+    Token bucket shared by every request of a run, across threads and the
+    event loop. Throttling responses halve the rate and pause all requests for
+    the server's Retry-After delay; each success then wins back a share of the
+    configured rate. `max_per_host` caps the connections in use per host.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        max_per_host: Optional[int] = None,
+        burst: Optional[float] = None,
+    ) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.max_per_host = max_per_host
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                elapsed = now - self._updated
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated = now
+                # Tokens may go negative: later callers queue behind earlier ones
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.rate)
+            return delay
+
+    def throttled(self, delay: float) -> None:
+        """Back off after a 429/503: pause everyone for `delay` and halve the rate."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            if self.rate > 0:
+                self.rate = max(min(MIN_RATE, self.max_rate), self.rate / 2)
+                print(
+                    f"Warning: Throttled by the server, slowing down to "
+                    f"{self.rate:.2g} requests/s.",
+                    file=sys.stderr,
+                )
+
+    def succeeded(self) -> None:
+        """Creep back towards the configured rate after a successful request."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                step = self.max_rate / RATE_RECOVERY_STEPS
+                self.rate = min(self.max_rate, self.rate + step)
+
+
+def retry_after_delay(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (seconds or HTTP date)."""
+    import email.utils
+
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        delay = float(value)
+    else:
+        try:
+            delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, delay), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter, so retrying workers don't move in lockstep."""
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def _retry_delay(
+    limiter: Optional[RateLimiter],
+    status: int,
+    retry_after: Optional[str],
+    attempt: int,
+) -> float:
+    """How long to wait before retrying a response, telling the limiter if throttled."""
+    delay = retry_after_delay(retry_after)
+    if delay is None:
+        delay = backoff_delay(attempt)
+    if limiter is not None and status in THROTTLE_STATUSES:
+        limiter.throttled(delay)
+    return delay
+
+
+class _TimedConnection:
+    """Mixin reporting DNS lookup and connect (plus TLS handshake) time."""
+
+    def connect(self) -> None:
+        with _timed("connect"):
+            super().connect()
+
+
+@functools.lru_cache(maxsize=None)
+def _retrying_adapter() -> type:
+    """
+    RetryingAdapter and the connection classes it installs, defined on first
+    use since their bases need requests and urllib3.
+    """
+    import requests
+    import urllib3
+
+    class _TimedHTTPConnection(_TimedConnection, urllib3.connection.HTTPConnection):
+        pass
+
+    class _TimedHTTPSConnection(_TimedConnection, urllib3.connection.HTTPSConnection):
+        pass
+
+    class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+        ConnectionCls = _TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+        ConnectionCls = _TimedHTTPSConnection
+
+    class RetryingAdapter(requests.adapters.HTTPAdapter):
+        """
+        Transport adapter that applies a default timeout, waits for the shared
+        RateLimiter before every request, and retries connection errors and
+        429/5xx responses with backoff, honouring Retry-After.
+        """
+
+        def __init__(
+            self,
+            limiter: Optional[RateLimiter] = None,
+            retries: int = DEFAULT_HTTP_RETRIES,
+            timeout: float = DEFAULT_TIMEOUT,
+            **kwargs,
+        ) -> None:
+            super().__init__(**kwargs)
+            self.limiter = limiter
+            self.retries = retries
+            self.timeout = timeout
+
+        def init_poolmanager(self, *args, **kwargs) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _TimedHTTPConnectionPool,
+                "https": _TimedHTTPSConnectionPool,
+            }
+
+        def send(self, request, **kwargs):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = self.timeout
+            attempt = 0
+            while True:
+                if self.limiter is not None:
+                    time.sleep(self.limiter.reserve())
+                try:
+                    response = super().send(request, **kwargs)
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                ) as e:
+                    if attempt >= self.retries:
+                        raise
+                    reason, delay = str(e), backoff_delay(attempt)
+                else:
+                    status = response.status_code
+                    if status not in RETRY_STATUSES or attempt >= self.retries:
+                        if self.limiter is not None and status < 400:
+                            self.limiter.succeeded()
+                        return response
+                    retry_after = response.headers.get("Retry-After")
+                    reason = f"HTTP {status}"
+                    delay = _retry_delay(self.limiter, status, retry_after, attempt)
+                    response.close()
+                attempt += 1
+                print(
+                    f"Warning: {request.url} failed ({reason}), retrying in "
+                    f"{delay:.1f}s (attempt {attempt}/{self.retries}).",
+                    file=sys.stderr,
+                )
+                time.sleep(delay)
+
+    return RetryingAdapter
+
+
+# --- HTTP Cache ---
+@dataclass
+class CacheEntry:
+    """A cached response body plus the validators needed to revalidate it."""
+
+    url: str
+    body: bytes
+    content_type: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of page responses keyed by URL.
+    Entries younger than `ttl` seconds are served as-is, older ones are
+    revalidated with If-None-Match/If-Modified-Since. Once the cache holds
+    more than `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # key -> (size in bytes, last access time), rebuilt from the files on disk
+        self._index: Dict[str, Tuple[int, float]] = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                key = name[: -len(".json")]
+                body_path = self._path(key, ".body")
+                if os.path.exists(body_path):
+                    meta_stat = os.stat(self._path(key, ".json"))
+                    self._index[key] = (
+                        os.path.getsize(body_path),
+                        meta_stat.st_mtime,
+                    )
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for size, _ in self._index.values())
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for `url`, marking it as recently used."""
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                with open(self._path(key, ".json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(self._path(key, ".body"), "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            now = time.time()
+            os.utime(self._path(key, ".json"), (now, now))
+            self._index[key] = (len(body), now)
+        return CacheEntry(body=body, **meta)
+
+    def body_path(self, url: str) -> Optional[str]:
+        """The file holding the cached body for `url`, if there is one."""
+        key = self._key(url)
+        with self._lock:
+            return self._path(key, ".body") if key in self._index else None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether `entry` is young enough to be served without revalidation."""
+        return time.time() - entry.stored_at < self.ttl
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        content_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Save a response body and its validators, evicting old entries if needed."""
+        key = self._key(url)
+        meta = {
+            "url": url,
+            "content_type": content_type,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        with self._lock:
+            # Write to temp files first so readers never see half an entry
+            for suffix, data in ((".body", body), (".json", json.dumps(meta))):
+                tmp_path = self._path(key, suffix + ".tmp")
+                mode = "wb" if isinstance(data, bytes) else "w"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key, suffix))
+            self._index[key] = (len(body), time.time())
+            self._evict()
+
+    def refresh(self, entry: CacheEntry) -> None:
+        """Restart the TTL of an entry the server confirmed as unchanged."""
+        self.store(
+            entry.url,
+            entry.body,
+            entry.content_type,
+            entry.etag,
+            entry.last_modified,
+        )
+
+    def _remove(self, key: str) -> None:
+        for suffix in (".body", ".json"):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+        self._index.pop(key, None)
+
+    def _evict(self) -> None:
+        total = self.total_bytes
+        for key, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+
+@functools.lru_cache(maxsize=None)
+def _caching_adapter() -> type:
+    """CachingAdapter, defined on first use like RetryingAdapter."""
+    import requests
+
+    class CachingAdapter(_retrying_adapter()):
+        """
+        Transport adapter that answers page GETs from a ResponseCache.
+        Streamed requests (file downloads) bypass the cache. With `cache_only`,
+        nothing goes to the network and uncached URLs fail with ConnectionError.
+        """
+
+        def __init__(
+            self, cache: ResponseCache, cache_only: bool = False, **kwargs
+        ) -> None:
+            super().__init__(**kwargs)
+            self.cache = cache
+            self.cache_only = cache_only
+
+        def send(self, request, stream=False, **kwargs):
+            if request.method != "GET" or stream:
+                if self.cache_only:
+                    raise requests.exceptions.ConnectionError(
+                        f"{request.url} is not available offline (--cache-only)",
+                        request=request,
+                    )
+                return super().send(request, stream=stream, **kwargs)
+
+            entry = self.cache.lookup(request.url)
+            if entry is not None and (self.cache_only or self.cache.is_fresh(entry)):
+                return self._cached_response(request, entry)
+            if self.cache_only:
+                raise requests.exceptions.ConnectionError(
+                    f"{request.url} is not in the cache (--cache-only)", request=request
+                )
+            if entry is not None:
+                if entry.etag:
+                    request.headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    request.headers["If-Modified-Since"] = entry.last_modified
+
+            response = super().send(request, stream=stream, **kwargs)
+            if response.status_code == 304 and entry is not None:
+                self.cache.refresh(entry)
+                return self._cached_response(request, entry)
+            if response.status_code == 200:
+                self.cache.store(
+                    request.url,
+                    response.content,
+                    response.headers.get("Content-Type"),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+            return response
+
+        @staticmethod
+        def _cached_response(request, entry: CacheEntry) -> requests.Response:
+            response = requests.Response()
+            response.status_code = 200
+            response.reason = "OK"
+            response.url = request.url
+            response.request = request
+            response._content = entry.body
+            if entry.content_type:
+                response.headers["Content-Type"] = entry.content_type
+            response.encoding = requests.utils.get_encoding_from_headers(
+                response.headers
+            )
+            return response
+
+    return CachingAdapter
+
+
+def make_session(
+    pool_size: int = DEFAULT_JOBS,
+    cache: Optional[ResponseCache] = None,
+    cache_only: bool = False,
+    limiter: Optional[RateLimiter] = None,
+    retries: int = DEFAULT_HTTP_RETRIES,
+) -> requests.Session:
+    """
+    Create a keep-alive session whose connection pool fits `pool_size` workers.
+    Requests wait for the limiter and are retried with backoff on transient
+    failures. If a cache is given, page requests are served and revalidated
+    through it.
+    """
+    import requests
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter_kwargs = {
+        "pool_connections": pool_size,
+        # Each worker may stream writeup attachments next to its archive
+        "pool_maxsize": pool_size * (1 + WRITEUP_JOBS),
+        "limiter": limiter,
+        "retries": retries,
+    }
+    if limiter is not None and limiter.max_per_host:
+        # A blocking pool caps the connections in use, streamed downloads included
+        adapter_kwargs.update(pool_maxsize=limiter.max_per_host, pool_block=True)
+    if cache is not None:
+        adapter = _caching_adapter()(cache, cache_only, **adapter_kwargs)
+    else:
+        adapter = _retrying_adapter()(**adapter_kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# --- Content-Addressed Store ---
+def _link_or_copy(src: str, dst: str) -> None:
+    """Make `dst` share `src`'s data: hardlink, else reflink, else plain copy."""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        import fcntl
+
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copyfile(src, dst)
+
+
+class BlobStore:
+    """
+    Archives stored once by SHA-256 under `objects/<ab>/<digest>`, shared by
+    every output tree that points at it. `index.json` maps download URLs to
+    digests so an archive that was fetched before is never downloaded again.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(
+                f"Warning: Ignoring unreadable store index {self.index_path}: {e}",
+                file=sys.stderr,
+            )
+            return {}
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Return the digest stored for `url`, if its blob is still present."""
+        with self._lock:
+            digest = self._index.get(url)
+        if digest and os.path.exists(self.blob_path(digest)):
+            return digest
+        return None
+
+    def add(self, url: str, filepath: str, digest: str) -> None:
+        """Move a downloaded file into the store and link it back in place."""
+        import tempfile
+
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            # Unique across the threads and processes sharing the store
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob), suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(filepath, tmp_path)
+            os.chmod(tmp_path, 0o444)  # Shared by many trees, never edit in place
+            os.replace(tmp_path, blob)
+        _link_or_copy(blob, filepath)
+        with self._lock:
+            self._index[url] = digest
+            # Merge with entries other processes added since we loaded the index
+            merged = {**self._read_index(), **self._index}
+            self._index = merged
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def materialize(self, digest: str, filepath: str) -> None:
+        """Place the stored blob at `filepath` without copying it if possible."""
+        _link_or_copy(self.blob_path(digest), filepath)
+
+
+class _Hasher(Protocol):
+    """What _hash_file needs of a hashlib object."""
+
+    def update(self, data: bytes, /) -> None: ...
+
+
+def _hash_file(path: str, hasher: _Hasher) -> None:
+    """Feed the contents of `path` into `hasher`."""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+            hasher.update(block)
+
+
+def fetch_html(url: str, session: Optional[requests.Session] = None) -> Optional[str]:
+    """Fetch the URL and return the page text."""
+    import requests
+
+    http = session or requests
     try:
-        response = requests.get(url, headers={"User-Agent": USER_AGENT})
+        response = http.get(
+            url, headers={"User-Agent": USER_AGENT}, timeout=DEFAULT_TIMEOUT
+        )
         response.raise_for_status()
-        return BeautifulSoup(response.text, "html.parser")
+        return response.text
     except requests.exceptions.RequestException as e:
         print(f"Error: Could not fetch URL {url}. Reason: {e}", file=sys.stderr)
         return None
 
 
-def download_file(url: str, directory: str = ".") -> Optional[str]:
-    """Download a file from a URL into a specified directory."""
+def get_soup(
+    url: str, session: Optional[requests.Session] = None
+) -> Optional[bs4.BeautifulSoup]:
+    """Fetch the URL and return a BeautifulSoup object."""
+    import bs4
+
+    html = fetch_html(url, session)
+    if html is None:
+        return None
+    return bs4.BeautifulSoup(html, HTML_PARSER)
+
+
+def _file_size(path: str) -> int:
+    """Size of `path` in bytes, or 0 if it doesn't exist."""
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DownloadLimitError(Exception):
+    """Raised when a download turns out larger than the run allows."""
+
+
+def _content_length(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.isdigit() else None
+
+
+def _check_download_size(filename: str, size: int, max_bytes: Optional[int]) -> None:
+    if max_bytes is not None and size > max_bytes:
+        raise DownloadLimitError(
+            f"{filename} is over the {max_bytes} byte limit ({size} bytes or more)"
+        )
+
+
+def _throttle_delay(received: int, started: float, bandwidth: Optional[float]) -> float:
+    """Seconds to wait so `received` bytes since `started` stay under `bandwidth`."""
+    if not bandwidth:
+        return 0.0
+    return received / bandwidth - (time.perf_counter() - started)
+
+
+def probe_size(url: str, session: Optional[requests.Session] = None) -> Optional[int]:
+    """The size of `url` according to a HEAD request, or None if it doesn't say."""
+    import requests
+
+    http = session or requests
     try:
-        response = requests.get(url, stream=True, headers={"User-Agent": USER_AGENT})
+        response = http.head(
+            url,
+            headers={"User-Agent": USER_AGENT},
+            timeout=DEFAULT_TIMEOUT,
+            allow_redirects=True,
+        )
         response.raise_for_status()
-        filename = url.split("/")[-1]
-        filepath = os.path.join(directory, filename)
-        with open(filepath, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"Successfully downloaded {filename}")
-        return filepath
-    except requests.exceptions.RequestException as e:
-        print(f"Error: Could not download file {url}. Reason: {e}", file=sys.stderr)
+    except requests.exceptions.RequestException:
         return None
+    return _content_length(response.headers.get("Content-Length"))
+
+
+def _chunk_size_for(content_length: Optional[str], chunk_size: Optional[int]) -> int:
+    """Pick the read size: explicit if given, bigger buffers for big archives."""
+    if chunk_size:
+        return chunk_size
+    if content_length and content_length.isdigit():
+        if int(content_length) >= LARGE_DOWNLOAD_THRESHOLD:
+            return LARGE_DOWNLOAD_CHUNK_SIZE
+    return DEFAULT_CHUNK_SIZE
+
+
+def _resume_matches(status: int, content_range: Optional[str], offset: int) -> bool:
+    """Whether a response continues a partial download at `offset`."""
+    if status != 206 or not content_range:
+        return False
+    match = re.match(r"bytes (\d+)-", content_range)
+    return bool(match) and int(match.group(1)) == offset
+
+
+def download_file(
+    url: str,
+    directory: str = ".",
+    session: Optional[requests.Session] = None,
+    chunk_size: Optional[int] = None,
+    retries: int = DEFAULT_DOWNLOAD_RETRIES,
+    store: Optional[BlobStore] = None,
+    max_bytes: Optional[int] = None,
+    bandwidth: Optional[float] = None,
+) -> Optional[str]:
+    """
+    Download a file from a URL into a specified directory.
+    Data goes to `<name>.part` first and is renamed once complete. A left-over
+    or interrupted `.part` file is resumed with a Range request; a connection
+    that drops mid-transfer is resumed up to `retries` times.
+    With a BlobStore, the SHA-256 is computed while streaming and the file is
+    deduplicated into the store; URLs already in the store aren't fetched.
+    Files over `max_bytes` are given up on as soon as that is known, and
+    `bandwidth` caps the transfer at that many bytes per second.
+    """
+    import requests
+
+    http = session or requests
+    filename = url.split("/")[-1]
+    filepath = os.path.join(directory, filename)
+    part_path = filepath + ".part"
+    if store is not None:
+        digest = store.lookup(url)
+        if digest:
+            store.materialize(digest, filepath)
+            print(f"Reusing stored copy of {filename} ({digest[:12]})")
+            return filepath
+    attempt = 0
+    while True:
+        offset = _file_size(part_path)
+        headers = {"User-Agent": USER_AGENT}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        try:
+            response = http.get(
+                url, stream=True, headers=headers, timeout=DEFAULT_TIMEOUT
+            )
+            if offset and response.status_code == 416:
+                # The partial file doesn't fit the remote one any more
+                os.remove(part_path)
+                continue
+            response.raise_for_status()
+            resumed = offset and _resume_matches(
+                response.status_code, response.headers.get("Content-Range"), offset
+            )
+            if offset and not resumed:
+                print(f"Server ignored the range request, restarting {filename}")
+            content_length = response.headers.get("Content-Length")
+            start = offset if resumed else 0
+            length = _content_length(content_length)
+            if length is not None:
+                _check_download_size(filename, start + length, max_bytes)
+            size = _chunk_size_for(content_length, chunk_size)
+            hasher = hashlib.sha256()
+            if resumed:
+                _hash_file(part_path, hasher)
+            received = 0
+            started = time.perf_counter()
+            try:
+                with open(part_path, "ab" if resumed else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=size):
+                        hasher.update(chunk)
+                        received += len(chunk)
+                        _check_download_size(filename, start + received, max_bytes)
+                        f.write(chunk)
+                        delay = _throttle_delay(received, started, bandwidth)
+                        if delay > 0:
+                            time.sleep(delay)
+            finally:
+                _count_download(received)
+            os.replace(part_path, filepath)
+            print(f"Successfully downloaded {filename}")
+            if store is not None:
+                store.add(url, filepath, hasher.hexdigest())
+            return filepath
+        except DownloadLimitError as e:
+            response.close()
+            _discard(part_path)
+            print(f"Warning: Skipping download, {e}.", file=sys.stderr)
+            return None
+        except requests.exceptions.RequestException as e:
+            received = _file_size(part_path)
+            if received > offset and attempt < retries:
+                # Only retry transfers that were making progress
+                attempt += 1
+                print(
+                    f"Warning: Download of {filename} interrupted after "
+                    f"{received} bytes ({e}). Resuming (attempt {attempt}/{retries}).",
+                    file=sys.stderr,
+                )
+                continue
+            print(f"Error: Could not download file {url}. Reason: {e}", file=sys.stderr)
+            return None
+
+
+class ZipLimitError(Exception):
+    """Raised when an archive exceeds the extraction limits (a likely zip bomb)."""
+
+
+@dataclass
+class ExtractLimits:
+    """Bounds applied while extracting an archive and the archives nested in it."""
+
+    max_depth: int = DEFAULT_MAX_ZIP_DEPTH  # Nesting levels that are unpacked
+    max_bytes: int = DEFAULT_MAX_EXTRACT_BYTES  # Total uncompressed bytes
+    max_ratio: float = DEFAULT_MAX_ZIP_RATIO  # Uncompressed/compressed per member
+
+
+class _ExtractBudget:
+    """Running byte count shared by every archive in one extraction."""
+
+    def __init__(self, limits: ExtractLimits) -> None:
+        self.limits = limits
+        self.total = 0
+
+    def copy(self, src: BinaryIO, dst: BinaryIO, info: zipfile.ZipInfo) -> None:
+        """Stream a member into dst, enforcing the limits as bytes arrive."""
+        written = 0
+        while True:
+            chunk = src.read(DEFAULT_CHUNK_SIZE)
+            if not chunk:
+                return
+            written += len(chunk)
+            self.total += len(chunk)
+            if self.total > self.limits.max_bytes:
+                raise ZipLimitError(
+                    f"more than {self.limits.max_bytes} bytes uncompressed"
+                )
+            if (
+                written > ZIP_RATIO_CHECK_THRESHOLD
+                and written > info.compress_size * self.limits.max_ratio
+            ):
+                raise ZipLimitError(
+                    f"{info.filename} expands more than {self.limits.max_ratio:g}x"
+                )
+            dst.write(chunk)
+
+
+def _member_path(directory: str, name: str) -> Optional[str]:
+    """Map a member name under directory, dropping absolute and `..` components."""
+    parts = [p for p in re.split(r"[\\/]", name) if p not in ("", ".", "..")]
+    return os.path.join(directory, *parts) if parts else None
+
+
+def _extract_members(
+    zf: zipfile.ZipFile,
+    directory: str,
+    pwd: Optional[bytes],
+    budget: _ExtractBudget,
+    depth: int,
+) -> None:
+    """
+    Extract every member of zf into directory. Nested zips are opened from an
+    in-memory copy of the member and unpacked into a folder named after them;
+    one that can't be read (corrupt, or under another password) is kept as a
+    file instead. Only ZipLimitError aborts the extraction.
+    """
+    import zipfile
 
+    for info in zf.infolist():
+        target = _member_path(directory, info.filename)
+        if target is None:
+            continue
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zf.open(info, pwd=pwd) as src:
+            if not info.filename.lower().endswith(".zip"):
+                with open(target, "wb") as dst:
+                    budget.copy(src, dst, info)
+                continue
+            buffer = io.BytesIO()
+            budget.copy(src, buffer, info)
+        if depth >= budget.limits.max_depth:
+            print(
+                f"Warning: Not unpacking {info.filename}, nested deeper than "
+                f"{budget.limits.max_depth} levels.",
+                file=sys.stderr,
+            )
+            with open(target, "wb") as dst:
+                dst.write(buffer.getbuffer())
+            continue
+        print(f"Found nested zip file: {info.filename}. Unpacking it in memory.")
+        try:
+            with zipfile.ZipFile(buffer) as nested:
+                _extract_members(nested, target[:-4], pwd, budget, depth + 1)
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error) as e:
+            print(
+                f"Warning: Could not unpack nested zip {info.filename}: {e}. "
+                "Keeping it as is.",
+                file=sys.stderr,
+            )
+            with open(target, "wb") as dst:
+                dst.write(buffer.getbuffer())
 
+
+@_timed_phase("unzip")
 def unzip_file(
-    zip_filepath: str, password: Optional[str] = None, extract_dir: Optional[str] = None
+    zip_filepath: str,
+    password: Optional[str] = None,
+    extract_dir: Optional[str] = None,
+    limits: Optional[ExtractLimits] = None,
 ) -> bool:
     """
-    Unzips a password-protected zip file.
+    Unzips a password-protected zip file, including any zips nested inside it.
     Returns True on success, False on failure.
     """
+    import zipfile
+
     if extract_dir is None:
         base_extract_dir = os.path.dirname(zip_filepath)
     else:
@@ -64,30 +1142,17 @@ def unzip_file(
     )  # Always extract to 'crackme' subdirectory
     os.makedirs(final_extract_dir, exist_ok=True)
 
+    pwd = password.encode("utf-8") if password else None
+    budget = _ExtractBudget(limits or ExtractLimits())
     try:
         with zipfile.ZipFile(zip_filepath, "r") as zf:
-            if password:
-                zf.extractall(path=final_extract_dir, pwd=password.encode("utf-8"))
-            else:
-                zf.extractall(path=final_extract_dir)
-
-            print(f"Successfully unzipped {zip_filepath} to {final_extract_dir}")
-
-            # Recursive unzipping
-            for member in zf.namelist():
-                member_path = os.path.join(final_extract_dir, member)
-                if os.path.isfile(member_path) and member_path.lower().endswith(".zip"):
-                    print(
-                        f"Found nested zip file: {member_path}. Attempting to unzip recursively."
-                    )
-                    # Recursively call unzip_file, passing the current final_extract_dir as the base for the next 'crackme' dir
-                    unzip_file(
-                        member_path, password, final_extract_dir
-                    )  # Pass password for nested zips too
-
-            return True
+            _extract_members(zf, final_extract_dir, pwd, budget, depth=1)
+        print(f"Successfully unzipped {zip_filepath} to {final_extract_dir}")
+        return True
     except zipfile.BadZipFile:
         print(f"Error: {zip_filepath} is a bad zip file.", file=sys.stderr)
+    except ZipLimitError as e:
+        print(f"Error: Refusing to unzip {zip_filepath}: {e}.", file=sys.stderr)
     except RuntimeError as e:  # For incorrect password
         print(
             f"Error unzipping {zip_filepath}: {e}. Incorrect password?", file=sys.stderr
@@ -100,41 +1165,207 @@ def unzip_file(
     return False
 
 
-def generate_markdown(title: str, details: Dict[str, str], description: str) -> str:
-    """Generate the markdown content from the scraped data."""
+def _quote(text: str) -> str:
+    return "\n".join(f"> {line}" for line in text.splitlines())
+
+
+def generate_markdown(
+    title: str,
+    details: Dict[str, str],
+    description: str,
+    comments: Sequence[CrackmeComment] = (),
+    writeups: Sequence[CrackmeWriteup] = (),
+    saved_writeups: Collection[str] = (),
+) -> str:
+    """
+    Generate the markdown content from the scraped data. Writeups whose
+    attachment is among the `saved_writeups` file names link to the local
+    copy, the others to the site.
+    """
     md_parts = [f"# {title}\n", "## Details\n"]
     for key, value in details.items():
         md_parts.append(f"- **{key}:** {value}")
 
     md_parts.append("\n## Description\n")
     # Handle multi-line description by prepending "> " to each line
-    formatted_description_text = "\n".join(
-        [f"> {line}" for line in description.splitlines()]
-    )
-    md_parts.append(f"{formatted_description_text}\n")
+    md_parts.append(f"{_quote(description)}\n")
+
+    if comments:
+        md_parts.append("## Comments\n")
+        for comment in comments:
+            posted = f" on {comment.posted}" if comment.posted else ""
+            md_parts.append(
+                f"**{comment.author}**{posted}:\n\n{_quote(comment.text)}\n"
+            )
+    if writeups:
+        md_parts.append("## Writeups\n")
+        for writeup in writeups:
+            heading = f"**{writeup.author}**"
+            if writeup.url:
+                name = writeup.url.rsplit("/", 1)[-1]
+                link = (
+                    f"{WRITEUPS_DIR}/{name}" if name in saved_writeups else writeup.url
+                )
+                heading += f" ([{name}]({link}))"
+            text = f":\n\n{_quote(writeup.text)}" if writeup.text else ""
+            md_parts.append(f"{heading}{text}\n")
 
     return "\n".join(md_parts)
 
 
-def scrape_crackme(
-    crackme_id: str, output_dir: str, password: Optional[str] = None
-) -> None:
-    """Scrape a crackme page and save the details."""
-    url = f"{BASE_URL}/crackme/{crackme_id}"
-    print(f"Scraping {url}...")
-    soup = get_soup(url)
-    if not soup:
-        sys.exit(1)
+@functools.lru_cache(maxsize=None)
+def _crackme_strainer() -> type:
+    """_CrackmeStrainer, defined on first use since its base needs bs4."""
+    import bs4
 
-    # --- Extract Title and Author from <h3> tag ---
-    # The structure is <h3><a href="/user/mirunaf">mirunaf</a>'s Very easy</h3>
-    h3_tag = soup.find("h3")
-    if not isinstance(h3_tag, Tag):
-        print("Error: Could not find main title/author tag.", file=sys.stderr)
-        sys.exit(1)
+    class _CrackmeStrainer(bs4.SoupStrainer):
+        """
+        Keep only the parts of a crackme page parse_crackme reads: the title
+        <h3>, the details panel (details, description, download link, comments
+        and writeups) and loose <p>/<a> tags that some page variants put
+        outside the panel. Navbar, sidebar, modals' forms, scripts and the
+        footer are never built.
+        """
 
-    full_title_text = h3_tag.text.strip()
+        def __init__(self) -> None:
+            super().__init__(name=["h3", "div", "p", "a"])
 
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            if not super().allow_tag_creation(nsprefix, name, attrs):
+                return False
+            if name in ("h3", "p"):
+                return True
+            attrs = attrs or {}
+            classes = attrs.get("class") or ""
+            if isinstance(classes, str):
+                classes = classes.split()
+            if name == "div":
+                return "panel-background" in classes or attrs.get("id") in (
+                    "comments",
+                    "solutions",
+                )
+            return "btn-download" in classes
+
+    return _CrackmeStrainer
+
+
+def _classes(tag: bs4.Tag) -> List[str]:
+    return tag.get("class") or []
+
+
+def _parse_detail(p_tag: bs4.Tag) -> Optional[Tuple[str, str]]:
+    """Parse a `Key:<br> value` detail paragraph into a (key, value) pair."""
+    # Handle the explicit Author: line first
+    if p_tag.text.strip().startswith("Author:"):
+        return "Author", p_tag.find("a").text.strip()
+    br_tag = p_tag.find("br")
+    if br_tag:
+        key = p_tag.contents[0].strip().replace(":", "")
+        return key, br_tag.next_sibling.strip()
+    return None
+
+
+def _parse_description(paragraph: bs4.Tag) -> str:
+    """Read the description from the <p> following the Description header."""
+    import bs4
+
+    # The actual text is inside a span with style="white-space: pre-line"
+    span = paragraph.find("span", style="white-space: pre-line")
+    if isinstance(span, bs4.Tag):
+        return span.text.strip()
+    return paragraph.text.strip()  # Fallback if span not found
+
+
+def _pre_line_text(span: bs4.Tag) -> str:
+    # Spans use white-space: pre-line, so the source indentation is noise
+    return "\n".join(line.strip() for line in span.get_text().splitlines()).strip()
+
+
+def _parse_comments(container: bs4.Tag) -> List[CrackmeComment]:
+    """Read the `<p><a>user</a> on DATE: <span>text</span></p>` comment entries."""
+    comments = []
+    for p_tag in container.find_all("p"):
+        user = p_tag.find("a", href=re.compile(r"^/user/"))
+        span = p_tag.find("span")
+        if user is None or span is None:
+            continue
+        posted = re.search(r"on (.+?):\s*$", str(user.next_sibling or ""))
+        comments.append(
+            CrackmeComment(
+                user.text.strip(),
+                posted.group(1) if posted else "",
+                _pre_line_text(span),
+            )
+        )
+    return comments
+
+
+def _parse_writeups(container: bs4.Tag, base_url: str) -> List[CrackmeWriteup]:
+    """
+    Read the writeups tab: each `<p>Solution by <a>user</a>:<br><span>text</span></p>`
+    sits in a column followed by one holding its Download link.
+    """
+    writeups = []
+    for p_tag in container.find_all("p"):
+        user = p_tag.find("a", href=re.compile(r"^/user/"))
+        if user is None or not p_tag.get_text().lstrip().startswith("Solution by"):
+            continue
+        span = p_tag.find("span")
+        url = None
+        column = p_tag.find_parent("div")
+        links = column.find_next_sibling("div") if column else None
+        link = links.find("a", href=True) if links else None
+        if link is not None:
+            url = urljoin(base_url, link["href"])
+        text = _pre_line_text(span) if span else ""
+        writeups.append(CrackmeWriteup(user.text.strip(), text, url))
+    return writeups
+
+
+def parse_crackme(
+    soup: bs4.BeautifulSoup, base_url: Optional[str] = None
+) -> CrackmeInfo:
+    """
+    Extract title, author, details, description, download link, comments and
+    writeups from a crackme page in a single walk over its tags. Links are
+    resolved against `base_url`, the site the page came from (BASE_URL by default).
+    Raises ScrapeError if the page has no title/author heading.
+    """
+    base_url = base_url or BASE_URL
+    h3_tag = None
+    details: Dict[str, str] = {}
+    description = None
+    download_url = None
+    comments: List[CrackmeComment] = []
+    writeups: List[CrackmeWriteup] = []
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name == "h3":
+            # The structure is <h3><a href="/user/mirunaf">mirunaf</a>'s Very easy</h3>
+            h3_tag = h3_tag or tag
+        elif name == "div" and "col-3" in _classes(tag):
+            # Details are <p> tags in <div class="column col-3"> inside the panel
+            p_tag = tag.find("p")
+            detail = _parse_detail(p_tag) if p_tag else None
+            if detail:
+                details[detail[0]] = detail[1]
+        elif name == "div" and tag.get("id") == "comments":
+            comments = _parse_comments(tag)
+        elif name == "div" and tag.get("id") == "solutions":
+            writeups = _parse_writeups(tag, base_url)
+        elif name == "p" and description is None:
+            # Description is in a <p> tag following a <p><b>Description</b></p>
+            if tag.get_text(strip=True) == "Description":
+                paragraph = tag.find_next_sibling("p")
+                description = _parse_description(paragraph) if paragraph else ""
+        elif name == "a" and download_url is None:
+            if "btn-download" in _classes(tag):
+                download_url = urljoin(base_url, tag["href"])
+
+    if h3_tag is None:
+        raise ScrapeError("Could not find main title/author tag.")
+
+    full_title_text = h3_tag.text.strip()
     # Extract author (text before 's)
     author_match = re.match(r"^(.*?)'s (.*)$", full_title_text)
     if author_match:
@@ -144,128 +1375,3215 @@ def scrape_crackme(
         author = "Unknown"
         title = full_title_text  # Fallback if format is different
 
-    # Fix: Replace spaces with underscores for safe directory names
-    safe_title_for_dir = title.replace(" ", "_")
-    safe_title_for_dir = "".join(
-        c for c in safe_title_for_dir if c.isalnum() or c in ("_",)
-    ).rstrip()
+    return CrackmeInfo(
+        title, author, details, description or "", download_url, comments, writeups
+    )
+
+
+def strain_crackme_page(html: str) -> bs4.BeautifulSoup:
+    """Parse only the sections of a crackme page that parse_crackme reads."""
+    import bs4
+
+    return bs4.BeautifulSoup(html, HTML_PARSER, parse_only=_crackme_strainer()())
+
+
+def extract_crackme(html: str, base_url: Optional[str] = None) -> CrackmeInfo:
+    """Parse only the relevant sections of a crackme page and extract its metadata."""
+    return parse_crackme(strain_crackme_page(html), base_url)
+
+
+def crackme_folder_name(author: str, title: str) -> str:
+    """Build the filesystem-safe `<author>_<title>` folder name for a crackme."""
+    # Fix: Replace spaces with underscores for safe directory names
+    safe_title_for_dir = title.replace(" ", "_")
+    safe_title_for_dir = "".join(
+        c for c in safe_title_for_dir if c.isalnum() or c in ("_",)
+    ).rstrip()
 
     # Construct folder title as author_title
-    folder_name = f"{author.replace(' ', '_')}_{safe_title_for_dir}"
-    crackme_dir = os.path.join(output_dir, folder_name)
+    return f"{author.replace(' ', '_')}_{safe_title_for_dir}"
+
+
+def _id_hash(crackme_id: str) -> int:
+    # Stable across runs and machines, unlike hash()
+    return zlib.crc32(crackme_id.encode("utf-8"))
+
+
+def crackme_dir_path(
+    output_dir: str, crackme_id: str, info: CrackmeInfo, layout: str = "flat"
+) -> str:
+    """
+    Where a crackme is saved: `<author>_<title>` in the flat layout, or
+    `by-id/<xx>/<id>` in the sharded one, where `xx` spreads the IDs over
+    256 directories.
+    """
+    if layout == "sharded":
+        shard = f"{_id_hash(crackme_id) & 0xFF:02x}"
+        return os.path.join(output_dir, SHARDS_DIR, shard, crackme_id)
+    return os.path.join(output_dir, crackme_folder_name(info.author, info.title))
+
+
+def make_crackme_dir(
+    output_dir: str, crackme_id: str, info: CrackmeInfo, layout: str = "flat"
+) -> str:
+    """Create a crackme's directory and, in the sharded layout, its readable alias."""
+    crackme_dir = crackme_dir_path(output_dir, crackme_id, info, layout)
     os.makedirs(crackme_dir, exist_ok=True)
+    if layout == "sharded":
+        _link_alias(output_dir, crackme_id, info, crackme_dir)
+    return crackme_dir
 
-    # --- Extract Details ---
-    details = {}
-    # Details are in <p> tags within <div class="column col-3"> inside <div class="columns panel-background">
-    panel_background_div = soup.find("div", class_="columns panel-background")
-    if isinstance(panel_background_div, Tag):
-        detail_columns = panel_background_div.find_all("div", class_="column col-3")
-        for col in detail_columns:
-            p_tag = col.find("p")
-            if p_tag and p_tag.text.strip().startswith(
-                "Author:"
-            ):  # Handle the explicit Author: line first
-                key = "Author"
-                value = p_tag.find("a").text.strip()
-                details[key] = value
-            elif p_tag and p_tag.find("br"):
-                key = p_tag.contents[0].strip().replace(":", "")
-                value = p_tag.find("br").next_sibling.strip()
-                details[key] = value
-
-    # --- Extract Description ---
-    description = ""
-    # Description is in a <p> tag following a <p><b>Description</b></p>
-    description_header_p = soup.find(
-        "p",
-        string=lambda text: text
-        and "Description" in text
-        and text.strip() == "Description",
-    )
-    if isinstance(description_header_p, Tag):
-        description_span = description_header_p.find_next_sibling("p")
-        if isinstance(description_span, Tag):
-            # The actual text is inside a span with style="white-space: pre-line"
-            final_description_text = description_span.find(
-                "span", style="white-space: pre-line"
-            )
-            if isinstance(final_description_text, Tag):
-                description = final_description_text.text.strip()
-            else:
-                description = (
-                    description_span.text.strip()
-                )  # Fallback if span not found
 
-    # --- Download File ---
-    download_link = soup.find(
-        "a", class_="btn-download"
-    )  # Use class for more specific selection
-    if isinstance(download_link, Tag):
-        download_url = urljoin(BASE_URL, download_link["href"])
-        print(f"Found download link: {download_url}")
-        zip_filepath = download_file(download_url, directory=crackme_dir)
-        if zip_filepath:
-            unzipped = False
-            if password:
-                print(f"Attempting to unzip with provided password: '{password}'")
-                unzipped = unzip_file(zip_filepath, password=password)
-
-            if not unzipped:
-                default_passwords = ["crackmes.one", "crackmes.de"]
-                for default_pwd in default_passwords:
-                    print(f"Attempting to unzip with default password: '{default_pwd}'")
-                    unzipped = unzip_file(zip_filepath, password=default_pwd)
-                    if unzipped:
-                        break
-
-            if not unzipped:
-                print(
-                    f"Warning: Could not unzip {zip_filepath} with any provided or default passwords. Trying without password.",
-                    file=sys.stderr,
-                )
-                if not unzip_file(zip_filepath):
-                    print(
-                        f"Warning: Could not unzip {zip_filepath} without password.",
-                        file=sys.stderr,
+def _link_alias(
+    output_dir: str, crackme_id: str, info: CrackmeInfo, crackme_dir: str
+) -> None:
+    """
+    Symlink `<author>_<title>` in the output directory to a sharded crackme
+    directory, or `<author>_<title>_<id>` if another crackme has that name.
+    """
+    target = os.path.relpath(crackme_dir, output_dir)
+    name = crackme_folder_name(info.author, info.title)
+    for alias in (name, f"{name}_{crackme_id}"):
+        path = os.path.join(output_dir, alias)
+        try:
+            os.symlink(target, path, target_is_directory=True)
+            return
+        except FileExistsError:
+            if os.path.islink(path) and os.readlink(path) == target:
+                return
+        except OSError as e:  # e.g. no symlink privilege on Windows
+            print(f"Warning: Could not link {path}: {e}", file=sys.stderr)
+            return
+
+
+def crackme_dirs(output_dir: str) -> Iterator[str]:
+    """Every crackme directory in a flat or sharded output tree, skipping aliases."""
+    if not os.path.isdir(output_dir):
+        return
+    for entry in os.scandir(output_dir):
+        if entry.name == SHARDS_DIR and entry.is_dir(follow_symlinks=False):
+            for shard in os.scandir(entry.path):
+                if shard.is_dir(follow_symlinks=False):
+                    yield from (
+                        e.path
+                        for e in os.scandir(shard.path)
+                        if e.is_dir(follow_symlinks=False)
                     )
+        elif entry.is_dir(follow_symlinks=False):
+            yield entry.path
+
+
+@_timed_phase("probe")
+def find_zip_password(
+    zip_filepath: str, candidates: Iterable[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Find the password of a zip without extracting it, by test-reading only
+    its smallest non-empty encrypted member with each candidate.
+    Returns (True, password) on a match, (True, None) if nothing in the
+    archive is encrypted, and (False, None) if no candidate fits. Raises
+    BadZipFile/NotImplementedError when the archive can't be probed.
+    """
+    import zipfile
+
+    with zipfile.ZipFile(zip_filepath, "r") as zf:
+        encrypted = [info for info in zf.infolist() if info.flag_bits & 0x1]
+        if not encrypted:
+            return True, None
+        # Empty members have a CRC of 0 whatever the password, so they prove
+        # nothing; they are only read when the archive has nothing else
+        member = min(
+            encrypted, key=lambda info: (info.file_size == 0, info.compress_size)
+        )
+        for candidate in candidates:
+            try:
+                # Reading to the end also checks the CRC, which rules out the
+                # 1-in-256 chance of a wrong password passing the header check
+                with zf.open(member, pwd=candidate.encode("utf-8")) as f:
+                    while f.read(DEFAULT_CHUNK_SIZE):
+                        pass
+                return True, candidate
+            except (RuntimeError, zipfile.BadZipFile, zlib.error):
+                continue
+    return False, None
+
+
+def unzip_with_fallbacks(
+    zip_filepath: str,
+    password: Optional[str] = None,
+    wordlist: Iterable[str] = (),
+    limits: Optional[ExtractLimits] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Unzip a downloaded crackme, trying the given password, the wordlist, the
+    site's default passwords and finally no password.
+    The password is detected up front so exactly one extraction runs; only
+    archives that can't be probed fall back to trial extractions.
+    Returns whether unzipping succeeded and the password that worked.
+    """
+    import zipfile
+
+    candidates = list(
+        dict.fromkeys([*filter(None, [password]), *wordlist, *DEFAULT_ZIP_PASSWORDS])
+    )
+    try:
+        matched, detected = find_zip_password(zip_filepath, candidates)
+    except (zipfile.BadZipFile, NotImplementedError, OSError) as e:
+        print(f"Could not probe {zip_filepath} for its password ({e}).")
     else:
-        print("Warning: Could not find download link.", file=sys.stderr)
+        if not matched:
+            print(
+                f"Warning: None of {len(candidates)} candidate passwords "
+                f"unlock {zip_filepath}.",
+                file=sys.stderr,
+            )
+            return False, None
+        if detected is None:
+            return unzip_file(zip_filepath, limits=limits), None
+        print(f"Detected zip password: '{detected}'")
+        return unzip_file(zip_filepath, password=detected, limits=limits), detected
 
-    # --- Generate and Save Markdown ---
-    md_content = generate_markdown(title, details, description)
+    if password:
+        print(f"Attempting to unzip with provided password: '{password}'")
+        if unzip_file(zip_filepath, password=password, limits=limits):
+            return True, password
+
+    for default_pwd in DEFAULT_ZIP_PASSWORDS:
+        print(f"Attempting to unzip with default password: '{default_pwd}'")
+        if unzip_file(zip_filepath, password=default_pwd, limits=limits):
+            return True, default_pwd
+
+    print(
+        f"Warning: Could not unzip {zip_filepath} with any provided or default passwords. Trying without password.",
+        file=sys.stderr,
+    )
+    if unzip_file(zip_filepath, limits=limits):
+        return True, None
+    print(
+        f"Warning: Could not unzip {zip_filepath} without password.",
+        file=sys.stderr,
+    )
+    return False, None
+
+
+def _saved_writeups(crackme_dir: str) -> Set[str]:
+    """The writeup attachments downloaded into a crackme's writeups folder."""
+    try:
+        return set(os.listdir(os.path.join(crackme_dir, WRITEUPS_DIR)))
+    except OSError:
+        return set()
+
+
+def readme_markdown(info: CrackmeInfo, crackme_dir: Optional[str] = None) -> str:
+    """The README.md content for the crackme saved in `crackme_dir`."""
+    return generate_markdown(
+        info.title,
+        info.details,
+        info.description,
+        info.comments,
+        info.writeups,
+        _saved_writeups(crackme_dir) if crackme_dir else (),
+    )
+
+
+def write_readme(crackme_dir: str, info: CrackmeInfo) -> str:
+    """Render the crackme's README.md. Raises ScrapeError if it cannot be written."""
+    md_content = readme_markdown(info, crackme_dir)
     md_filename = os.path.join(crackme_dir, "README.md")
     try:
         with open(md_filename, "w", encoding="utf-8") as f:
             f.write(md_content)
         print(f"Successfully created markdown file: {md_filename}")
     except IOError as e:
-        print(
-            f"Error: Could not write to file {md_filename}. Reason: {e}",
-            file=sys.stderr,
+        raise ScrapeError(f"Could not write to file {md_filename}. Reason: {e}") from e
+    return md_filename
+
+
+def scrape_crackme(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    options: Optional[ScrapeOptions] = None,
+) -> ScrapeResult:
+    """
+    Scrape a crackme page and save the details. Failures are printed and
+    returned as a result with `ok` unset, so callers decide the exit status.
+    """
+    started = time.perf_counter()
+    try:
+        result = _scrape_crackme(crackme_id, output_dir, password, session, options)
+    except ScrapeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        result = _failed_result(crackme_id, str(e), started)
+    _export_result(options, result)
+    return result
+
+
+def _scrape_crackme(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    options: Optional[ScrapeOptions] = None,
+) -> ScrapeResult:
+    """
+    Scrape a crackme page and save the details, timing each phase.
+    Raises ScrapeError on failure.
+    """
+    with _recording(PhaseTimings()) as timings, timings.phase("total"):
+        result = _scrape_phases(crackme_id, output_dir, password, session, options)
+    result.timings = timings
+    return result
+
+
+def _scrape_phases(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str],
+    session: Optional[requests.Session],
+    options: Optional[ScrapeOptions],
+) -> ScrapeResult:
+    options = options or ScrapeOptions()
+    url = f"{options.base_url}/crackme/{crackme_id}"
+    print(f"Scraping {url}...")
+    with _timed("fetch"):
+        html = fetch_html(url, session)
+    if html is None:
+        raise ScrapeError(f"Could not fetch crackme page {url}.")
+
+    with _timed("parse"):
+        soup = strain_crackme_page(html)
+    with _timed("extract"):
+        info = parse_crackme(soup, options.base_url)
+    skipped = _skipped_result(options, crackme_id, info)
+    if skipped is not None:
+        return skipped
+    crackme_dir = make_crackme_dir(output_dir, crackme_id, info, options.layout)
+    result = ScrapeResult(crackme_id, ok=True, directory=crackme_dir, info=info)
+    zip_filepath = None
+
+    # --- Download File ---
+    with _downloading_writeups(info, crackme_dir, session, options):
+        if info.download_url:
+            print(f"Found download link: {info.download_url}")
+            with _timed("download"):
+                zip_filepath = download_file(
+                    info.download_url,
+                    directory=crackme_dir,
+                    session=session,
+                    chunk_size=options.chunk_size,
+                    store=options.store,
+                    max_bytes=options.max_archive_bytes,
+                    bandwidth=options.bandwidth,
+                )
+            if zip_filepath:
+                result.extracted, result.password = unzip_with_fallbacks(
+                    zip_filepath, password, options.wordlist, options.limits
+                )
+        else:
+            print("Warning: Could not find download link.", file=sys.stderr)
+
+    # --- Generate and Save Markdown ---
+    with _timed("write"):
+        write_readme(crackme_dir, info)
+    with _timed("catalog"):
+        _catalog_scrape(options, crackme_id, info, result, zip_filepath)
+    return result
+
+
+def _writeup_urls(info: CrackmeInfo, options: ScrapeOptions) -> List[str]:
+    return [w.url for w in info.writeups if w.url] if options.writeups else []
+
+
+def _download_writeup(
+    url: str, directory: str, session: requests.Session, options: ScrapeOptions
+) -> PhaseTimings:
+    with _recording(PhaseTimings()) as timings, timings.phase("writeups"):
+        download_file(
+            url,
+            directory=directory,
+            session=session,
+            chunk_size=options.chunk_size,
+            store=options.store,
         )
-        sys.exit(1)
+    return timings
 
 
-def main() -> None:
-    """Parse command-line arguments and run the scraper."""
-    parser = argparse.ArgumentParser(description="Scrape a crackme from crackmes.one.")
-    parser.add_argument(
-        "id", help="The ID of the crackme to scrape (e.g., 685048992b84be7ea7743940)."
+@contextmanager
+def _downloading_writeups(
+    info: CrackmeInfo,
+    crackme_dir: str,
+    session: requests.Session,
+    options: ScrapeOptions,
+) -> Iterator[None]:
+    """
+    Download a crackme's writeup attachments into its writeups folder on up
+    to WRITEUP_JOBS threads while the with block runs, over the same session
+    and so through the same connection pool and rate limiter. Their timings
+    are added to the scrape's once they are all done.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    urls = _writeup_urls(info, options)
+    if not urls:
+        yield
+        return
+    directory = os.path.join(crackme_dir, WRITEUPS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=min(WRITEUP_JOBS, len(urls))) as pool:
+        futures = [
+            pool.submit(_download_writeup, url, directory, session, options)
+            for url in urls
+        ]
+        yield
+    timings = _current_timings.get()
+    for future in futures:
+        if timings is not None:
+            timings.merge(future.result())
+
+
+def _scrape_worker(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str],
+    session: requests.Session,
+    options: Optional[ScrapeOptions] = None,
+) -> ScrapeResult:
+    """Scrape one crackme for a batch run, capturing failures in the result."""
+    started = time.perf_counter()
+    try:
+        result = _scrape_crackme(crackme_id, output_dir, password, session, options)
+    except ScrapeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        result = _failed_result(crackme_id, str(e), started)
+    except Exception as e:  # Keep the rest of the batch going
+        print(f"Error: Unexpected failure for {crackme_id}: {e}", file=sys.stderr)
+        result = _failed_result(crackme_id, str(e), started)
+    _export_result(options, result)
+    return result
+
+
+def _failed_result(crackme_id: str, error: str, started: float) -> ScrapeResult:
+    """A failed result that still reports how long the attempt took."""
+    timings = PhaseTimings({"total": time.perf_counter() - started})
+    return ScrapeResult(crackme_id, ok=False, error=error, timings=timings)
+
+
+def scrape_batch(
+    crackme_ids: Iterable[str],
+    output_dir: str,
+    password: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    session: Optional[requests.Session] = None,
+    options: Optional[ScrapeOptions] = None,
+) -> List[ScrapeResult]:
+    """
+    Scrape many crackmes on a bounded worker pool sharing one keep-alive session.
+    IDs are consumed lazily, so `crackme_ids` may be a generator.
+    Returns the results in input order.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    jobs = max(1, jobs)
+    session = session or make_session(jobs)
+    pending: Dict[Future, int] = {}
+    results: Dict[int, ScrapeResult] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for index, crackme_id in enumerate(crackme_ids):
+            # Keep at most two IDs queued per worker so huge inputs stay cheap
+            if len(pending) >= jobs * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+            future = executor.submit(
+                _scrape_worker, crackme_id, output_dir, password, session, options
+            )
+            pending[future] = index
+        for future in pending:
+            results[pending[future]] = future.result()
+    return [results[index] for index in sorted(results)]
+
+
+# --- Catalog ---
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_upload_date(value: Optional[str]) -> Optional[str]:
+    """Turn the page's '4:38 PM 06/16/2025' into a sortable ISO timestamp."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), UPLOAD_DATE_FORMAT).isoformat()
+    except ValueError:
+        return value
+
+
+def _fts_query(terms: str) -> str:
+    """
+    Quote each search term so punctuation like 'C++' or 'x86-64' is matched
+    literally instead of being read as FTS5 query syntax.
+    """
+    parts = []
+    for term in terms.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            parts.append(f'"{term}"' + ("*" if prefix else ""))
+    if not parts:
+        raise ValueError("no search terms given")
+    return " ".join(parts)
+
+
+class Catalog:
+    """
+    SQLite index of every scraped crackme, upserted as each scrape finishes.
+    The common detail fields get their own indexed columns so filters are
+    answered from the index; the full details dict is kept as JSON. An FTS5
+    table indexes the title, author, description and comments for search,
+    its rowids matching the `seq` of the crackme rows.
+    The database is only created on the first write.
+    """
+
+    FILTER_COLUMNS = ("author", "language", "platform", "arch")
+    # bm25 weights for the search index columns: title, author, description, comments
+    SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        import sqlite3
+
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")  # Query while a sync writes
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._create_schema(conn)
+            self._conn = conn
+        return self._conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crackmes (
+                    seq INTEGER PRIMARY KEY,  -- Stable rowid, shared with crackmes_fts
+                    id TEXT NOT NULL UNIQUE,
+                    author TEXT COLLATE NOCASE,
+                    title TEXT COLLATE NOCASE,
+                    language TEXT COLLATE NOCASE,
+                    platform TEXT COLLATE NOCASE,
+                    arch TEXT COLLATE NOCASE,
+                    difficulty REAL,
+                    quality REAL,
+                    uploaded_at TEXT,
+                    details TEXT NOT NULL,
+                    description TEXT,
+                    download_url TEXT,
+                    archive_digest TEXT,
+                    password TEXT,
+                    directory TEXT,
+                    scraped_at TEXT NOT NULL,
+                    comments TEXT,
+                    writeups TEXT
+                )
+                """
+            )
+            for column in (*self.FILTER_COLUMNS, "difficulty", "quality"):
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS crackmes_{column} "
+                    f"ON crackmes ({column})"
+                )
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS crackmes_fts USING fts5(
+                    title, author, description, comments,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """
+            )
+            conn.execute("PRAGMA user_version = 1")
+
+    def upsert(
+        self,
+        crackme_id: str,
+        info: CrackmeInfo,
+        result: ScrapeResult,
+        archive_digest: Optional[str] = None,
+    ) -> None:
+        """Insert or refresh the row for one scraped crackme."""
+        details = info.details
+        row = {
+            "id": crackme_id,
+            "author": info.author,
+            "title": info.title,
+            "language": details.get("Language"),
+            "platform": details.get("Platform"),
+            "arch": details.get("Arch"),
+            "difficulty": _parse_float(details.get("Difficulty")),
+            "quality": _parse_float(details.get("Quality")),
+            "uploaded_at": _parse_upload_date(details.get("Upload")),
+            "details": json.dumps(details),
+            "description": info.description,
+            "download_url": info.download_url,
+            "archive_digest": archive_digest,
+            "password": result.password,
+            # Absolute, so the catalog can be rendered from any working directory
+            "directory": result.directory and os.path.abspath(result.directory),
+            "scraped_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "comments": json.dumps([asdict(comment) for comment in info.comments]),
+            "writeups": json.dumps([asdict(writeup) for writeup in info.writeups]),
+        }
+        search_row = {
+            "title": info.title,
+            "author": info.author,
+            "description": info.description,
+            "comments": "\n\n".join(
+                f"{comment.author}: {comment.text}" for comment in info.comments
+            ),
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{name}" for name in row)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in row if name != "id")
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"INSERT INTO crackmes ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                    row,
+                )
+                search_row["seq"] = conn.execute(
+                    "SELECT seq FROM crackmes WHERE id = ?", [crackme_id]
+                ).fetchone()[0]
+                # A rowid lookup, so rescrapes don't scan the index
+                conn.execute("DELETE FROM crackmes_fts WHERE rowid = :seq", search_row)
+                conn.execute(
+                    "INSERT INTO crackmes_fts (rowid, title, author, description, "
+                    "comments) VALUES (:seq, :title, :author, :description, :comments)",
+                    search_row,
+                )
+
+    def records(self) -> Iterator[sqlite3.Row]:
+        """Every crackme in the catalog, with what it takes to rebuild its output."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, title, author, details, description, download_url, "
+                "comments, writeups, directory FROM crackmes ORDER BY id"
+            )
+        # Fetched in batches, so huge catalogs are never loaded whole
+        while True:
+            with self._lock:
+                batch = rows.fetchmany(1000)
+            if not batch:
+                return
+            yield from batch
+
+    def query(
+        self,
+        filters: Optional[Dict[str, str]] = None,
+        min_difficulty: Optional[float] = None,
+        max_difficulty: Optional[float] = None,
+        min_quality: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[sqlite3.Row]:
+        """
+        Return matching crackmes, hardest first. Text filters match whole
+        values case-insensitively; `*` in a value makes it a wildcard pattern.
+        """
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in self.FILTER_COLUMNS:
+                raise ValueError(f"cannot filter on {column!r}")
+            if "*" in value:
+                clauses.append(f"{column} LIKE ?")
+                params.append(value.replace("*", "%"))
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for clause, value in (
+            ("difficulty >= ?", min_difficulty),
+            ("difficulty <= ?", max_difficulty),
+            ("quality >= ?", min_quality),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = "SELECT * FROM crackmes"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY difficulty DESC, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            if self._conn is None and not os.path.exists(self.path):
+                return []
+            return self._connect().execute(sql, params).fetchall()
+
+    def search(self, terms: str, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        """
+        Rank crackmes by how well their title, author, description and comments
+        match every term (BM25, title hits weigh most). A trailing `*` makes a
+        term a prefix. Rows carry a highlighted `snippet` of the best match.
+        """
+        sql = (
+            "SELECT crackmes.*, "
+            "snippet(crackmes_fts, -1, '[', ']', '...', 12) AS snippet, "
+            f"bm25(crackmes_fts, {', '.join(map(str, self.SEARCH_WEIGHTS))}) AS score "
+            "FROM crackmes_fts JOIN crackmes ON crackmes.seq = crackmes_fts.rowid "
+            "WHERE crackmes_fts MATCH ? ORDER BY score"
+        )
+        params: List[object] = [_fts_query(terms)]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            if self._conn is None and not os.path.exists(self.path):
+                return []
+            return self._connect().execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _catalog_scrape(
+    options: ScrapeOptions,
+    crackme_id: str,
+    info: CrackmeInfo,
+    result: ScrapeResult,
+    zip_filepath: Optional[str],
+) -> None:
+    """
+    Record a finished scrape in the catalog, if the run keeps one, and note
+    the archive digest for the catalog and export.
+    """
+    if options.catalog is None and options.export is None:
+        return
+    if zip_filepath and info.download_url:
+        result.digest = _archive_digest(zip_filepath, info.download_url, options.store)
+    if options.catalog is not None:
+        options.catalog.upsert(crackme_id, info, result, result.digest)
+
+
+def _archive_digest(
+    zip_filepath: str, url: str, store: Optional[BlobStore]
+) -> Optional[str]:
+    """SHA-256 of a downloaded archive, taken from the store when it has it."""
+    digest = store.lookup(url) if store is not None else None
+    if digest is None and os.path.exists(zip_filepath):
+        hasher = hashlib.sha256()
+        _hash_file(zip_filepath, hasher)
+        digest = hasher.hexdigest()
+    return digest
+
+
+# --- Structured Export ---
+def export_record(result: ScrapeResult) -> Dict[str, object]:
+    """
+    A scrape as one flat record for the --export file. Failed scrapes keep
+    their ID and error, with the page fields left empty.
+    """
+    info = result.info
+    return {
+        "id": result.crackme_id,
+        "ok": result.ok,
+        "error": result.error,
+        "title": info.title if info else None,
+        "author": info.author if info else None,
+        "details": dict(info.details) if info else {},
+        "description": info.description if info else None,
+        "comments": [asdict(c) for c in info.comments] if info else [],
+        "writeups": [asdict(w) for w in info.writeups] if info else [],
+        "download_url": info.download_url if info else None,
+        "digest": result.digest,
+        "extracted": result.extracted,
+        "password": result.password,
+        "directory": result.directory,
+        "phases": {p: round(t, 6) for p, t in result.timings.phases.items()},
+        "download_bytes": result.timings.download_bytes,
+    }
+
+
+class ExportWriter:
+    """
+    Appends one JSON record per finished scrape to a JSONL file, flushed line
+    by line so the export can be read while a run is still going.
+    The file is only created on the first write.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def write(self, result: ScrapeResult) -> None:
+        line = json.dumps(export_record(result), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ParquetExportWriter(ExportWriter):
+    """
+    Writes the export records as a Parquet file, one row group per
+    PARQUET_ROW_GROUP crackmes, for loading a whole mirror at once.
+    Parquet files can't be appended to, so each run replaces the file; it is
+    written under a temporary name and only moved into place by close().
+    Needs pyarrow.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._rows: List[Dict[str, object]] = []
+        self._writer = None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def schema():
+        import pyarrow as pa
+
+        text = pa.string()
+        comment = pa.struct([("author", text), ("posted", text), ("text", text)])
+        writeup = pa.struct([("author", text), ("text", text), ("url", text)])
+        return pa.schema(
+            [
+                ("id", text),
+                ("ok", pa.bool_()),
+                ("error", text),
+                ("title", text),
+                ("author", text),
+                ("details", pa.map_(text, text)),
+                ("description", text),
+                ("comments", pa.list_(comment)),
+                ("writeups", pa.list_(writeup)),
+                ("download_url", text),
+                ("digest", text),
+                ("extracted", pa.bool_()),
+                ("password", text),
+                ("directory", text),
+                ("phases", pa.map_(text, pa.float64())),
+                ("download_bytes", pa.int64()),
+            ]
+        )
+
+    def write(self, result: ScrapeResult) -> None:
+        with self._lock:
+            self._rows.append(export_record(result))
+            if len(self._rows) >= PARQUET_ROW_GROUP:
+                self._flush_rows()
+
+    def _flush_rows(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path + ".tmp", self.schema())
+        self._writer.write_table(pa.Table.from_pylist(self._rows, self.schema()))
+        self._rows = []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._rows:
+                self._flush_rows()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                os.replace(self.path + ".tmp", self.path)
+
+
+def _export_result(options: Optional[ScrapeOptions], result: ScrapeResult) -> None:
+    """Add a finished scrape to the run's export, if it has one."""
+    if options is None or options.export is None or result.skipped:
+        return
+    try:
+        options.export.write(result)
+    except OSError as e:
+        print(f"Warning: Could not export {result.crackme_id}: {e}", file=sys.stderr)
+
+
+# --- Re-rendering ---
+RENDER_STATUSES = ("written", "unchanged", "missing", "failed")
+
+
+def catalog_info(row: sqlite3.Row) -> CrackmeInfo:
+    """Rebuild the parsed page of a crackme from its catalog row."""
+    return CrackmeInfo(
+        title=row["title"],
+        author=row["author"],
+        details=json.loads(row["details"]),
+        description=row["description"] or "",
+        download_url=row["download_url"],
+        comments=[
+            CrackmeComment(**comment) for comment in json.loads(row["comments"] or "[]")
+        ],
+        writeups=[
+            CrackmeWriteup(**writeup) for writeup in json.loads(row["writeups"] or "[]")
+        ],
     )
-    parser.add_argument(
-        "-o",
-        "--output",
-        default="crackmes",
-        help="Output directory to save crackme folder.",
+
+
+def render_readme(
+    directory: str,
+    info: Optional[CrackmeInfo] = None,
+    html_path: Optional[str] = None,
+    base_url: Optional[str] = None,
+) -> str:
+    """
+    Rewrite a crackme's README.md from its catalog record, or from the
+    cached page at `html_path` when given (fetched from `base_url`), leaving
+    it untouched when the content is the same. Returns one of RENDER_STATUSES.
+    """
+    if not os.path.isdir(directory):
+        print(f"Error: Crackme directory {directory} is missing.", file=sys.stderr)
+        return "missing"
+    try:
+        if html_path is not None:
+            with open(html_path, "rb") as f:
+                html = f.read().decode("utf-8", errors="replace")
+            info = extract_crackme(html, base_url)
+        if info is None:
+            return "failed"
+        content = readme_markdown(info, directory)
+        path = os.path.join(directory, "README.md")
+        try:
+            with open(path, encoding="utf-8") as f:
+                if f.read() == content:
+                    return "unchanged"
+        except FileNotFoundError:
+            pass
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    except (OSError, ScrapeError) as e:
+        print(f"Error: Could not render {directory}: {e}", file=sys.stderr)
+        return "failed"
+    return "written"
+
+
+_RenderTask = Tuple[str, Optional[CrackmeInfo], Optional[str], Optional[str]]
+
+
+def _render_task(task: _RenderTask) -> str:
+    return render_readme(*task)
+
+
+def render_all(
+    catalog: Catalog,
+    cache: Optional[ResponseCache] = None,
+    processes: Optional[int] = None,
+    base_url: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Re-render the README of every crackme in the catalog, on a pool of
+    `processes` worker processes (one per CPU by default, none for 1).
+    With a cache, pages fetched from `base_url` (BASE_URL by default) found
+    in it are parsed again, so parser changes are picked up too. Returns how
+    many READMEs ended in each status.
+    """
+    import concurrent.futures
+
+    base_url = base_url or BASE_URL
+
+    def tasks() -> Iterator[_RenderTask]:
+        for row in catalog.records():
+            html_path = None
+            if cache is not None:
+                html_path = cache.body_path(f"{base_url}/crackme/{row['id']}")
+            info = catalog_info(row) if html_path is None else None
+            yield row["directory"] or "", info, html_path, base_url
+
+    counts = dict.fromkeys(RENDER_STATUSES, 0)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for status in map(_render_task, tasks()):
+            counts[status] += 1
+        return counts
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes, mp_context=_pool_context()
+    ) as pool:
+        for status in pool.map(_render_task, tasks(), chunksize=RENDER_CHUNK):
+            counts[status] += 1
+    return counts
+
+
+# --- Asyncio Engine ---
+def _connect_trace() -> aiohttp.TraceConfig:
+    """Report aiohttp's DNS lookup and connect time into the scrape's timings."""
+    import aiohttp
+
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, context, params) -> None:
+        context.connect_started = time.perf_counter()
+
+    async def on_end(session, context, params) -> None:
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add("connect", time.perf_counter() - context.connect_started)
+
+    trace.on_connection_create_start.append(on_start)
+    trace.on_connection_create_end.append(on_end)
+    return trace
+
+
+class AsyncFetcher:
+    """
+    Non-blocking HTTP client for the asyncio engine, with optional page cache.
+    Shares the RateLimiter and retry rules of the threaded engine.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache: Optional[ResponseCache] = None,
+        cache_only: bool = False,
+        limiter: Optional[RateLimiter] = None,
+        retries: int = DEFAULT_HTTP_RETRIES,
+    ) -> None:
+        self.session = session
+        self.cache = cache
+        self.cache_only = cache_only
+        self.limiter = limiter
+        self.retries = retries
+
+    async def _get(self, url: str, headers: Dict[str, str]) -> aiohttp.ClientResponse:
+        """GET through the limiter, retrying like RetryingAdapter does."""
+        import aiohttp
+        import asyncio
+
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                await asyncio.sleep(self.limiter.reserve())
+            try:
+                response = await self.session.get(url, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                reason, delay = str(e) or type(e).__name__, backoff_delay(attempt)
+            else:
+                status = response.status
+                if status not in RETRY_STATUSES or attempt >= self.retries:
+                    if self.limiter is not None and status < 400:
+                        self.limiter.succeeded()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                reason = f"HTTP {status}"
+                delay = _retry_delay(self.limiter, status, retry_after, attempt)
+                response.release()
+            attempt += 1
+            print(
+                f"Warning: {url} failed ({reason}), retrying in "
+                f"{delay:.1f}s (attempt {attempt}/{self.retries}).",
+                file=sys.stderr,
+            )
+            await asyncio.sleep(delay)
+
+    async def fetch_text(self, url: str) -> Optional[str]:
+        """Fetch the URL without blocking the event loop and return its body text."""
+        import aiohttp
+        import asyncio
+
+        entry = None
+        headers = {}
+        if self.cache is not None:
+            entry = await asyncio.to_thread(self.cache.lookup, url)
+            if entry is not None and (self.cache_only or self.cache.is_fresh(entry)):
+                return self._decode(entry)
+            if self.cache_only:
+                print(
+                    f"Error: Could not fetch URL {url}. Reason: not in the cache (--cache-only)",
+                    file=sys.stderr,
+                )
+                return None
+            if entry is not None and entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry is not None and entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            async with await self._get(url, headers) as response:
+                if response.status == 304 and entry is not None:
+                    await asyncio.to_thread(self.cache.refresh, entry)
+                    return self._decode(entry)
+                response.raise_for_status()
+                body = await response.read()
+                if self.cache is not None:
+                    await asyncio.to_thread(
+                        self.cache.store,
+                        url,
+                        body,
+                        response.headers.get("Content-Type"),
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+                return body.decode(response.get_encoding(), errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error: Could not fetch URL {url}. Reason: {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def _decode(entry: CacheEntry) -> str:
+        import requests
+
+        headers = {"Content-Type": entry.content_type or ""}
+        encoding = requests.utils.get_encoding_from_headers(headers) or "utf-8"
+        return entry.body.decode(encoding, errors="replace")
+
+    async def download(
+        self,
+        url: str,
+        directory: str = ".",
+        chunk_size: Optional[int] = None,
+        retries: int = DEFAULT_DOWNLOAD_RETRIES,
+        store: Optional[BlobStore] = None,
+        max_bytes: Optional[int] = None,
+        bandwidth: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Stream a file into a directory, doing the blocking file writes off the loop.
+        Uses the same `.part` file, Range resume, BlobStore and size limit scheme
+        as download_file.
+        """
+        import aiohttp
+        import asyncio
+
+        filename = url.split("/")[-1]
+        filepath = os.path.join(directory, filename)
+        part_path = filepath + ".part"
+        if store is not None:
+            digest = await asyncio.to_thread(store.lookup, url)
+            if digest:
+                await asyncio.to_thread(store.materialize, digest, filepath)
+                print(f"Reusing stored copy of {filename} ({digest[:12]})")
+                return filepath
+        if self.cache_only:
+            print(
+                f"Error: Could not download file {url}. Reason: offline (--cache-only)",
+                file=sys.stderr,
+            )
+            return None
+        attempt = 0
+        while True:
+            offset = await asyncio.to_thread(_file_size, part_path)
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                async with await self._get(url, headers) as response:
+                    if offset and response.status == 416:
+                        await asyncio.to_thread(os.remove, part_path)
+                        continue
+                    response.raise_for_status()
+                    resumed = offset and _resume_matches(
+                        response.status, response.headers.get("Content-Range"), offset
+                    )
+                    content_length = response.headers.get("Content-Length")
+                    start = offset if resumed else 0
+                    length = _content_length(content_length)
+                    if length is not None:
+                        _check_download_size(filename, start + length, max_bytes)
+                    size = _chunk_size_for(content_length, chunk_size)
+                    hasher = hashlib.sha256()
+                    if resumed:
+                        await asyncio.to_thread(_hash_file, part_path, hasher)
+                    mode = "ab" if resumed else "wb"
+                    f = await asyncio.to_thread(open, part_path, mode)
+                    received = 0
+                    started = time.perf_counter()
+                    try:
+                        async for chunk in response.content.iter_chunked(size):
+                            hasher.update(chunk)
+                            received += len(chunk)
+                            _check_download_size(filename, start + received, max_bytes)
+                            await asyncio.to_thread(f.write, chunk)
+                            delay = _throttle_delay(received, started, bandwidth)
+                            if delay > 0:
+                                await asyncio.sleep(delay)
+                    finally:
+                        _count_download(received)
+                        await asyncio.to_thread(f.close)
+                await asyncio.to_thread(os.replace, part_path, filepath)
+                print(f"Successfully downloaded {filename}")
+                if store is not None:
+                    await asyncio.to_thread(
+                        store.add, url, filepath, hasher.hexdigest()
+                    )
+                return filepath
+            except DownloadLimitError as e:
+                await asyncio.to_thread(_discard, part_path)
+                print(f"Warning: Skipping download, {e}.", file=sys.stderr)
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                received = await asyncio.to_thread(_file_size, part_path)
+                if received > offset and attempt < retries:
+                    attempt += 1
+                    print(
+                        f"Warning: Download of {filename} interrupted after "
+                        f"{received} bytes ({e}). Resuming "
+                        f"(attempt {attempt}/{retries}).",
+                        file=sys.stderr,
+                    )
+                    continue
+                print(
+                    f"Error: Could not download file {url}. Reason: {e}",
+                    file=sys.stderr,
+                )
+                return None
+
+
+async def _scrape_crackme_async(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str],
+    fetcher: AsyncFetcher,
+    options: ScrapeOptions,
+) -> ScrapeResult:
+    """Async counterpart of _scrape_crackme, producing the same on-disk layout."""
+    # Each task runs in its own context, so this doesn't leak into other scrapes
+    timings = PhaseTimings()
+    _current_timings.set(timings)
+    with timings.phase("total"):
+        result = await _scrape_phases_async(
+            crackme_id, output_dir, password, fetcher, options
+        )
+    result.timings = timings
+    return result
+
+
+async def _scrape_phases_async(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str],
+    fetcher: AsyncFetcher,
+    options: ScrapeOptions,
+) -> ScrapeResult:
+    import asyncio
+
+    url = f"{options.base_url}/crackme/{crackme_id}"
+    print(f"Scraping {url}...")
+    with _timed("fetch"):
+        html = await fetcher.fetch_text(url)
+    if html is None:
+        raise ScrapeError(f"Could not fetch crackme page {url}.")
+
+    # Parsing and everything touching the disk runs in worker threads
+    with _timed("parse"):
+        soup = await asyncio.to_thread(strain_crackme_page, html)
+    with _timed("extract"):
+        info = await asyncio.to_thread(parse_crackme, soup, options.base_url)
+    skipped = _skipped_result(options, crackme_id, info)
+    if skipped is not None:
+        return skipped
+    crackme_dir = await asyncio.to_thread(
+        make_crackme_dir, output_dir, crackme_id, info, options.layout
     )
-    parser.add_argument(
-        "-p",
-        "--password",
-        help="Password for the zip archive (if protected).",
+    result = ScrapeResult(crackme_id, ok=True, directory=crackme_dir, info=info)
+    zip_filepath = None
+
+    writeups = asyncio.ensure_future(
+        _download_writeups_async(fetcher, info, crackme_dir, options)
     )
-    args = parser.parse_args()
-    scrape_crackme(args.id, args.output, args.password)
+    try:
+        if info.download_url:
+            print(f"Found download link: {info.download_url}")
+            with _timed("download"):
+                zip_filepath = await fetcher.download(
+                    info.download_url,
+                    crackme_dir,
+                    options.chunk_size,
+                    store=options.store,
+                    max_bytes=options.max_archive_bytes,
+                    bandwidth=options.bandwidth,
+                )
+            if zip_filepath:
+                result.extracted, result.password = await asyncio.to_thread(
+                    unzip_with_fallbacks,
+                    zip_filepath,
+                    password,
+                    options.wordlist,
+                    options.limits,
+                )
+        else:
+            print("Warning: Could not find download link.", file=sys.stderr)
+    finally:
+        await writeups
+
+    with _timed("write"):
+        await asyncio.to_thread(write_readme, crackme_dir, info)
+    with _timed("catalog"):
+        await asyncio.to_thread(
+            _catalog_scrape, options, crackme_id, info, result, zip_filepath
+        )
+    return result
+
+
+async def _download_writeups_async(
+    fetcher: AsyncFetcher,
+    info: CrackmeInfo,
+    crackme_dir: str,
+    options: ScrapeOptions,
+) -> None:
+    """_downloading_writeups for the asyncio engine: WRITEUP_JOBS at a time."""
+    import asyncio
+
+    urls = _writeup_urls(info, options)
+    if not urls:
+        return
+    directory = os.path.join(crackme_dir, WRITEUPS_DIR)
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    semaphore = asyncio.Semaphore(WRITEUP_JOBS)
+
+    async def download(url: str) -> None:
+        async with semaphore:
+            with _timed("writeups"):
+                await fetcher.download(
+                    url, directory, options.chunk_size, store=options.store
+                )
+
+    await asyncio.gather(*(download(url) for url in urls))
+
+
+async def _scrape_worker_async(
+    crackme_id: str,
+    output_dir: str,
+    password: Optional[str],
+    fetcher: AsyncFetcher,
+    options: ScrapeOptions,
+) -> ScrapeResult:
+    """Scrape one crackme on the event loop, capturing failures in the result."""
+    import asyncio
+
+    started = time.perf_counter()
+    try:
+        result = await _scrape_crackme_async(
+            crackme_id, output_dir, password, fetcher, options
+        )
+    except ScrapeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        result = _failed_result(crackme_id, str(e), started)
+    except Exception as e:  # Keep the rest of the batch going
+        print(f"Error: Unexpected failure for {crackme_id}: {e}", file=sys.stderr)
+        result = _failed_result(crackme_id, str(e), started)
+    await asyncio.to_thread(_export_result, options, result)
+    return result
+
+
+async def _scrape_batch_async(
+    crackme_ids: Iterable[str],
+    output_dir: str,
+    password: Optional[str],
+    jobs: int,
+    cache: Optional[ResponseCache],
+    cache_only: bool,
+    options: ScrapeOptions,
+    limiter: Optional[RateLimiter],
+    retries: int,
+) -> List[ScrapeResult]:
+    """Run one task per crackme, with at most `jobs` of them in flight."""
+    import aiohttp
+    import asyncio
+
+    semaphore = asyncio.Semaphore(jobs)
+    per_host = limiter.max_per_host if limiter is not None else None
+    connector = aiohttp.TCPConnector(limit=jobs, limit_per_host=per_host or 0)
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=DEFAULT_TIMEOUT, sock_read=DEFAULT_TIMEOUT
+    )
+    tasks: List[asyncio.Task] = []
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": USER_AGENT},
+        timeout=timeout,
+        trace_configs=[_connect_trace()],
+    ) as session:
+        fetcher = AsyncFetcher(session, cache, cache_only, limiter, retries)
+        id_iterator = iter(crackme_ids)
+        while True:
+            # Only pull the next ID once a slot is free, so generators stay lazy.
+            # The source may block (stdin, listing pages), so pull it off the loop.
+            await semaphore.acquire()
+            crackme_id = await asyncio.to_thread(next, id_iterator, None)
+            if crackme_id is None:
+                semaphore.release()
+                break
+            task = asyncio.create_task(
+                _scrape_worker_async(crackme_id, output_dir, password, fetcher, options)
+            )
+            task.add_done_callback(lambda _: semaphore.release())
+            tasks.append(task)
+        return list(await asyncio.gather(*tasks))
+
+
+def scrape_batch_async(
+    crackme_ids: Iterable[str],
+    output_dir: str,
+    password: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    cache: Optional[ResponseCache] = None,
+    cache_only: bool = False,
+    options: Optional[ScrapeOptions] = None,
+    limiter: Optional[RateLimiter] = None,
+    retries: int = DEFAULT_HTTP_RETRIES,
+) -> List[ScrapeResult]:
+    """
+    Scrape many crackmes on a single event loop with non-blocking HTTP.
+    Returns the results in input order.
+    """
+    import asyncio
+
+    return asyncio.run(
+        _scrape_batch_async(
+            crackme_ids,
+            output_dir,
+            password,
+            max(1, jobs),
+            cache,
+            cache_only,
+            options or ScrapeOptions(),
+            limiter,
+            retries,
+        )
+    )
+
+
+# --- Staged Engine ---
+_STAGE_DONE = object()  # Tells a stage's worker to stop
+
+
+@dataclass
+class _StagedItem:
+    """A crackme moving through the staged pipeline, with what is known so far."""
+
+    index: int
+    crackme_id: str
+    started: float = field(default_factory=time.perf_counter)
+    timings: PhaseTimings = field(default_factory=PhaseTimings)
+    html: Optional[str] = None
+    info: Optional[CrackmeInfo] = None
+    result: Optional[ScrapeResult] = None
+    zip_filepath: Optional[str] = None
+
+
+def _parse_page(html: str, base_url: str) -> Tuple[CrackmeInfo, Dict[str, float]]:
+    """Parse a crackme page in a pool process. Returns it with the phase times."""
+    timings = PhaseTimings()
+    with timings.phase("parse"):
+        soup = strain_crackme_page(html)
+    with timings.phase("extract"):
+        info = parse_crackme(soup, base_url)
+    return info, timings.phases
+
+
+def _unzip_archive(
+    zip_filepath: str,
+    password: Optional[str],
+    wordlist: Tuple[str, ...],
+    limits: ExtractLimits,
+) -> Tuple[bool, Optional[str], Dict[str, float]]:
+    """unzip_with_fallbacks in a pool process, also returning the phase times."""
+    with _recording(PhaseTimings()) as timings:
+        ok, detected = unzip_with_fallbacks(zip_filepath, password, wordlist, limits)
+    return ok, detected, timings.phases
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Start pool processes without fork: forking a process whose network
+    threads hold locks can deadlock the child.
+    """
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+class _StagedPipeline:
+    """
+    Fetch threads -> parse processes -> download threads -> writer threads.
+    Pages are parsed, and archives probed and unzipped, in a process pool so
+    they run on every core instead of contending for the GIL with the
+    network threads. Bounded queues between the stages hold back the ones
+    upstream of a slow stage instead of letting pages pile up in memory.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        password: Optional[str],
+        jobs: int,
+        processes: int,
+        session: requests.Session,
+        options: ScrapeOptions,
+    ) -> None:
+        self.output_dir = output_dir
+        self.password = password
+        self.session = session
+        self.options = options
+        self.stages = [
+            (self._fetch, jobs),
+            (self._parse, processes),
+            (self._download, jobs),
+            (self._write, processes),
+        ]
+        self.processes = processes
+        self.results: Dict[int, ScrapeResult] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def run(self, crackme_ids: Iterable[str]) -> List[ScrapeResult]:
+        import concurrent.futures
+
+        inboxes = [queue.Queue(maxsize=2 * workers) for _, workers in self.stages]
+        outboxes = inboxes[1:] + [None]
+        workers = [
+            [
+                threading.Thread(target=self._work, args=(handle, inbox, outbox))
+                for _ in range(count)
+            ]
+            for (handle, count), inbox, outbox in zip(self.stages, inboxes, outboxes)
+        ]
+        with concurrent.futures.ProcessPoolExecutor(
+            self.processes,
+            mp_context=_pool_context(),
+        ) as self._pool:
+            for thread in itertools.chain.from_iterable(workers):
+                thread.start()
+            try:
+                for index, crackme_id in enumerate(crackme_ids):
+                    inboxes[0].put(_StagedItem(index, crackme_id))
+            finally:
+                # Stop the stages in order, each once everything upstream is through
+                for inbox, threads in zip(inboxes, workers):
+                    for _ in threads:
+                        inbox.put(_STAGE_DONE)
+                    for thread in threads:
+                        thread.join()
+        return [self.results[index] for index in sorted(self.results)]
+
+    def _work(self, handle, inbox: queue.Queue, outbox: Optional[queue.Queue]) -> None:
+        while (item := inbox.get()) is not _STAGE_DONE:
+            try:
+                with _recording(item.timings):
+                    handle(item)
+            except ScrapeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                self._finish(item, str(e))
+            except Exception as e:  # Keep the rest of the batch going
+                print(
+                    f"Error: Unexpected failure for {item.crackme_id}: {e}",
+                    file=sys.stderr,
+                )
+                self._finish(item, str(e))
+            else:
+                if outbox is None:
+                    self._finish(item)
+                else:
+                    outbox.put(item)
+
+    def _finish(self, item: _StagedItem, error: Optional[str] = None) -> None:
+        item.timings.add("total", time.perf_counter() - item.started)
+        if error is None:
+            result = item.result
+        else:
+            result = ScrapeResult(item.crackme_id, ok=False, error=error)
+        result.timings = item.timings
+        _export_result(self.options, result)
+        with self._lock:
+            self.results[item.index] = result
+
+    def _add_phases(self, item: _StagedItem, phases: Dict[str, float]) -> None:
+        for phase, seconds in phases.items():
+            item.timings.add(phase, seconds)
+
+    def _fetch(self, item: _StagedItem) -> None:
+        url = f"{self.options.base_url}/crackme/{item.crackme_id}"
+        print(f"Scraping {url}...")
+        with _timed("fetch"):
+            item.html = fetch_html(url, self.session)
+        if item.html is None:
+            raise ScrapeError(f"Could not fetch crackme page {url}.")
+
+    def _parse(self, item: _StagedItem) -> None:
+        item.info, phases = self._pool.submit(
+            _parse_page, item.html, self.options.base_url
+        ).result()
+        item.html = None  # Keep what waits in the queues small
+        self._add_phases(item, phases)
+
+    def _download(self, item: _StagedItem) -> None:
+        info = item.info
+        item.result = _skipped_result(self.options, item.crackme_id, info)
+        if item.result is not None:
+            return
+        crackme_dir = make_crackme_dir(
+            self.output_dir, item.crackme_id, info, self.options.layout
+        )
+        item.result = ScrapeResult(
+            item.crackme_id, ok=True, directory=crackme_dir, info=info
+        )
+        with _downloading_writeups(info, crackme_dir, self.session, self.options):
+            if not info.download_url:
+                print("Warning: Could not find download link.", file=sys.stderr)
+                return
+            print(f"Found download link: {info.download_url}")
+            with _timed("download"):
+                item.zip_filepath = download_file(
+                    info.download_url,
+                    directory=crackme_dir,
+                    session=self.session,
+                    chunk_size=self.options.chunk_size,
+                    store=self.options.store,
+                    max_bytes=self.options.max_archive_bytes,
+                    bandwidth=self.options.bandwidth,
+                )
+
+    def _write(self, item: _StagedItem) -> None:
+        if item.result.skipped:
+            return
+        if item.zip_filepath:
+            item.result.extracted, item.result.password, phases = self._pool.submit(
+                _unzip_archive,
+                item.zip_filepath,
+                self.password,
+                self.options.wordlist,
+                self.options.limits,
+            ).result()
+            self._add_phases(item, phases)
+        with _timed("write"):
+            write_readme(item.result.directory, item.info)
+        with _timed("catalog"):
+            _catalog_scrape(
+                self.options, item.crackme_id, item.info, item.result, item.zip_filepath
+            )
+
+
+def scrape_batch_staged(
+    crackme_ids: Iterable[str],
+    output_dir: str,
+    password: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    processes: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    options: Optional[ScrapeOptions] = None,
+) -> List[ScrapeResult]:
+    """
+    Scrape many crackmes with I/O threads feeding a pool of `processes`
+    parse/unzip processes (default: one per CPU). Same layout as the other
+    engines; returns the results in input order.
+    """
+    jobs = max(1, jobs)
+    processes = max(1, processes or os.cpu_count() or 1)
+    pipeline = _StagedPipeline(
+        output_dir,
+        password,
+        jobs,
+        processes,
+        session or make_session(jobs),
+        options or ScrapeOptions(),
+    )
+    return pipeline.run(crackme_ids)
+
+
+# --- Size-aware Scheduling ---
+_LANE_DONE = object()  # Ends SizeScheduler.large_ids
+
+
+def archive_url(crackme_id: str, base_url: Optional[str] = None) -> str:
+    """The download link a crackme page carries, built from the ID alone."""
+    return (base_url or BASE_URL) + ARCHIVE_PATH.format(crackme_id)
+
+
+class SizeScheduler:
+    """
+    Shortest-job-first order for a batch. The archive of each ID is probed
+    with a HEAD request, `window` IDs at a time, and each window is handed on
+    smallest archive first so READMEs appear without waiting behind big
+    downloads; archives of unknown size follow the known ones. Archives over
+    `large_bytes` are held back and yielded by large_ids instead, for a lane
+    of their own. Archives over `max_bytes` won't be downloaded at all, so
+    their crackmes count as small. Archives are probed on `base_url`.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        large_bytes: int,
+        max_bytes: Optional[int] = None,
+        jobs: int = DEFAULT_JOBS,
+        window: int = SIZE_PROBE_WINDOW,
+        base_url: Optional[str] = None,
+    ) -> None:
+        self.session = session
+        self.base_url = base_url
+        self.large_bytes = large_bytes
+        self.max_bytes = max_bytes
+        self.jobs = max(1, jobs)
+        self.window = window
+        self.sizes: Dict[str, Optional[int]] = {}
+        self._large: queue.Queue = queue.Queue()
+
+    def _rank(self, size: Optional[int]) -> Tuple[bool, int]:
+        if size is not None and self.max_bytes is not None and size > self.max_bytes:
+            return False, 0
+        return size is None, size or 0
+
+    def small_ids(self, crackme_ids: Iterable[str]) -> Iterator[str]:
+        """Yield the IDs that aren't large, probing them a window at a time."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        ids = iter(crackme_ids)
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while window := list(itertools.islice(ids, self.window)):
+                urls = [archive_url(i, self.base_url) for i in window]
+                sizes = pool.map(probe_size, urls, itertools.repeat(self.session))
+                self.sizes.update(zip(window, sizes))
+                for crackme_id in sorted(
+                    window, key=lambda i: self._rank(self.sizes[i])
+                ):
+                    bucket, size = self._rank(self.sizes[crackme_id])
+                    if not bucket and size > self.large_bytes:
+                        print(f"Leaving {crackme_id} ({size} bytes) to the large lane.")
+                        self._large.put(crackme_id)
+                    else:
+                        yield crackme_id
+
+    def large_ids(self) -> Iterator[str]:
+        """Yield the large IDs as they are found, until close() is called."""
+        while (crackme_id := self._large.get()) is not _LANE_DONE:
+            yield crackme_id
+
+    def close(self) -> None:
+        """Let large_ids finish once it has yielded everything queued so far."""
+        self._large.put(_LANE_DONE)
+
+
+# --- Metrics and Profiling ---
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def metrics_records(results: List[ScrapeResult]) -> Iterator[Dict[str, object]]:
+    """One record per scraped crackme, then one with percentiles per phase."""
+    samples: Dict[str, List[float]] = {}
+    for result in results:
+        record: Dict[str, object] = {"crackme_id": result.crackme_id, "ok": result.ok}
+        if result.error:
+            record["error"] = result.error
+        record.update(result.timings.as_record())
+        yield record
+        for phase, seconds in result.timings.phases.items():
+            samples.setdefault(phase, []).append(seconds)
+
+    phases = {}
+    for phase in (phase for phase in PHASES if phase in samples):
+        values = sorted(samples[phase])
+        summary = {
+            f"p{pct}": round(_percentile(values, pct), 6) for pct in METRIC_PERCENTILES
+        }
+        summary["max"] = round(values[-1], 6)
+        summary["sum"] = round(sum(values), 6)
+        phases[phase] = summary
+    yield {
+        "aggregate": {
+            "count": len(results),
+            "failed": sum(not result.ok for result in results),
+            "download_bytes": sum(r.timings.download_bytes for r in results),
+            "phases": phases,
+        }
+    }
+
+
+class RunProfiler:
+    """
+    cProfile over a whole run. A cProfile.Profile only sees the thread that
+    enabled it, so every thread started while profiling (scrape workers,
+    asyncio.to_thread helpers) gets its own, and they are merged at the end.
+    """
+
+    def __init__(self) -> None:
+        import cProfile
+
+        self._profiles = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def _start_thread(self, frame, event, arg) -> None:
+        # Installed with threading.setprofile, so called once in each new thread
+        import cProfile
+
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def __enter__(self) -> "RunProfiler":
+        threading.setprofile(self._start_thread)
+        self._profiles[0].enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._profiles[0].disable()
+        threading.setprofile(None)
+
+    def stats(self, stream: Optional[TextIO] = None) -> pstats.Stats:
+        import pstats
+
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+@contextmanager
+def _profiling(path: Optional[str]) -> Iterator[None]:
+    """Profile the enclosed run if --profile was given, then dump and summarise it."""
+    if not path:
+        yield
+        return
+    profiler = RunProfiler()
+    try:
+        with profiler:
+            yield
+    finally:
+        stats = profiler.stats(stream=sys.stderr)
+        stats.dump_stats(path)
+        print(f"\n--- Profile (full stats in {path}) ---", file=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+
+# --- Filters ---
+def _text_matches(value: str, pattern: str) -> bool:
+    """Whole-value, case-insensitive match where `*` in `pattern` is a wildcard."""
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.fullmatch(regex, value.strip(), re.IGNORECASE) is not None
+
+
+@dataclass
+class CrackmeFilter:
+    """
+    Which crackmes a run keeps. Text fields match like the catalog query's
+    filters: whole values, ignoring case, with `*` as a wildcard.
+    """
+
+    author: Optional[str] = None
+    language: Optional[str] = None
+    platform: Optional[str] = None
+    arch: Optional[str] = None
+    min_difficulty: Optional[float] = None
+    max_difficulty: Optional[float] = None
+    min_quality: Optional[float] = None
+
+    TEXT_FIELDS = ("author", "language", "platform", "arch")
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in vars(self).values())
+
+    def rejects(self, fields: Dict[str, str]) -> Optional[str]:
+        """
+        Why a crackme with these fields, keyed by their labels on the site
+        ("Platform", "Difficulty", ...), fails the filter; None if it passes.
+        Missing or unreadable fields pass, leaving them to a later check.
+        """
+        for name in self.TEXT_FIELDS:
+            pattern = getattr(self, name)
+            value = fields.get(name.capitalize())
+            if pattern is not None and value and not _text_matches(value, pattern):
+                return f"{name} is {value.strip()!r}"
+        difficulty = _parse_float(fields.get("Difficulty"))
+        quality = _parse_float(fields.get("Quality"))
+        for name, value, bound, too_low in (
+            ("difficulty", difficulty, self.min_difficulty, True),
+            ("difficulty", difficulty, self.max_difficulty, False),
+            ("quality", quality, self.min_quality, True),
+        ):
+            if value is None or bound is None:
+                continue
+            if value < bound if too_low else value > bound:
+                return f"{name} is {value:g}"
+        return None
+
+
+def _skipped_result(
+    options: ScrapeOptions, crackme_id: str, info: CrackmeInfo
+) -> Optional[ScrapeResult]:
+    """
+    Check a parsed crackme page against the run's filter, for crackmes whose
+    listing row did not already show the filtered fields (or had no row, as
+    with IDs given on the command line). Runs before anything is downloaded.
+    """
+    if not options.filter:
+        return None
+    reason = options.filter.rejects({**info.details, "Author": info.author})
+    if reason is None:
+        return None
+    print(f"Skipping {crackme_id}: {reason}.")
+    return ScrapeResult(crackme_id, ok=True, info=info, skipped=reason)
+
+
+# --- Listing Pages ---
+@dataclass
+class ListingEntry:
+    """A crackme linked from a listing page, with its row's cells by heading."""
+
+    crackme_id: str
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+def parse_listing_entries(soup: bs4.BeautifulSoup) -> List[ListingEntry]:
+    """
+    Return the crackmes linked from a listing page, in page order. Links in
+    a table row carry that row's cells keyed by the table's column headings,
+    so filters can be applied before any crackme page is fetched.
+    """
+    entries: Dict[str, ListingEntry] = {}
+    headings: Dict[int, List[str]] = {}  # Per table, read once
+    for link in soup.find_all("a", href=CRACKME_LINK_RE):
+        crackme_id = CRACKME_LINK_RE.match(link["href"]).group(1)
+        if crackme_id in entries:
+            continue
+        entry = entries[crackme_id] = ListingEntry(crackme_id)
+        row = link.find_parent("tr")
+        table = row.find_parent("table") if row else None
+        if table is None:
+            continue
+        if id(table) not in headings:
+            headings[id(table)] = [th.get_text(strip=True) for th in table("th")]
+        cells = [td.get_text(" ", strip=True) for td in row("td", recursive=False)]
+        entry.fields = dict(zip(headings[id(table)], cells))
+    return list(entries.values())
+
+
+def parse_listing(soup: bs4.BeautifulSoup) -> List[str]:
+    """Return the crackme IDs linked from a listing page, in page order."""
+    return [entry.crackme_id for entry in parse_listing_entries(soup)]
+
+
+def iter_listing_ids(
+    first_page: int,
+    last_page: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    crackme_filter: Optional[CrackmeFilter] = None,
+    errors: Optional[List[str]] = None,
+    base_url: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Walk the /lasts/N listing pages and yield crackme IDs as each page is parsed.
+    Stops after `last_page`, or at the first page without entries when open-ended.
+    Entries whose row fails `crackme_filter` are skipped without fetching them.
+    Unreadable pages are skipped, but an open-ended walk gives up after
+    LISTING_FAILURE_LIMIT of them in a row, adding the reason to `errors`.
+    The pages are read from `base_url`, BASE_URL by default.
+    """
+    base_url = base_url or BASE_URL
+    seen = set()  # Entries shift between pages while new crackmes are uploaded
+    page = first_page
+    failures = 0
+    while last_page is None or page <= last_page:
+        soup = get_soup(f"{base_url}/lasts/{page}", session)
+        if soup is None:
+            failures += 1
+            if last_page is None and failures >= LISTING_FAILURE_LIMIT:
+                error = f"Could not read listing pages {page - failures + 1}..{page}."
+                print(f"Error: {error} Stopping.", file=sys.stderr)
+                if errors is not None:
+                    errors.append(error)
+                return
+            print(f"Warning: Skipping listing page {page}.", file=sys.stderr)
+        else:
+            failures = 0
+            entries = parse_listing_entries(soup)
+            if not entries:
+                print(f"Listing page {page} is empty, stopping.")
+                return
+            for entry in entries:
+                if entry.crackme_id in seen:
+                    continue
+                seen.add(entry.crackme_id)
+                reason = (
+                    crackme_filter.rejects(entry.fields) if crackme_filter else None
+                )
+                if reason is None:
+                    yield entry.crackme_id
+                else:
+                    print(f"Skipping {entry.crackme_id}: {reason}.")
+        page += 1
+
+
+def parse_page_range(value: str) -> Tuple[int, Optional[int]]:
+    """Parse a page range like '3', '1..5' or '2..' (open-ended) for argparse."""
+    match = re.fullmatch(r"(\d+)(?:\.\.(\d*))?", value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid page range: {value!r}")
+    first = int(match.group(1))
+    if match.group(2) is None:
+        last: Optional[int] = first
+    else:
+        last = int(match.group(2)) if match.group(2) else None
+    if first < 1 or (last is not None and last < first):
+        raise argparse.ArgumentTypeError(f"invalid page range: {value!r}")
+    return first, last
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a shard like '2/4' (the second of four) for argparse."""
+    match = re.fullmatch(r"(\d+)/(\d+)", value.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"invalid shard: {value!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def iter_shard_ids(crackme_ids: Iterable[str], shard: Tuple[int, int]) -> Iterator[str]:
+    """
+    Yield the IDs that belong to shard `index` of `count`. Every machine
+    given the same stream and count gets a disjoint share of it, and
+    together the shards cover every ID.
+    """
+    index, count = shard
+    return (i for i in crackme_ids if _id_hash(i) % count == index - 1)
+
+
+# --- Incremental Sync ---
+class SyncState:
+    """
+    The set of crackme IDs already present in an output directory.
+    It is persisted in a small JSON state file; archives named `<id>.zip` found
+    in the crackme folders are picked up too, so older trees need no migration.
+    """
+
+    def __init__(self, path: str, known_ids: Optional[Iterable[str]] = None) -> None:
+        self.path = path
+        self.known_ids = set(known_ids or ())
+
+    @classmethod
+    def load(cls, output_dir: str) -> "SyncState":
+        path = os.path.join(output_dir, SYNC_STATE_FILE)
+        state = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                state.known_ids.update(json.load(f).get("known_ids", []))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(
+                f"Warning: Ignoring unreadable state file {path}: {e}", file=sys.stderr
+            )
+        for crackme_dir in crackme_dirs(output_dir):
+            for name in os.listdir(crackme_dir):
+                match = ARCHIVE_NAME_RE.match(name)
+                if match:
+                    state.known_ids.add(match.group(1))
+        return state
+
+    def save(self) -> None:
+        """Atomically write the state file."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"known_ids": sorted(self.known_ids)}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def iter_new_ids(
+    crackme_ids: Iterable[str], known_ids: Set[str], stop_after: int
+) -> Iterator[str]:
+    """
+    Yield the IDs not in `known_ids` from a newest-first stream, and stop
+    consuming the stream after `stop_after` consecutive known IDs.
+    """
+    known_run = 0
+    for crackme_id in crackme_ids:
+        if crackme_id in known_ids:
+            known_run += 1
+            if known_run >= stop_after:
+                print(f"Reached {known_run} already synced crackmes, stopping.")
+                return
+        else:
+            known_run = 0
+            yield crackme_id
+
+
+def print_summary(results: List[ScrapeResult]) -> None:
+    """Print a per-ID summary of a batch run."""
+    failed = [r for r in results if not r.ok]
+    skipped = [r for r in results if r.skipped]
+    print("\n--- Summary ---")
+    for result in results:
+        if result.skipped:
+            print(f"SKIPPED {result.crackme_id}: {result.skipped}")
+        elif result.ok:
+            password = f" (password: {result.password})" if result.password else ""
+            print(f"OK      {result.crackme_id} -> {result.directory}{password}")
+        else:
+            print(f"FAILED  {result.crackme_id}: {result.error}")
+    succeeded = len(results) - len(failed) - len(skipped)
+    if skipped:
+        print(f"{succeeded} succeeded, {len(skipped)} skipped, {len(failed)} failed.")
+    else:
+        print(f"{succeeded} succeeded, {len(failed)} failed.")
+
+
+def read_wordlist(stream: TextIO) -> Iterator[str]:
+    """Yield password candidates from a file, one per line, skipping blank lines."""
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if line:
+            yield line
+
+
+def read_ids(stream: TextIO) -> Iterator[str]:
+    """Yield crackme IDs from a file, one per line, skipping blanks and # comments."""
+    for line in stream:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            yield line
+
+
+def _add_scrape_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the output, password, concurrency and cache options shared by commands."""
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="crackmes",
+        help="Output directory to save crackme folder.",
+    )
+    parser.add_argument(
+        "-p",
+        "--password",
+        help="Password for the zip archive (if protected).",
+    )
+    parser.add_argument(
+        "-w",
+        "--wordlist",
+        type=argparse.FileType("r", encoding="utf-8"),
+        help="File of extra zip password candidates, one per line.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Number of crackmes to scrape concurrently (default: {DEFAULT_JOBS}).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="threads",
+        help="Concurrency backend for batch runs: a thread pool, one asyncio "
+        "event loop, or I/O threads feeding parse/unzip processes (default: threads).",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        metavar="N",
+        help="Parse and unzip processes for --engine staged (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=SCHEDULES,
+        default="input",
+        help="Order of a batch: as given, or smallest archive first after probing "
+        "sizes with HEAD requests, with large archives in a lane of their own "
+        "(default: input).",
+    )
+    parser.add_argument(
+        "--large-archive-size",
+        type=float,
+        metavar="MIB",
+        default=DEFAULT_LARGE_ARCHIVE_SIZE,
+        help="Archives above this size go to the large lane of --schedule size "
+        f"(default: {DEFAULT_LARGE_ARCHIVE_SIZE}).",
+    )
+    parser.add_argument(
+        "--large-archive-rate",
+        type=float,
+        metavar="KIB",
+        help="Cap the large lane's downloads at this many KiB/s (default: no cap).",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default="flat",
+        help="Save crackmes as OUTPUT/<author>_<title>, or under "
+        f"OUTPUT/{SHARDS_DIR}/<xx>/<id> with <author>_<title> symlinked to "
+        "them (default: flat).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Only scrape the I-th of N disjoint shares of the IDs, to split a "
+        "mirror across N machines.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help="Maximum requests per second, lowered automatically while the site "
+        f"throttles us; 0 for no limit (default: {DEFAULT_RATE:g}).",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        metavar="N",
+        help="Maximum connections in use per host (default: one per job).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_HTTP_RETRIES,
+        help="Retries for connection errors and 429/5xx responses "
+        f"(default: {DEFAULT_HTTP_RETRIES}).",
+    )
+    parser.add_argument(
+        "--base-url",
+        metavar="URL",
+        help=f"Scrape a mirror or local replay server instead of {BASE_URL}.",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="Cache crackme pages in DIR and revalidate them on later runs.",
+    )
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="Work offline, serving pages from the --cache directory only.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="Seconds a cached page is used without revalidation (default: 1 day).",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+        help="Maximum cache size in MiB before old pages are evicted (default: 256).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="KIB",
+        help="Download read size in KiB (default: 64, or 1024 for archives "
+        "over 32 MiB).",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Keep archives once in a content-addressed store in DIR, shared "
+        "across output trees; archives already in it are not downloaded again.",
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=("json",),
+        help="After the run, print per-phase timings for every crackme and "
+        "percentiles across the batch as JSON lines.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=argparse.FileType("w", encoding="utf-8"),
+        default=sys.stderr,
+        metavar="PATH",
+        help="Write --metrics records to PATH instead of stderr.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Run under cProfile, save the stats to PATH (for pstats or "
+        "snakeviz) and print the most expensive calls.",
+    )
+    parser.add_argument(
+        "--catalog",
+        metavar="PATH",
+        help="SQLite catalog every scraped crackme is recorded in, for "
+        f"'get-crackme query' (default: OUTPUT/{CATALOG_FILE}).",
+    )
+    parser.add_argument(
+        "--no-catalog",
+        action="store_true",
+        help="Don't record scraped crackmes in the catalog.",
+    )
+    parser.add_argument(
+        "--no-writeups",
+        action="store_true",
+        help=f"Don't download writeup attachments into <crackme>/{WRITEUPS_DIR}.",
+    )
+    for name in CrackmeFilter.TEXT_FIELDS:
+        parser.add_argument(
+            f"--{name}",
+            help=f"Only scrape crackmes with this {name}; ignores case, and * is "
+            "a wildcard (e.g. --platform '*linux*').",
+        )
+    parser.add_argument(
+        "--min-difficulty",
+        type=float,
+        metavar="N",
+        help="Only scrape crackmes rated at least this difficult.",
+    )
+    parser.add_argument(
+        "--max-difficulty",
+        type=float,
+        metavar="N",
+        help="Only scrape crackmes rated at most this difficult.",
+    )
+    parser.add_argument(
+        "--min-quality",
+        type=float,
+        metavar="N",
+        help="Only scrape crackmes rated at least this quality.",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="Append a JSON record per scraped crackme to PATH as each scrape "
+        "finishes, or with a .parquet PATH, write a Parquet file (needs pyarrow).",
+    )
+    parser.add_argument(
+        "--max-zip-depth",
+        type=int,
+        default=DEFAULT_MAX_ZIP_DEPTH,
+        help="Levels of nested zips to unpack, counting the download itself "
+        f"(default: {DEFAULT_MAX_ZIP_DEPTH}).",
+    )
+    parser.add_argument(
+        "--max-extract-size",
+        type=int,
+        metavar="MIB",
+        default=DEFAULT_MAX_EXTRACT_BYTES // (1024 * 1024),
+        help="Give up on archives that unpack to more than this many MiB "
+        "(default: 1024).",
+    )
+    parser.add_argument(
+        "--max-archive-size",
+        type=float,
+        metavar="MIB",
+        help="Don't download archives larger than this many MiB; the crackme's "
+        "README and catalog entry are still written (default: no limit).",
+    )
+    parser.add_argument(
+        "--max-zip-ratio",
+        type=float,
+        default=DEFAULT_MAX_ZIP_RATIO,
+        help="Give up on members that expand more than this many times their "
+        f"compressed size (default: {DEFAULT_MAX_ZIP_RATIO:g}).",
+    )
+
+
+def _scrape_options(args: argparse.Namespace) -> ScrapeOptions:
+    """Build the per-crackme settings from the parsed command line."""
+    return ScrapeOptions(
+        chunk_size=args.chunk_size * 1024 if args.chunk_size else None,
+        store=BlobStore(args.store) if args.store else None,
+        wordlist=tuple(read_wordlist(args.wordlist)) if args.wordlist else (),
+        limits=ExtractLimits(
+            max_depth=args.max_zip_depth,
+            max_bytes=args.max_extract_size * 1024 * 1024,
+            max_ratio=args.max_zip_ratio,
+        ),
+        catalog=None if args.no_catalog else Catalog(_catalog_path(args)),
+        layout=args.layout,
+        export=_export_writer(args),
+        writeups=not args.no_writeups,
+        filter=_crackme_filter(args),
+        base_url=_base_url(args),
+        max_archive_bytes=(
+            int(args.max_archive_size * 1024 * 1024)
+            if args.max_archive_size is not None
+            else None
+        ),
+    )
+
+
+def _crackme_filter(args: argparse.Namespace) -> Optional[CrackmeFilter]:
+    """The filter given by --author, --platform, --min-quality and friends, if any."""
+    names = asdict(CrackmeFilter())
+    crackme_filter = CrackmeFilter(**{name: getattr(args, name) for name in names})
+    return crackme_filter or None
+
+
+def _export_writer(args: argparse.Namespace) -> Optional[ExportWriter]:
+    """The writer for --export, chosen by the file extension."""
+    if not args.export:
+        return None
+    if args.export.endswith(".parquet"):
+        if importlib.util.find_spec("pyarrow") is None:
+            print(
+                "Error: Exporting to Parquet needs pyarrow (pip install pyarrow).",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        return ParquetExportWriter(args.export)
+    return ExportWriter(args.export)
+
+
+@contextmanager
+def _opened_options(args: argparse.Namespace) -> Iterator[ScrapeOptions]:
+    """The per-crackme settings for a run, closing its export file and catalog afterwards."""
+    options = _scrape_options(args)
+    try:
+        yield options
+    finally:
+        if options.export is not None:
+            options.export.close()
+        if options.catalog is not None:
+            options.catalog.close()
+
+
+def _catalog_path(args: argparse.Namespace) -> str:
+    """The catalog given with --catalog, or the one inside the output directory."""
+    return args.catalog or os.path.join(args.output, CATALOG_FILE)
+
+
+def _open_cache(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> Optional[ResponseCache]:
+    """Create the response cache requested on the command line, if any."""
+    if args.cache_only and not args.cache:
+        parser.error("--cache-only requires --cache DIR")
+    if not args.cache:
+        return None
+    return ResponseCache(args.cache, args.cache_ttl, args.cache_size * 1024 * 1024)
+
+
+def _base_url(args: argparse.Namespace) -> str:
+    """The site page, listing and download URLs point at: --base-url, if given."""
+    return (args.base_url or BASE_URL).rstrip("/")
+
+
+def _rate_limiter(args: argparse.Namespace) -> RateLimiter:
+    """Create the limiter shared by every request of a command."""
+    return RateLimiter(args.rate, args.max_per_host)
+
+
+def _open_session(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> Tuple[Optional[ResponseCache], RateLimiter, requests.Session]:
+    """The response cache, rate limiter and session a command's requests go through."""
+    if _warm_sessions is not None:
+        return _warm_sessions.open(parser, args)
+    cache = _open_cache(parser, args)
+    limiter = _rate_limiter(args)
+    session = make_session(args.jobs, cache, args.cache_only, limiter, args.retries)
+    return cache, limiter, session
+
+
+def _own_shard(args: argparse.Namespace, crackme_ids: Iterable[str]) -> Iterable[str]:
+    """The IDs this machine scrapes: all of them, or its --shard of them."""
+    return iter_shard_ids(crackme_ids, args.shard) if args.shard else crackme_ids
+
+
+def _run_batch(
+    args: argparse.Namespace,
+    crackme_ids: Iterable[str],
+    cache: Optional[ResponseCache],
+    session: requests.Session,
+    limiter: RateLimiter,
+) -> List[ScrapeResult]:
+    """Scrape `crackme_ids` with the engine selected on the command line."""
+    with _opened_options(args) as options:
+        if args.schedule == "size":
+            return _run_by_size(args, crackme_ids, cache, session, limiter, options)
+        return _run_engine(args, crackme_ids, cache, session, limiter, options)
+
+
+def _run_by_size(
+    args: argparse.Namespace,
+    crackme_ids: Iterable[str],
+    cache: Optional[ResponseCache],
+    session: requests.Session,
+    limiter: RateLimiter,
+    options: ScrapeOptions,
+) -> List[ScrapeResult]:
+    """
+    --schedule size: the selected engine scrapes the IDs smallest archive
+    first, while a lane of LARGE_LANE_JOBS threads works through the large
+    archives next to it at no more than --large-archive-rate. Results list
+    the engine's crackmes first, then the large lane's.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    scheduler = SizeScheduler(
+        session,
+        int(args.large_archive_size * 1024 * 1024),
+        options.max_archive_bytes,
+        args.jobs,
+        base_url=options.base_url,
+    )
+    rate = args.large_archive_rate
+    lane_options = replace(options, bandwidth=rate * 1024 if rate else None)
+    with ThreadPoolExecutor(max_workers=1) as lane:
+        large = lane.submit(
+            scrape_batch,
+            scheduler.large_ids(),
+            args.output,
+            args.password,
+            LARGE_LANE_JOBS,
+            session,
+            lane_options,
+        )
+        try:
+            small_ids = scheduler.small_ids(crackme_ids)
+            results = _run_engine(args, small_ids, cache, session, limiter, options)
+        finally:
+            scheduler.close()
+        return results + large.result()
+
+
+def _run_engine(
+    args: argparse.Namespace,
+    crackme_ids: Iterable[str],
+    cache: Optional[ResponseCache],
+    session: requests.Session,
+    limiter: RateLimiter,
+    options: ScrapeOptions,
+) -> List[ScrapeResult]:
+    """Scrape `crackme_ids` on the engine selected with --engine."""
+    if args.engine == "async":
+        return scrape_batch_async(
+            crackme_ids,
+            args.output,
+            args.password,
+            args.jobs,
+            cache,
+            args.cache_only,
+            options,
+            limiter,
+            args.retries,
+        )
+    if args.engine == "staged":
+        return scrape_batch_staged(
+            crackme_ids,
+            args.output,
+            args.password,
+            args.jobs,
+            args.processes,
+            session,
+            options,
+        )
+    return scrape_batch(
+        crackme_ids, args.output, args.password, args.jobs, session, options
+    )
+
+
+def _write_metrics(args: argparse.Namespace, results: List[ScrapeResult]) -> None:
+    """Emit the --metrics records, if requested."""
+    if args.metrics == "json":
+        for record in metrics_records(results):
+            args.metrics_file.write(json.dumps(record) + "\n")
+        args.metrics_file.flush()
+
+
+def _report(
+    args: argparse.Namespace,
+    results: List[ScrapeResult],
+    errors: Sequence[str] = (),
+) -> None:
+    """
+    Print the metrics and batch summary and exit non-zero if any crackme
+    failed or the run hit other `errors`, like unreadable listing pages.
+    """
+    _write_metrics(args, results)
+    print_summary(results)
+    if errors or any(not result.ok for result in results):
+        sys.exit(1)
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="get-crackme",
+        description="Scrape a crackme from crackmes.one.",
+        epilog="Other commands: "
+        + ", ".join(COMMANDS)
+        + ". Run 'get-crackme <command> --help' for details.",
+    )
+    parser.add_argument(
+        "ids",
+        nargs="*",
+        metavar="id",
+        help="The ID(s) of the crackme(s) to scrape (e.g., 685048992b84be7ea7743940).",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=argparse.FileType("r", encoding="utf-8"),
+        help="Read additional IDs from a file, one per line ('-' for stdin).",
+    )
+    _add_scrape_arguments(parser)
+    return parser
+
+
+def get_command(argv: List[str]) -> None:
+    """Scrape the crackmes given by ID on the command line or in a file."""
+    parser = _get_parser()
+    args = parser.parse_args(argv)
+    if not args.ids and args.input is None:
+        parser.error("at least one crackme ID or --input is required")
+    cache, limiter, session = _open_session(parser, args)
+
+    single = len(args.ids) == 1 and args.input is None and args.shard is None
+    if single and args.engine == "threads":
+        with _profiling(args.profile), _opened_options(args) as options:
+            result = scrape_crackme(
+                args.ids[0], args.output, args.password, session, options
+            )
+        _write_metrics(args, [result])
+        if not result.ok:
+            sys.exit(1)
+        return
+
+    crackme_ids: Iterable[str] = args.ids
+    if args.input is not None:
+        crackme_ids = itertools.chain(args.ids, read_ids(args.input))
+    crackme_ids = _own_shard(args, crackme_ids)
+    with _profiling(args.profile):
+        results = _run_batch(args, crackme_ids, cache, session, limiter)
+    _report(args, results)
+
+
+def _crawl_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="get-crackme crawl",
+        description="Scrape every crackme listed on a range of 'Latest Crackmes' pages.",
+    )
+    parser.add_argument(
+        "--pages",
+        type=parse_page_range,
+        default=(1, 1),
+        metavar="A..B",
+        help="Listing pages to walk: 'N', 'A..B', or 'A..' to continue "
+        "until an empty page (default: 1).",
+    )
+    _add_scrape_arguments(parser)
+    return parser
+
+
+def crawl_command(argv: List[str]) -> None:
+    """Walk the /lasts/N listing pages and scrape every crackme found on them."""
+    parser = _crawl_parser()
+    args = parser.parse_args(argv)
+    cache, limiter, session = _open_session(parser, args)
+    first_page, last_page = args.pages
+    errors: List[str] = []
+    listing_ids = iter_listing_ids(
+        first_page, last_page, session, _crackme_filter(args), errors, _base_url(args)
+    )
+    crackme_ids = _own_shard(args, listing_ids)
+    with _profiling(args.profile):
+        results = _run_batch(args, crackme_ids, cache, session, limiter)
+    _report(args, results, errors)
+
+
+def _sync_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="get-crackme sync",
+        description="Fetch new crackmes from the 'Latest Crackmes' listing, "
+        "stopping once already-known crackmes are reached.",
+    )
+    parser.add_argument(
+        "--stop-after",
+        type=int,
+        default=DEFAULT_SYNC_STOP_AFTER,
+        metavar="N",
+        help="Stop paging after N consecutive known crackmes "
+        f"(default: {DEFAULT_SYNC_STOP_AFTER}).",
+    )
+    _add_scrape_arguments(parser)
+    return parser
+
+
+def sync_command(argv: List[str]) -> None:
+    """Scrape only the crackmes uploaded since the last sync of the output directory."""
+    parser = _sync_parser()
+    args = parser.parse_args(argv)
+    cache, limiter, session = _open_session(parser, args)
+    state = SyncState.load(args.output)
+    print(f"{len(state.known_ids)} crackmes already synced to {args.output}.")
+
+    # Shard first, so only this machine's IDs count towards --stop-after
+    errors: List[str] = []
+    listing_ids = iter_listing_ids(
+        1, None, session, _crackme_filter(args), errors, _base_url(args)
+    )
+    listing_ids = _own_shard(args, listing_ids)
+    new_ids = iter_new_ids(listing_ids, state.known_ids, args.stop_after)
+    with _profiling(args.profile):
+        results = _run_batch(args, new_ids, cache, session, limiter)
+    state.known_ids.update(
+        result.crackme_id for result in results if result.ok and not result.skipped
+    )
+    state.save()
+    _report(args, results, errors)
+
+
+def _open_catalog(args: argparse.Namespace) -> Catalog:
+    """Open the catalog to read from, exiting if nothing was scraped there yet."""
+    path = _catalog_path(args)
+    if not os.path.exists(path):
+        print(f"Error: No catalog at {path}.", file=sys.stderr)
+        sys.exit(1)
+    return Catalog(path)
+
+
+def _format_row(row: sqlite3.Row) -> str:
+    difficulty = f"{row['difficulty']:.1f}" if row["difficulty"] is not None else "?"
+    quality = f"{row['quality']:.1f}" if row["quality"] is not None else "?"
+    return (
+        f"{row['id']}  {difficulty:>4} {quality:>4}  "
+        f"{row['language'] or '?':<12} {row['platform'] or '?':<16} "
+        f"{row['author']}: {row['title']}"
+    )
+
+
+def query_command(argv: List[str]) -> None:
+    """Filter the crackmes recorded in the catalog."""
+    parser = argparse.ArgumentParser(
+        prog="get-crackme query",
+        description="List scraped crackmes from the catalog that match all filters. "
+        "Text filters ignore case; use * as a wildcard (e.g. --platform '*linux*').",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="crackmes",
+        help="Output directory whose catalog is queried.",
+    )
+    parser.add_argument("--catalog", metavar="PATH", help="Catalog file to query.")
+    for column in Catalog.FILTER_COLUMNS:
+        parser.add_argument(f"--{column}", help=f"Only crackmes with this {column}.")
+    parser.add_argument("--min-difficulty", type=float, metavar="N")
+    parser.add_argument("--max-difficulty", type=float, metavar="N")
+    parser.add_argument("--min-quality", type=float, metavar="N")
+    parser.add_argument("--limit", type=int, metavar="N", help="Show at most N rows.")
+    parser.add_argument(
+        "--format",
+        choices=("table", "ids", "json"),
+        default="table",
+        help="'ids' prints bare IDs, ready for 'get-crackme -i -' (default: table).",
+    )
+    args = parser.parse_args(argv)
+    catalog = _open_catalog(args)
+    filters = {
+        column: getattr(args, column)
+        for column in Catalog.FILTER_COLUMNS
+        if getattr(args, column)
+    }
+    rows = catalog.query(
+        filters, args.min_difficulty, args.max_difficulty, args.min_quality, args.limit
+    )
+    catalog.close()
+    _print_rows(rows, args.format)
+
+
+def _print_rows(rows: List[sqlite3.Row], output_format: str) -> None:
+    """Print catalog rows as a table, bare IDs or JSON lines."""
+    for row in rows:
+        if output_format == "ids":
+            print(row["id"])
+        elif output_format == "json":
+            record = dict(row)
+            record.pop("seq")
+            record["details"] = json.loads(record["details"])
+            record["comments"] = json.loads(record["comments"] or "[]")
+            record["writeups"] = json.loads(record["writeups"] or "[]")
+            print(json.dumps(record))
+        else:
+            print(_format_row(row))
+            if "snippet" in row.keys():
+                print(f"    {' '.join(row['snippet'].split())}")
+
+
+def search_command(argv: List[str]) -> None:
+    """Rank scraped crackmes by keywords in their text, using the local index."""
+    parser = argparse.ArgumentParser(
+        prog="get-crackme search",
+        description="Search the titles, authors, descriptions and comments of "
+        "scraped crackmes offline. Every term must match; end a term with * "
+        "to match it as a prefix.",
+    )
+    parser.add_argument("terms", nargs="+", help="Words to search for.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="crackmes",
+        help="Output directory whose catalog is searched.",
+    )
+    parser.add_argument("--catalog", metavar="PATH", help="Catalog file to search.")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Show the N best matches (default: 20).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("table", "ids", "json"),
+        default="table",
+        help="'ids' prints bare IDs, ready for 'get-crackme -i -' (default: table).",
+    )
+    args = parser.parse_args(argv)
+    terms = " ".join(args.terms)
+    if not terms.strip(" *"):
+        parser.error("no search terms given")
+    catalog = _open_catalog(args)
+    rows = catalog.search(terms, args.limit)
+    catalog.close()
+    _print_rows(rows, args.format)
+
+
+def render_command(argv: List[str]) -> None:
+    """Rebuild every README.md from the catalog without touching the network."""
+    parser = argparse.ArgumentParser(
+        prog="get-crackme render",
+        description="Regenerate the README.md of every crackme in the catalog "
+        "from the recorded data, e.g. after the markdown format changed. "
+        "READMEs whose content stays the same are not rewritten.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="crackmes",
+        help="Output directory whose crackmes are rendered.",
+    )
+    parser.add_argument("--catalog", metavar="PATH", help="Catalog file to read.")
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="Parse the crackme pages cached in DIR by 'get-crackme --cache' "
+        "again instead of using the catalog's copy of their fields.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        metavar="N",
+        help="Render on N processes (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--base-url",
+        metavar="URL",
+        help="The site the cached pages were fetched from, if not crackmes.one.",
+    )
+    args = parser.parse_args(argv)
+    if args.cache and not os.path.isdir(args.cache):
+        parser.error(f"no cache at {args.cache}")
+    catalog = _open_catalog(args)
+    cache = ResponseCache(args.cache) if args.cache else None
+    started = time.perf_counter()
+    counts = render_all(catalog, cache, args.processes, _base_url(args))
+    catalog.close()
+    print(
+        f"Rendered {sum(counts.values())} crackmes in "
+        f"{time.perf_counter() - started:.1f}s: "
+        + ", ".join(f"{counts[status]} {status}" for status in RENDER_STATUSES)
+    )
+    if counts["failed"] or counts["missing"]:
+        sys.exit(1)
+
+
+# --- Daemon ---
+class SessionPool:
+    """
+    Sessions a daemon keeps between jobs, one per distinct set of network
+    options, so later jobs reuse open keep-alive connections and the rate
+    limiter remembers how hard the site has been pushing back. Jobs run one
+    at a time, so no locking is needed.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[
+            tuple, Tuple[Optional[ResponseCache], RateLimiter, requests.Session]
+        ] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def open(
+        self, parser: argparse.ArgumentParser, args: argparse.Namespace
+    ) -> Tuple[Optional[ResponseCache], RateLimiter, requests.Session]:
+        key = (
+            args.jobs,
+            args.cache,
+            args.cache_only,
+            args.cache_ttl,
+            args.cache_size,
+            args.rate,
+            args.max_per_host,
+            args.retries,
+        )
+        if key not in self._entries:
+            cache = _open_cache(parser, args)
+            limiter = _rate_limiter(args)
+            session = make_session(
+                args.jobs, cache, args.cache_only, limiter, args.retries
+            )
+            self._entries[key] = (cache, limiter, session)
+        return self._entries[key]
+
+    def close(self) -> None:
+        for _, _, session in self._entries.values():
+            session.close()
+        self._entries.clear()
+
+
+# Set while this process runs as a daemon, so commands use its warm sessions
+_warm_sessions: Optional[SessionPool] = None
+
+
+def default_socket_path() -> str:
+    """$GET_CRACKME_SOCKET, or a per-user socket in the runtime directory."""
+    import tempfile
+
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"get-crackme-{getpass.getuser()}.sock")
+
+
+class _JobStream(io.TextIOBase):
+    """Forwards everything a job prints to the client that sent it."""
+
+    def __init__(self, send: Callable[[Dict[str, object]], None], name: str) -> None:
+        self._send = send
+        self._name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            self._send({self._name: text})
+        return len(text)
+
+
+@dataclass
+class _Job:
+    argv: List[str]
+    cwd: str
+    send: Callable[[Dict[str, object]], None]
+    done: threading.Event = field(default_factory=threading.Event)
+    exit_code: int = 0
+
+
+class CrawlDaemon:
+    """
+    Runs get-crackme commands sent over a Unix socket in a process that stays
+    warm: modules imported, sessions and their connections open. Clients are
+    accepted concurrently but their jobs queue up and run one at a time,
+    since a job owns the process's stdout, stderr and working directory while
+    it runs. Output is streamed back as it is printed.
+
+    Protocol: the client sends one JSON line, {"argv": [...], "cwd": "..."}
+    or {"stop": true}. The daemon answers with {"out": text} and
+    {"err": text} lines, then {"exit": code}.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+        self.sessions = SessionPool()
+        self.jobs: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self.running = 0
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self.ready = threading.Event()
+
+    def serve_forever(self) -> None:
+        import socketserver
+
+        global _warm_sessions
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon._handle(self.connection, self.rfile)
+
+        self._claim_socket()
+        old_umask = os.umask(0o177)  # Only our user may connect and submit jobs
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(
+                self.socket_path, Handler
+            )
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+        runner = threading.Thread(target=self._run_jobs, daemon=True)
+        runner.start()
+        _warm_sessions = self.sessions
+        print(f"Listening on {self.socket_path}.")
+        self.ready.set()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.jobs.put(None)
+            runner.join()
+            _warm_sessions = None
+            self._server.server_close()
+            os.unlink(self.socket_path)
+            self.sessions.close()
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs; the one running, if any, finishes first."""
+        if self._server:
+            self._server.shutdown()
+
+    def _claim_socket(self) -> None:
+        """Remove a socket left behind by a daemon that died, or refuse to start."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise ScrapeError(f"A daemon is already listening on {self.socket_path}.")
+        finally:
+            probe.close()
+
+    def _handle(self, connection: socket.socket, rfile: BinaryIO) -> None:
+        lock = threading.Lock()
+
+        def send(message: Dict[str, object]) -> None:
+            data = (json.dumps(message) + "\n").encode("utf-8")
+            with lock:
+                try:
+                    connection.sendall(data)
+                except OSError:
+                    pass  # The client went away; let the job finish anyway
+
+        try:
+            request = json.loads(rfile.readline())
+            argv, cwd = request.get("argv"), request.get("cwd")
+        except (ValueError, AttributeError):
+            request, argv, cwd = {}, None, None
+        if request.get("stop"):
+            send({"err": "Daemon stopping.\n", "exit": 0})
+            threading.Thread(target=self.shutdown).start()
+            return
+        if not (
+            isinstance(argv, list)
+            and all(isinstance(arg, str) for arg in argv)
+            and isinstance(cwd, str)
+        ):
+            send({"err": "Error: Malformed request.\n", "exit": 2})
+            return
+        if argv[:1] == ["serve"]:
+            send({"err": "Error: The daemon can't run 'serve'.\n", "exit": 2})
+            return
+
+        job = _Job(argv, cwd, send)
+        ahead = self.jobs.qsize() + self.running
+        if ahead:
+            send({"err": f"Queued behind {ahead} job(s).\n"})
+        self.jobs.put(job)
+        job.done.wait()
+        send({"exit": job.exit_code})
+
+    def _run_jobs(self) -> None:
+        while (job := self.jobs.get()) is not None:
+            self.running = 1
+            job.exit_code = self._run(job)
+            self.running = 0
+            job.done.set()
+
+    def _run(self, job: _Job) -> int:
+        """Run one job with its output sent to its client. Returns the exit code."""
+        saved = sys.stdout, sys.stderr, os.getcwd()
+        sys.stdout = _JobStream(job.send, "out")
+        sys.stderr = _JobStream(job.send, "err")
+        try:
+            os.chdir(job.cwd)
+            _dispatch(job.argv)
+            return 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except Exception as e:  # Keep the daemon up for the next job
+            print(f"Error: Unexpected failure: {e}", file=sys.stderr)
+            return 1
+        finally:
+            sys.stdout, sys.stderr, cwd = saved
+            os.chdir(cwd)
+
+
+def _daemon_request(request: Dict[str, object], socket_path: str) -> Optional[int]:
+    """
+    Send a request to the daemon and relay its output. Returns the exit code,
+    or None if no daemon is listening. Sockets owned by another user are
+    never used: in a shared temporary directory, anyone could have put one
+    there to receive our jobs.
+    """
+    try:
+        owner = os.stat(socket_path).st_uid
+    except OSError:
+        return None
+    if owner != os.getuid():
+        print(
+            f"Warning: Ignoring {socket_path}, which belongs to another user.",
+            file=sys.stderr,
+        )
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        return None  # Left behind by a daemon that is gone
+    out, err = sys.stdout, sys.stderr
+    with connection, connection.makefile("r", encoding="utf-8") as replies:
+        connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        for line in replies:
+            message = json.loads(line)
+            for key, stream in (("out", out), ("err", err)):
+                if key in message:
+                    stream.write(message[key])
+                    stream.flush()
+            if "exit" in message:
+                return message["exit"]
+    print("Error: The daemon closed the connection.", file=err)
+    return 1
+
+
+def run_in_daemon(argv: List[str], socket_path: Optional[str] = None) -> Optional[int]:
+    """
+    Hand a command to a running `get-crackme serve` daemon and relay its
+    output. Returns the exit code, or None to run it in this process: no
+    daemon is listening, $GET_CRACKME_NO_DAEMON is set, or the command reads
+    stdin, which can't be forwarded.
+    """
+    if (
+        not hasattr(socket, "AF_UNIX")
+        or os.environ.get(NO_DAEMON_ENV)
+        or _reads_stdin(argv)
+    ):
+        return None
+    return _daemon_request(
+        {"argv": argv, "cwd": os.getcwd()}, socket_path or default_socket_path()
+    )
+
+
+def serve_command(argv: List[str]) -> None:
+    """Run the daemon other get-crackme invocations hand their jobs to."""
+    parser = argparse.ArgumentParser(
+        prog="get-crackme serve",
+        description="Keep a warm process with open sessions and run the jobs "
+        "of other get-crackme invocations, which use it automatically.",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help=f"Unix socket to listen on (default: ${SOCKET_ENV} or "
+        f"{default_socket_path()}).",
+    )
+    parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="Stop the running daemon once its current job is done.",
+    )
+    args = parser.parse_args(argv)
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: serve needs Unix domain sockets.", file=sys.stderr)
+        sys.exit(1)
+    socket_path = args.socket or default_socket_path()
+
+    if args.stop:
+        if _daemon_request({"stop": True}, socket_path) is None:
+            print(f"No daemon is listening on {socket_path}.", file=sys.stderr)
+            sys.exit(1)
+        return
+    try:
+        CrawlDaemon(socket_path).serve_forever()
+    except ScrapeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+COMMANDS = {
+    "crawl": crawl_command,
+    "sync": sync_command,
+    "query": query_command,
+    "search": search_command,
+    "render": render_command,
+    "serve": serve_command,
+}
+
+
+# Parsers of the commands with file arguments, which might be given as '-'
+_FILE_PARSERS = {"crawl": _crawl_parser, "sync": _sync_parser}
+
+
+def _stdio_only(file_type: argparse.FileType, value: str) -> object:
+    """Open '-' as `file_type` does, but leave file paths as they are."""
+    return file_type(value) if value == "-" else value
+
+
+def _reads_stdin(argv: List[str]) -> bool:
+    """
+    Whether the command has a file argument given as '-' for stdin. No file
+    is opened, and usage errors and --help are left to the command to print.
+    """
+    if argv[:1] and argv[0] in COMMANDS:
+        if argv[0] not in _FILE_PARSERS:
+            return False
+        parser, argv = _FILE_PARSERS[argv[0]](), argv[1:]
+    else:
+        parser = _get_parser()
+    for action in parser._actions:
+        if isinstance(action.type, argparse.FileType):
+            action.type = functools.partial(_stdio_only, action.type)
+    try:
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            args = parser.parse_args(argv)
+    except SystemExit:
+        return False
+    return any(value is sys.stdin for value in vars(args).values())
+
+
+def _dispatch(argv: List[str]) -> None:
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+    else:
+        get_command(argv)
+
+
+def main() -> None:
+    """Parse command-line arguments and run the scraper, in the daemon if one is up."""
+    argv = sys.argv[1:]
+    if argv[:1] != ["serve"]:
+        exit_code = run_in_daemon(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    _dispatch(argv)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+#!/opt/venv/bin/python
+"""
+The get-crackme command. A script run directly is compiled on every call,
+so this stays tiny and imports crawler, whose bytecode Python caches.
+"""
+
+from crawler import main
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,32 @@
 Unit tests for the crawler.py script.
 """
 
+import argparse
+import asyncio
+import email.utils
+import io
+import json
+import pstats
+import tempfile
 import sys
 import os  # Import os
 import pathlib  # Import pathlib
+import threading
+import time
 import zipfile  # Import zipfile
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+import aiohttp
+import bs4
 import pytest
 import requests
-from bs4 import Tag
 
 # Add the parent directory to the path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import crawler  # Reverted import statement
+from benchmarks import bench_crawler, load_test, replay_server
+from tests.zip_fixtures import make_zip
 
 
 @pytest.fixture
@@ -34,12 +48,6 @@ def mock_makedirs(mocker):
     return mocker.patch("os.makedirs")
 
 
-@pytest.fixture
-def mock_sys_exit(mocker):
-    """Fixture to mock sys.exit."""
-    return mocker.patch("sys.exit")
-
-
 @pytest.fixture
 def sample_html_complete():
     """Fixture for a complete HTML page."""
@@ -97,6 +105,71 @@ def sample_html_provided_from_file(request):  # Add request as an argument
         print(f"Error reading file in fixture: {e}", file=sys.stderr)
 
 
+class LocalSite:
+    """A tiny threaded HTTP server standing in for crackmes.one in tests."""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.command, self.path, dict(self.headers)))
+                status, headers, body = site.routes.get(self.path, (404, {}, b""))
+                if callable(body):
+                    status, headers, body = body(self)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def add(self, path, body, status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.routes[path] = (status, headers or {}, body)
+
+    def paths(self):
+        return [path for _, path, _ in self.requests]
+
+
+@pytest.fixture
+def local_site(mocker):
+    """Fixture serving pages from a local HTTP server used as BASE_URL."""
+    site = LocalSite()
+    site.thread.start()
+    mocker.patch("crawler.BASE_URL", site.url)
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_daemon(monkeypatch, tmp_path):
+    """Keep main() from handing tests to a get-crackme daemon running on this machine."""
+    monkeypatch.setenv("GET_CRACKME_SOCKET", str(tmp_path / "no-daemon.sock"))
+
+
+@pytest.fixture
+def sample_listing_html(request):
+    """Fixture for a 'Latest Crackmes' listing page, read from a file."""
+    test_file_dir = os.path.dirname(request.fspath)
+    file_path = os.path.join(test_file_dir, "html_samples", "sample_listing.html")
+    return pathlib.Path(file_path).read_text(encoding="utf-8")
+
+
 def test_download_file_request_exception(mock_requests, capsys):
     """Test download_file handles requests.exceptions.RequestException."""
     mock_requests.side_effect = requests.exceptions.RequestException("Network Error")
@@ -123,51 +196,49 @@ def test_download_file_raise_for_status_failure(mocker, capsys):
 
 
 # --- Tests for unzip_file ---
-def test_unzip_file_success_with_password(mocker, tmp_path):
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_make_zip_password_encrypts(compression):
+    """Test the zip fixture really encrypts when given a password."""
+    data = b"secret payload " * 10
+    archive = make_zip({"a.txt": data}, "pw", compression)
+    assert data not in archive
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        info = zf.getinfo("a.txt")
+        assert info.flag_bits & 0x1
+        assert info.compress_type == compression
+        with pytest.raises(RuntimeError, match="encrypted"):
+            zf.read("a.txt")
+        with pytest.raises(RuntimeError, match="Bad password"):
+            zf.read("a.txt", pwd=b"wrong")
+        assert zf.read("a.txt", pwd=b"pw") == data
+    with zipfile.ZipFile(io.BytesIO(make_zip({"a.txt": data}))) as zf:
+        assert not zf.getinfo("a.txt").flag_bits & 0x1
+
+
+def test_unzip_file_success_with_password(tmp_path):
     """Test unzip_file successfully unzips a file with the correct password."""
-    zip_filepath = tmp_path / "dummy_protected.zip"  # Just a dummy path
+    zip_filepath = tmp_path / "protected.zip"
     password = "infected"
     base_extract_dir = tmp_path / "extracted"
-
-    mock_zipfile_class = mocker.MagicMock()
-    mock_zipfile_instance = mock_zipfile_class.return_value.__enter__.return_value
-    mock_zipfile_instance.extractall.return_value = None  # No error
-    mock_zipfile_instance.namelist.return_value = ["test_file.txt"]  # Simulate content
-
-    mocker.patch("crawler.zipfile.ZipFile", new=mock_zipfile_class)
+    zip_filepath.write_bytes(make_zip({"test_file.txt": b"secret"}, password))
 
     success = crawler.unzip_file(
         str(zip_filepath), password=password, extract_dir=str(base_extract_dir)
     )
 
     assert success
-    mock_zipfile_class.assert_called_once_with(str(zip_filepath), "r")
-    mock_zipfile_instance.extractall.assert_called_once_with(
-        path=str(base_extract_dir / "crackme"), pwd=password.encode("utf-8")
-    )
+    assert (base_extract_dir / "crackme" / "test_file.txt").read_bytes() == b"secret"
 
 
-def test_unzip_file_incorrect_password(mocker, tmp_path, capsys):
+def test_unzip_file_incorrect_password(tmp_path, capsys):
     """Test unzip_file handles incorrect passwords."""
-    zip_filepath = (
-        tmp_path / "dummy_protected.zip"
-    )  # Just a dummy path, no real file needed
-    incorrect_password = "wrong_password"
+    zip_filepath = tmp_path / "protected.zip"
     base_extract_dir = tmp_path / "extracted"
-
-    # Mock the ZipFile class directly
-    mock_zipfile_class = mocker.MagicMock()
-    # Configure the mock instance returned by the context manager
-    mock_zipfile_instance = mock_zipfile_class.return_value.__enter__.return_value
-    mock_zipfile_instance.extractall.side_effect = RuntimeError("Bad password")
-
-    mocker.patch(
-        "crawler.zipfile.ZipFile", new=mock_zipfile_class
-    )  # Patch the class itself
+    zip_filepath.write_bytes(make_zip({"test_file.txt": b"secret"}, "infected"))
 
     success = crawler.unzip_file(
         str(zip_filepath),
-        password=incorrect_password,
+        password="wrong_password",
         extract_dir=str(base_extract_dir),
     )
 
@@ -175,31 +246,22 @@ def test_unzip_file_incorrect_password(mocker, tmp_path, capsys):
     captured = capsys.readouterr()
     assert "Error unzipping" in captured.err
     assert "Incorrect password?" in captured.err
-    mock_zipfile_class.assert_called_once_with(str(zip_filepath), "r")
-    mock_zipfile_instance.extractall.assert_called_once_with(
-        path=str(base_extract_dir / "crackme"), pwd=incorrect_password.encode("utf-8")
-    )
 
 
-def test_unzip_file_no_password(mocker, tmp_path):
+def test_unzip_file_no_password(tmp_path):
     """Test unzip_file unzips a file without a password (if it's not password protected)."""
-    zip_filepath = tmp_path / "dummy_unprotected.zip"
+    zip_filepath = tmp_path / "unprotected.zip"
     base_extract_dir = tmp_path / "extracted_no_pwd"
-
-    mock_zipfile_class = mocker.MagicMock()
-    mock_zipfile_instance = mock_zipfile_class.return_value.__enter__.return_value
-    mock_zipfile_instance.extractall.return_value = None
-    mock_zipfile_instance.namelist.return_value = ["test_file.txt"]
-
-    mocker.patch("crawler.zipfile.ZipFile", new=mock_zipfile_class)
+    zip_filepath.write_bytes(
+        make_zip({"test_file.txt": b"hello", "sub/dir/file.bin": b"\x00"})
+    )
 
     success = crawler.unzip_file(str(zip_filepath), extract_dir=str(base_extract_dir))
 
     assert success
-    mock_zipfile_class.assert_called_once_with(str(zip_filepath), "r")
-    mock_zipfile_instance.extractall.assert_called_once_with(
-        path=str(base_extract_dir / "crackme")  # No password provided
-    )
+    final_extract_dir = base_extract_dir / "crackme"
+    assert (final_extract_dir / "test_file.txt").read_bytes() == b"hello"
+    assert (final_extract_dir / "sub" / "dir" / "file.bin").read_bytes() == b"\x00"
 
 
 def test_unzip_file_bad_zip_file(mocker, tmp_path, capsys):
@@ -209,7 +271,7 @@ def test_unzip_file_bad_zip_file(mocker, tmp_path, capsys):
 
     mock_zipfile_class = mocker.MagicMock()
     mock_zipfile_class.side_effect = zipfile.BadZipFile("Bad zip file")
-    mocker.patch("crawler.zipfile.ZipFile", new=mock_zipfile_class)
+    mocker.patch("zipfile.ZipFile", new=mock_zipfile_class)
 
     success = crawler.unzip_file(str(zip_filepath), extract_dir=str(base_extract_dir))
 
@@ -226,7 +288,7 @@ def test_unzip_file_general_exception(mocker, tmp_path, capsys):
 
     mock_zipfile_class = mocker.MagicMock()
     mock_zipfile_class.side_effect = Exception("Generic error")
-    mocker.patch("crawler.zipfile.ZipFile", new=mock_zipfile_class)
+    mocker.patch("zipfile.ZipFile", new=mock_zipfile_class)
 
     success = crawler.unzip_file(str(zip_filepath), extract_dir=str(base_extract_dir))
 
@@ -240,57 +302,30 @@ def test_unzip_file_general_exception(mocker, tmp_path, capsys):
 
 
 def test_unzip_file_recursive_unzip(mocker, tmp_path):
-    """Test unzip_file recursively unzips nested zip files."""
+    """Test unzip_file unpacks nested zips in memory, without writing them out."""
     outer_zip_filepath = tmp_path / "outer.zip"
-    inner_zip_filepath = tmp_path / "extracted/crackme/inner.zip"
     base_extract_dir = tmp_path / "extracted"
     final_extract_dir = base_extract_dir / "crackme"
-
-    # Create dummy zip files
-    with zipfile.ZipFile(outer_zip_filepath, "w") as zf:
-        zf.writestr("inner.zip", b"dummy inner zip content")
-
-    # Mock the ZipFile class
-    mock_zipfile_class = mocker.MagicMock()
-
-    # Mock the instances returned by the context manager for outer and inner zips
-    mock_outer_zip_instance = mocker.MagicMock()
-    mock_outer_zip_instance.namelist.return_value = ["inner.zip"]
-
-    mock_inner_zip_instance = mocker.MagicMock()
-    mock_inner_zip_instance.namelist.return_value = ["nested_file.txt"]
-
-    # Configure the side_effect for the __enter__ method of the mocked ZipFile class
-    mock_zipfile_class.return_value.__enter__.side_effect = [
-        mock_outer_zip_instance,
-        mock_inner_zip_instance,
-    ]
-
-    mocker.patch("crawler.zipfile.ZipFile", new=mock_zipfile_class)
-    mocker.patch(
-        "os.path.isfile", side_effect=lambda p: p == str(inner_zip_filepath)
-    )  # Mock isfile for inner.zip
+    innermost = make_zip({"nested_file.txt": b"deep"})
+    inner = make_zip({"innermost.zip": innermost, "readme.txt": b"inner"}, "pw")
+    outer_zip_filepath.write_bytes(make_zip({"inner.zip": inner}, "pw"))
+    zipfile_spy = mocker.spy(zipfile, "ZipFile")
 
     success = crawler.unzip_file(
-        str(outer_zip_filepath), extract_dir=str(base_extract_dir)
+        str(outer_zip_filepath), password="pw", extract_dir=str(base_extract_dir)
     )
 
     assert success
-
-    # Assert that ZipFile was called with the correct paths
-    assert (
-        mocker.call(str(outer_zip_filepath), "r") in mock_zipfile_class.call_args_list
-    )
+    assert (final_extract_dir / "inner" / "readme.txt").read_bytes() == b"inner"
     assert (
-        mocker.call(str(inner_zip_filepath), "r") in mock_zipfile_class.call_args_list
-    )
-
-    # Assert extractall was called on the correct instances
-    mock_outer_zip_instance.extractall.assert_called_once_with(
-        path=str(final_extract_dir)
-    )
-    mock_inner_zip_instance.extractall.assert_called_once_with(
-        path=str(final_extract_dir / "crackme")
+        final_extract_dir / "inner" / "innermost" / "nested_file.txt"
+    ).read_bytes() == b"deep"
+    assert not (final_extract_dir / "inner.zip").exists()
+    assert not (final_extract_dir / "inner" / "innermost.zip").exists()
+    # Only the outer archive is opened from disk
+    assert [c.args[0] for c in zipfile_spy.call_args_list][0] == str(outer_zip_filepath)
+    assert all(
+        isinstance(c.args[0], io.BytesIO) for c in zipfile_spy.call_args_list[1:]
     )
 
 
@@ -338,7 +373,7 @@ def test_scrape_crackme_complete(
 
     # Check unzip_file was called
     mock_unzip_file.assert_called_once_with(
-        str(dummy_zip_path), password="crackmes.one"
+        str(dummy_zip_path), password="crackmes.one", limits=crawler.ExtractLimits()
     )
 
     # Check markdown file was written
@@ -360,83 +395,56 @@ def test_scrape_crackme_minimal(
     mocker.patch("requests.get").return_value.text = sample_html_minimal
     mocker.patch("crawler.download_file")  # Store mock in variable
 
-    with pytest.raises(SystemExit) as excinfo:
-        crawler.scrape_crackme("123", str(tmp_path))
-    assert excinfo.type is SystemExit
-    assert excinfo.value.code == 1
+    result = crawler.scrape_crackme("123", str(tmp_path))
+    assert not result.ok
 
 
 def test_scrape_crackme_get_soup_fails(mocker, tmp_path):
-    """Test scrape_crackme exits if get_soup returns None."""
-    mocker.patch("crawler.get_soup", return_value=None)
-    with pytest.raises(SystemExit) as excinfo:
-        crawler.scrape_crackme("123", str(tmp_path))
-    assert excinfo.type is SystemExit
-    assert excinfo.value.code == 1
+    """Test scrape_crackme fails if the page cannot be fetched."""
+    mocker.patch("crawler.fetch_html", return_value=None)
+    result = crawler.scrape_crackme("123", str(tmp_path))
+    assert not result.ok
+    assert result.error.startswith("Could not fetch crackme page")
 
 
 def test_scrape_crackme_no_h3_tag(mocker, tmp_path, capsys):
-    """Test scrape_crackme exits if no h3 tag is found."""
-    mock_soup_instance = mocker.MagicMock()
-    mock_soup_instance.find.return_value = None  # Mock find('h3') to return None
-    mocker.patch("crawler.get_soup", return_value=mock_soup_instance)
+    """Test scrape_crackme fails if no h3 tag is found."""
+    mocker.patch(
+        "crawler.fetch_html", return_value="<html><body><p>Nothing</p></body></html>"
+    )
 
-    with pytest.raises(SystemExit) as excinfo:
-        crawler.scrape_crackme("123", str(tmp_path))
-    assert excinfo.type is SystemExit
-    assert excinfo.value.code == 1
+    result = crawler.scrape_crackme("123", str(tmp_path))
+    assert not result.ok
     captured = capsys.readouterr()
     assert "Error: Could not find main title/author tag." in captured.err
 
 
-def test_scrape_crackme_io_error(
-    mocker, mock_open, sample_html_complete, tmp_path, mock_sys_exit
-):
-    """Test scrape_crackme exits if writing the markdown file fails."""
+def test_scrape_crackme_io_error(mocker, mock_open, sample_html_complete, tmp_path):
+    """Test scrape_crackme fails if writing the markdown file fails."""
     mocker.patch("requests.get").return_value.text = sample_html_complete
     mocker.patch("crawler.download_file")
     mocker.patch("os.makedirs", return_value=None)  # Ensure makedirs succeeds
 
     mock_open.side_effect = IOError("Permission denied")
 
-    crawler.scrape_crackme("123", str(tmp_path))
-    mock_sys_exit.assert_called_once_with(1)
-
-
-def test_scrape_crackme_no_description_span(mocker, tmp_path, capsys):
-    """Test scrape_crackme handles the case where the description span is not found."""
-    mock_soup_instance = mocker.MagicMock()
-
-    # Mock the h3_tag and its text attribute
-    mock_h3_tag = mocker.MagicMock(spec=Tag)
-    mock_h3_tag.text.strip.return_value = "testuser's Test Crackme"
-
-    # Mock the panel_background_div and its find_all method
-    mock_panel_background_div = mocker.MagicMock(spec=Tag)
-    mock_panel_background_div.find_all.return_value = []  # No detail columns
+    result = crawler.scrape_crackme("123", str(tmp_path))
+    assert not result.ok
+    assert "Permission denied" in result.error
 
-    # Mock the description_header_p
-    mock_description_header_p = mocker.MagicMock(spec=Tag)
 
-    # Mock description_span to be a Tag, but its inner span to be None
-    mock_description_span = mocker.MagicMock(spec=Tag)
-    mock_description_span.find.return_value = (
-        None  # final_description_text will be None
-    )
-    mock_description_span.text.strip.return_value = (
-        "Description fallback text."  # This will be used
+def test_scrape_crackme_no_description_span(
+    mocker, mock_makedirs, mock_open, tmp_path, capsys
+):
+    """Test scrape_crackme falls back to the paragraph text without the description span."""
+    mocker.patch(
+        "crawler.fetch_html",
+        return_value="""
+        <h3><a href="/user/testuser">testuser</a>'s Test Crackme</h3>
+        <div class="columns panel-background"></div>
+        <p><b>Description</b></p>
+        <p>Description fallback text.</p>
+        """,
     )
-    mock_description_header_p.find_next_sibling.return_value = mock_description_span
-
-    # Configure the side_effect for soup.find
-    # The order of calls to soup.find is: 'h3', 'div.columns.panel-background', 'p.Description', 'a.btn-download'
-    mock_soup_instance.find.side_effect = [
-        mock_h3_tag,  # For h3_tag
-        mock_panel_background_div,  # For panel_background_div
-        mock_description_header_p,  # For description_header_p
-        None,  # For download_link
-    ]
-    mocker.patch("crawler.get_soup", return_value=mock_soup_instance)
     mocker.patch("crawler.download_file", return_value=None)  # No download file
 
     crawler.scrape_crackme("123", str(tmp_path))
@@ -445,45 +453,25 @@ def test_scrape_crackme_no_description_span(mocker, tmp_path, capsys):
     assert (
         "Warning: Could not find download link." in captured.err
     )  # Still expect this warning
-    # No specific assertion for description fallback, as it defaults to empty string.
+    written_content = mock_open().write.call_args[0][0]
+    assert "> Description fallback text." in written_content
 
 
 def test_scrape_crackme_no_download_link(
     mocker, mock_makedirs, mock_open, sample_html_complete, tmp_path, capsys
 ):
     """Test scrape_crackme handles the case where no download link is found."""
-    mock_soup_instance = mocker.MagicMock()
-
-    # Mock the h3_tag and its text attribute
-    mock_h3_tag = mocker.MagicMock(spec=Tag)
-    mock_h3_tag.text.strip.return_value = "testuser's Test Crackme"
-
-    # Mock the panel_background_div and its find_all method
-    mock_panel_background_div = mocker.MagicMock(spec=Tag)
-    mock_panel_background_div.find_all.return_value = []  # No detail columns
-
-    # Mock the description_header_p and its find_next_sibling method
-    mock_description_header_p = mocker.MagicMock(spec=Tag)
-    mock_description_span = mocker.MagicMock(spec=Tag)
-    mock_final_description_text = mocker.MagicMock(spec=Tag)
-    mock_final_description_text.text.strip.return_value = "A test description."
-    mock_description_span.find.return_value = mock_final_description_text
-    mock_description_header_p.find_next_sibling.return_value = mock_description_span
-
-    # Configure the side_effect for soup.find
-    # The order of calls to soup.find is: 'h3', 'div.columns.panel-background', 'p.Description', 'a.btn-download'
-    mock_soup_instance.find.side_effect = [
-        mock_h3_tag,  # For h3_tag
-        mock_panel_background_div,  # For panel_background_div
-        mock_description_header_p,  # For description_header_p
-        None,  # For download_link
-    ]
-    mocker.patch("crawler.get_soup", return_value=mock_soup_instance)
+    mocker.patch(
+        "crawler.fetch_html",
+        return_value=sample_html_complete.replace('class="btn-download"', ""),
+    )
+    mock_download_file = mocker.patch("crawler.download_file")
 
     crawler.scrape_crackme("123", str(tmp_path))
 
     captured = capsys.readouterr()
     assert "Warning: Could not find download link." in captured.err
+    mock_download_file.assert_not_called()
 
 
 # --- Tests for main ---
@@ -496,7 +484,13 @@ def test_main(mocker):
 
     crawler.main()
 
-    mock_scrape.assert_called_once_with("some_id", "some_dir", "test_pwd")
+    mock_scrape.assert_called_once_with(
+        "some_id", "some_dir", "test_pwd", mocker.ANY, mocker.ANY
+    )
+    session, options = mock_scrape.call_args[0][3:]
+    assert replace(options, catalog=None) == crawler.ScrapeOptions()
+    assert options.catalog.path == os.path.join("some_dir", crawler.CATALOG_FILE)
+    assert session.get_adapter(crawler.BASE_URL).limiter.rate == crawler.DEFAULT_RATE
 
 
 def test_main_no_password(mocker):
@@ -506,7 +500,11 @@ def test_main_no_password(mocker):
 
     crawler.main()
 
-    mock_scrape.assert_called_once_with("some_id", "some_dir", None)
+    mock_scrape.assert_called_once_with(
+        "some_id", "some_dir", None, mocker.ANY, mocker.ANY
+    )
+    options = mock_scrape.call_args[0][4]
+    assert replace(options, catalog=None) == crawler.ScrapeOptions()
 
 
 def test_scrape_crackme_with_cli_password(
@@ -529,7 +527,9 @@ def test_scrape_crackme_with_cli_password(
     crawler.scrape_crackme(crackme_id, output_dir, password=cli_password)
 
     mock_download_file.assert_called_once()
-    mock_unzip_file.assert_called_once_with(str(dummy_zip_path), password=cli_password)
+    mock_unzip_file.assert_called_once_with(
+        str(dummy_zip_path), password=cli_password, limits=crawler.ExtractLimits()
+    )
 
 
 def test_scrape_crackme_with_default_passwords_success(
@@ -554,8 +554,12 @@ def test_scrape_crackme_with_default_passwords_success(
     mock_download_file.assert_called_once()
     # Assert calls for default passwords
     expected_calls = [
-        mocker.call(str(dummy_zip_path), password="crackmes.one"),
-        mocker.call(str(dummy_zip_path), password="crackmes.de"),
+        mocker.call(
+            str(dummy_zip_path), password="crackmes.one", limits=crawler.ExtractLimits()
+        ),
+        mocker.call(
+            str(dummy_zip_path), password="crackmes.de", limits=crawler.ExtractLimits()
+        ),
     ]
     mock_unzip_file.assert_has_calls(expected_calls)
     assert (
@@ -585,12 +589,2736 @@ def test_scrape_crackme_with_default_passwords_failure(
     mock_download_file.assert_called_once()
     # Assert calls for default passwords and then without password
     expected_calls = [
-        mocker.call(str(dummy_zip_path), password="crackmes.one"),
-        mocker.call(str(dummy_zip_path), password="crackmes.de"),
-        mocker.call(str(dummy_zip_path)),  # Final attempt without password
+        mocker.call(
+            str(dummy_zip_path), password="crackmes.one", limits=crawler.ExtractLimits()
+        ),
+        mocker.call(
+            str(dummy_zip_path), password="crackmes.de", limits=crawler.ExtractLimits()
+        ),
+        mocker.call(
+            str(dummy_zip_path), limits=crawler.ExtractLimits()
+        ),  # Final attempt without password
     ]
     mock_unzip_file.assert_has_calls(expected_calls)
     assert mock_unzip_file.call_count == 3  # Called three times
     captured = capsys.readouterr()
     assert "Warning: Could not unzip" in captured.err
     assert "without password." in captured.err
+
+
+# --- Tests for batch mode ---
+def test_make_session_sets_pool_and_user_agent():
+    """Test make_session sizes the connection pool and sets the User-Agent."""
+    session = crawler.make_session(8)
+    assert session.headers["User-Agent"] == crawler.USER_AGENT
+    adapter = session.get_adapter("https://crackmes.one")
+    assert adapter._pool_maxsize == 8 * (1 + crawler.WRITEUP_JOBS)  # With writeups
+
+
+def test_get_soup_uses_session(mocker, sample_html_complete):
+    """Test get_soup fetches through the given session instead of requests.get."""
+    mock_get = mocker.patch("requests.get")
+    session = mocker.MagicMock()
+    session.get.return_value.text = sample_html_complete
+
+    soup = crawler.get_soup("http://fakeurl.com/crackme/1", session)
+
+    assert soup.find("h3") is not None
+    session.get.assert_called_once()
+    mock_get.assert_not_called()
+
+
+def test_scrape_batch_collects_results_in_order(mocker, tmp_path):
+    """Test scrape_batch keeps going after failures and returns input order."""
+
+    def fake_scrape(crackme_id, output_dir, password, session, options):
+        if crackme_id == "bad":
+            raise crawler.ScrapeError("Could not find main title/author tag.")
+        if crackme_id == "boom":
+            raise ValueError("unexpected")
+        return crawler.ScrapeResult(
+            crackme_id, ok=True, directory=os.path.join(output_dir, crackme_id)
+        )
+
+    mocker.patch("crawler._scrape_crackme", side_effect=fake_scrape)
+    ids = (i for i in ["a", "bad", "b", "boom", "c", "d", "e", "f", "g", "h"])
+
+    results = crawler.scrape_batch(ids, str(tmp_path), jobs=2, session=object())
+
+    assert [r.crackme_id for r in results] == [
+        "a", "bad", "b", "boom", "c", "d", "e", "f", "g", "h"
+    ]  # fmt: skip
+    assert [r.crackme_id for r in results if not r.ok] == ["bad", "boom"]
+    assert results[0].directory == os.path.join(str(tmp_path), "a")
+    assert results[1].error == "Could not find main title/author tag."
+
+
+def test_read_ids_skips_blanks_and_comments():
+    """Test read_ids ignores empty lines and comments."""
+    lines = ["id1\n", "\n", "# header\n", "id2  # trailing\n"]
+    assert list(crawler.read_ids(iter(lines))) == ["id1", "id2"]
+
+
+def test_print_summary(capsys):
+    """Test print_summary reports every ID and the totals."""
+    crawler.print_summary(
+        [
+            crawler.ScrapeResult("a", ok=True, directory="out/a"),
+            crawler.ScrapeResult("b", ok=False, error="boom"),
+        ]
+    )
+    out = capsys.readouterr().out
+    assert "OK      a -> out/a" in out
+    assert "FAILED  b: boom" in out
+    assert "1 succeeded, 1 failed." in out
+
+
+def test_main_batch(mocker):
+    """Test main runs a batch when several IDs are given."""
+    mock_batch = mocker.patch(
+        "crawler.scrape_batch",
+        return_value=[crawler.ScrapeResult("a", ok=True, directory="d")],
+    )
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch("sys.argv", ["crawler.py", "a", "b", "-o", "out", "-j", "3"])
+
+    crawler.main()
+
+    mock_scrape.assert_not_called()
+    args = mock_batch.call_args[0]
+    assert list(args[0]) == ["a", "b"]
+    assert args[1:4] == ("out", None, 3)
+
+
+def test_main_batch_from_input_file_exits_on_failure(mocker, tmp_path):
+    """Test main reads IDs from --input and exits non-zero if any ID failed."""
+    id_file = tmp_path / "ids.txt"
+    id_file.write_text("b\nc\n", encoding="utf-8")
+    mock_batch = mocker.patch(
+        "crawler.scrape_batch",
+        return_value=[crawler.ScrapeResult("a", ok=False, error="x")],
+    )
+    mocker.patch("sys.argv", ["crawler.py", "a", "-i", str(id_file)])
+
+    with pytest.raises(SystemExit) as excinfo:
+        crawler.main()
+
+    assert excinfo.value.code == 1
+    assert list(mock_batch.call_args[0][0]) == ["a", "b", "c"]
+
+
+def test_main_requires_ids(mocker, capsys):
+    """Test main errors out when neither IDs nor --input are given."""
+    mocker.patch("sys.argv", ["crawler.py"])
+    with pytest.raises(SystemExit) as excinfo:
+        crawler.main()
+    assert excinfo.value.code == 2
+    assert "at least one crackme ID" in capsys.readouterr().err
+
+
+# --- Tests for the asyncio engine ---
+def test_scrape_batch_async_same_layout(local_site, sample_html_complete, tmp_path):
+    """Test the async engine writes the README and extracted crackme like the threaded one."""
+    local_site.add("/crackme/123", sample_html_complete)
+    local_site.add("/download/12345", make_zip({"crackme.bin": b"\x7fELF"}))
+
+    results = crawler.scrape_batch_async(["123", "missing"], str(tmp_path), jobs=2)
+
+    assert [r.crackme_id for r in results] == ["123", "missing"]
+    assert results[0].ok
+    assert not results[1].ok
+    crackme_dir = tmp_path / "testuser_Test_Crackme"
+    assert results[0].directory == str(crackme_dir)
+    assert "# Test Crackme" in (crackme_dir / "README.md").read_text(encoding="utf-8")
+    assert (crackme_dir / "crackme" / "crackme.bin").read_bytes() == b"\x7fELF"
+
+
+def test_scrape_batch_async_missing_download(
+    local_site, sample_html_complete, tmp_path, capsys
+):
+    """Test the async engine reports failed downloads and pages without a link."""
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add(
+        "/crackme/2",
+        sample_html_complete.replace("btn-download", "x").replace("Test", "Other"),
+    )
+
+    results = crawler.scrape_batch_async(["1", "2"], str(tmp_path), jobs=2)
+
+    assert all(r.ok for r in results)
+    err = capsys.readouterr().err
+    assert "Error: Could not download file" in err
+    assert "Warning: Could not find download link." in err
+
+
+def test_main_async_engine(mocker):
+    """Test --engine async routes even a single ID through the async batch."""
+    mock_async = mocker.patch(
+        "crawler.scrape_batch_async",
+        return_value=[crawler.ScrapeResult("a", ok=True, directory="d")],
+    )
+    mocker.patch("sys.argv", ["crawler.py", "a", "--engine", "async"])
+
+    crawler.main()
+
+    assert list(mock_async.call_args[0][0]) == ["a"]
+
+
+# --- Tests for the HTTP cache ---
+def test_response_cache_store_lookup_and_reload(tmp_path):
+    """Test cached entries survive a reload from disk."""
+    cache = crawler.ResponseCache(str(tmp_path), ttl=60)
+    assert cache.lookup("http://x/1") is None
+    cache.store("http://x/1", b"<html/>", "text/html", '"v1"', "yesterday")
+
+    reloaded = crawler.ResponseCache(str(tmp_path), ttl=60)
+    entry = reloaded.lookup("http://x/1")
+    assert entry.body == b"<html/>"
+    assert entry.etag == '"v1"'
+    assert entry.last_modified == "yesterday"
+    assert reloaded.is_fresh(entry)
+    assert not crawler.ResponseCache(str(tmp_path), ttl=0).is_fresh(entry)
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    """Test the cache drops the least recently used entry when over its size cap."""
+    cache = crawler.ResponseCache(str(tmp_path), max_bytes=10)
+    cache.store("http://x/a", b"aaaa")
+    cache.store("http://x/b", b"bbbb")
+    cache.lookup("http://x/a")  # a is now more recent than b
+    cache.store("http://x/c", b"cccc")
+
+    assert cache.lookup("http://x/b") is None
+    assert cache.lookup("http://x/a").body == b"aaaa"
+    assert cache.lookup("http://x/c").body == b"cccc"
+    assert cache.total_bytes == 8
+
+
+def test_response_cache_drops_corrupt_entries(tmp_path):
+    """Test an unreadable entry is treated as a miss and removed."""
+    cache = crawler.ResponseCache(str(tmp_path))
+    cache.store("http://x/a", b"aaaa")
+    for path in tmp_path.glob("*.json"):
+        path.write_text("not json", encoding="utf-8")
+
+    assert cache.lookup("http://x/a") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_caching_session_revalidates(local_site, tmp_path):
+    """Test pages are cached, served while fresh and revalidated with 304s."""
+    calls = []
+
+    def page(handler):
+        calls.append(handler.headers.get("If-None-Match"))
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {}, b""
+        return 200, {"ETag": '"v1"', "Content-Type": "text/html"}, b"<h3>Hi</h3>"
+
+    local_site.add("/crackme/1", page)
+    url = f"{local_site.url}/crackme/1"
+    cache = crawler.ResponseCache(str(tmp_path), ttl=3600)
+    session = crawler.make_session(1, cache)
+
+    assert crawler.get_soup(url, session).h3.text == "Hi"
+    assert crawler.get_soup(url, session).h3.text == "Hi"
+    assert calls == [None]  # second hit was fresh, no request
+
+    cache.ttl = 0
+    assert crawler.get_soup(url, session).h3.text == "Hi"
+    assert calls == [None, '"v1"']
+
+
+def test_caching_session_cache_only(local_site, tmp_path, capsys):
+    """Test --cache-only serves cached pages and never touches the network."""
+    cache = crawler.ResponseCache(str(tmp_path), ttl=0)
+    cache.store(f"{local_site.url}/crackme/1", b"<h3>Cached</h3>", "text/html")
+    session = crawler.make_session(1, cache, cache_only=True)
+
+    assert crawler.get_soup(f"{local_site.url}/crackme/1", session).h3.text == "Cached"
+    assert crawler.get_soup(f"{local_site.url}/crackme/2", session) is None
+    assert (
+        crawler.download_file(f"{local_site.url}/a.zip", str(tmp_path), session) is None
+    )
+    assert local_site.requests == []
+    err = capsys.readouterr().err
+    assert "is not in the cache (--cache-only)" in err
+    assert "is not available offline (--cache-only)" in err
+
+
+def test_async_fetcher_uses_cache(local_site, sample_html_complete, tmp_path, capsys):
+    """Test the async engine stores, revalidates and serves pages from the cache."""
+    local_site.add(
+        "/crackme/1",
+        lambda h: (304, {}, b"")
+        if h.headers.get("If-None-Match")
+        else (200, {"ETag": '"e"'}, sample_html_complete.encode("utf-8")),
+    )
+    cache = crawler.ResponseCache(str(tmp_path / "cache"), ttl=0)
+    out = str(tmp_path / "out")
+
+    first = crawler.scrape_batch_async(["1"], out, cache=cache)
+    second = crawler.scrape_batch_async(["1"], out, cache=cache)
+    offline = crawler.scrape_batch_async(["1", "2"], out, cache=cache, cache_only=True)
+
+    assert first[0].ok and second[0].ok
+    assert [r.ok for r in offline] == [True, False]
+    page_requests = [h for _, p, h in local_site.requests if p == "/crackme/1"]
+    assert len(page_requests) == 2
+    assert page_requests[1]["If-None-Match"] == '"e"'
+    assert "offline (--cache-only)" in capsys.readouterr().err
+
+
+def test_main_with_cache(mocker, tmp_path):
+    """Test main builds a caching session when --cache is given."""
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch(
+        "sys.argv", ["crawler.py", "a", "--cache", str(tmp_path), "--cache-only"]
+    )
+
+    crawler.main()
+
+    session = mock_scrape.call_args[0][3]
+    adapter = session.get_adapter("https://crackmes.one")
+    assert isinstance(adapter, crawler._caching_adapter())
+    assert adapter.cache_only
+
+
+def test_main_cache_only_requires_cache(mocker, capsys):
+    """Test --cache-only without --cache is rejected."""
+    mocker.patch("sys.argv", ["crawler.py", "a", "--cache-only"])
+    with pytest.raises(SystemExit):
+        crawler.main()
+    assert "--cache-only requires --cache DIR" in capsys.readouterr().err
+
+
+# --- Tests for the listing crawler ---
+LISTING_IDS = [
+    "68db2563224c0ec5dcedc43f",
+    "6854cd2a2b84be7ea7743a41",
+    "685048992b84be7ea7743940",
+]
+
+
+def test_parse_listing(sample_listing_html, sample_html_provided_from_file):
+    """Test parse_listing finds the crackme links in page order."""
+    soup = bs4.BeautifulSoup(sample_listing_html, "html.parser")
+    assert crawler.parse_listing(soup) == LISTING_IDS
+    detail = bs4.BeautifulSoup(sample_html_provided_from_file, "html.parser")
+    assert crawler.parse_listing(detail) == []
+
+
+def test_iter_listing_ids_is_lazy(local_site, sample_listing_html):
+    """Test IDs are yielded as soon as a page is parsed, without reading ahead."""
+    local_site.add("/lasts/1", sample_listing_html)
+    local_site.add("/lasts/2", sample_listing_html.replace("68db", "99db"))
+
+    ids = crawler.iter_listing_ids(1, 5)
+    assert next(ids) == LISTING_IDS[0]
+    assert local_site.paths() == ["/lasts/1"]
+
+    rest = list(ids)
+    # Page 2 repeats two IDs already seen, page 3 is missing, page 4+ are empty
+    assert rest == LISTING_IDS[1:] + ["99db2563224c0ec5dcedc43f"]
+    assert local_site.paths()[:3] == ["/lasts/1", "/lasts/2", "/lasts/3"]
+
+
+def test_iter_listing_ids_stops_at_empty_page(local_site, sample_listing_html, capsys):
+    """Test an open-ended walk stops at the first page without entries."""
+    local_site.add("/lasts/1", sample_listing_html)
+    local_site.add("/lasts/2", "<html><body>No more</body></html>")
+
+    assert list(crawler.iter_listing_ids(1)) == LISTING_IDS
+    assert local_site.paths() == ["/lasts/1", "/lasts/2"]
+    assert "Listing page 2 is empty, stopping." in capsys.readouterr().out
+
+
+def test_iter_listing_ids_gives_up_on_failing_pages(local_site, capsys):
+    """Test an open-ended walk stops after a few unreadable pages in a row."""
+    errors = []
+    assert list(crawler.iter_listing_ids(4, None, errors=errors)) == []
+    assert local_site.paths() == ["/lasts/4", "/lasts/5", "/lasts/6"]
+    assert errors == ["Could not read listing pages 4..6."]
+    assert "Error: Could not read listing pages 4..6. Stopping." in (
+        capsys.readouterr().err
+    )
+
+
+def test_main_crawl_offline_without_cache_fails(tmp_path, capsys):
+    """Test an open-ended --cache-only crawl with an empty cache ends with an error."""
+    with pytest.raises(SystemExit) as excinfo:
+        crawler._dispatch(
+            ["crawl", "--pages", "1..", "--cache", str(tmp_path / "cache")]
+            + ["--cache-only", "-o", str(tmp_path / "out")]
+        )
+    assert excinfo.value.code == 1
+    assert capsys.readouterr().err.count("Skipping listing page") == (
+        crawler.LISTING_FAILURE_LIMIT - 1
+    )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("3", (3, 3)), ("1..5", (1, 5)), ("2..", (2, None)), (" 4..4 ", (4, 4))],
+)
+def test_parse_page_range(value, expected):
+    """Test parse_page_range accepts single pages, ranges and open ranges."""
+    assert crawler.parse_page_range(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "5..2", "a..b", "1-3"])
+def test_parse_page_range_invalid(value):
+    """Test parse_page_range rejects malformed ranges."""
+    with pytest.raises(crawler.argparse.ArgumentTypeError):
+        crawler.parse_page_range(value)
+
+
+def test_main_crawl(mocker):
+    """Test 'crawl' streams listing IDs into the batch scraper."""
+    mock_iter = mocker.patch("crawler.iter_listing_ids", return_value=iter(["a"]))
+    mock_batch = mocker.patch(
+        "crawler.scrape_batch",
+        return_value=[crawler.ScrapeResult("a", ok=True, directory="d")],
+    )
+    mocker.patch("sys.argv", ["crawler.py", "crawl", "--pages", "2..4", "-o", "out"])
+
+    crawler.main()
+
+    assert mock_iter.call_args[0][:2] == (2, 4)
+    assert mock_batch.call_args[0][0] is mock_iter.return_value
+    assert mock_batch.call_args[0][1] == "out"
+
+
+def test_crawl_async_engine_end_to_end(
+    local_site, sample_listing_html, sample_html_complete, tmp_path, mocker
+):
+    """Test a crawl on the async engine scrapes every listed crackme."""
+    local_site.add("/lasts/1", sample_listing_html)
+    for crackme_id in LISTING_IDS:
+        local_site.add(
+            f"/crackme/{crackme_id}",
+            sample_html_complete.replace("Test Crackme", crackme_id),
+        )
+    mocker.patch(
+        "sys.argv",
+        ["crawler.py", "crawl", "--engine", "async", "-o", str(tmp_path)],
+    )
+
+    crawler.main()  # Downloads 404, which is reported but not a failure
+
+    for crackme_id in LISTING_IDS:
+        assert (tmp_path / f"testuser_{crackme_id}" / "README.md").exists()
+
+
+# --- Tests for incremental sync ---
+def test_sync_state_load_merges_state_file_and_archives(tmp_path, capsys):
+    """Test SyncState knows IDs from the state file and from downloaded archives."""
+    crackme_dir = tmp_path / "mirunaf_Very_easy"
+    crackme_dir.mkdir()
+    (crackme_dir / "685048992b84be7ea7743940.zip").write_bytes(b"")
+    (crackme_dir / "README.md").write_text("# Very easy", encoding="utf-8")
+    (tmp_path / "stray.txt").write_text("", encoding="utf-8")
+    state = crawler.SyncState(str(tmp_path / crawler.SYNC_STATE_FILE), ["aaa"])
+    state.save()
+
+    loaded = crawler.SyncState.load(str(tmp_path))
+    assert loaded.known_ids == {"aaa", "685048992b84be7ea7743940"}
+
+    (tmp_path / crawler.SYNC_STATE_FILE).write_text("{broken", encoding="utf-8")
+    assert crawler.SyncState.load(str(tmp_path)).known_ids == {
+        "685048992b84be7ea7743940"
+    }
+    assert "Ignoring unreadable state file" in capsys.readouterr().err
+    assert crawler.SyncState.load(str(tmp_path / "missing")).known_ids == set()
+
+
+def test_iter_new_ids_stops_after_run_of_known():
+    """Test iter_new_ids skips known IDs and stops consuming after a known run."""
+    consumed = []
+
+    def source():
+        for crackme_id in ["n1", "k1", "n2", "k2", "k3", "n3", "n4"]:
+            consumed.append(crackme_id)
+            yield crackme_id
+
+    new_ids = crawler.iter_new_ids(source(), {"k1", "k2", "k3"}, stop_after=2)
+    assert list(new_ids) == ["n1", "n2"]
+    assert consumed == ["n1", "k1", "n2", "k2", "k3"]
+
+
+def test_main_sync_records_new_ids(mocker, local_site, sample_listing_html, tmp_path):
+    """Test 'sync' scrapes only unknown crackmes and remembers the successful ones."""
+    local_site.add("/lasts/1", sample_listing_html)
+    local_site.add("/lasts/2", sample_listing_html)
+    crawler.SyncState(
+        str(tmp_path / crawler.SYNC_STATE_FILE), [LISTING_IDS[1], LISTING_IDS[2]]
+    ).save()
+    mock_batch = mocker.patch(
+        "crawler.scrape_batch",
+        side_effect=lambda ids, *args: [
+            crawler.ScrapeResult(i, ok=True, directory="d") for i in ids
+        ],
+    )
+    mocker.patch(
+        "sys.argv",
+        ["crawler.py", "sync", "-o", str(tmp_path), "--stop-after", "2"],
+    )
+
+    crawler.main()
+
+    mock_batch.assert_called_once()
+    assert local_site.paths() == ["/lasts/1"]  # Known run ended paging early
+    assert crawler.SyncState.load(str(tmp_path)).known_ids == set(LISTING_IDS)
+
+
+# --- Tests for resumable downloads ---
+ARCHIVE = bytes(range(256)) * 64
+
+
+def ranged(body):
+    """Build a LocalSite handler honouring 'Range: bytes=N-' requests."""
+
+    def handler(request):
+        match = request.headers.get("Range")
+        if match:
+            start = int(match.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                return 416, {}, b""
+            content_range = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            return 206, {"Content-Range": content_range}, body[start:]
+        return 200, {}, body
+
+    return handler
+
+
+def test_download_file_resumes_part_file(local_site, tmp_path):
+    """Test a left-over .part file is resumed with a Range request and renamed."""
+    local_site.add("/static/crackme/abc.zip", ranged(ARCHIVE))
+    (tmp_path / "abc.zip.part").write_bytes(ARCHIVE[:1000])
+
+    path = crawler.download_file(
+        f"{local_site.url}/static/crackme/abc.zip", str(tmp_path), chunk_size=512
+    )
+
+    assert path == str(tmp_path / "abc.zip")
+    assert (tmp_path / "abc.zip").read_bytes() == ARCHIVE
+    assert not (tmp_path / "abc.zip.part").exists()
+    assert local_site.requests[0][2]["Range"] == "bytes=1000-"
+
+
+def test_download_file_restarts_when_range_ignored(local_site, tmp_path, capsys):
+    """Test the download starts over if the server answers a Range with a 200."""
+    local_site.add("/abc.zip", ARCHIVE)
+    (tmp_path / "abc.zip.part").write_bytes(b"stale")
+
+    crawler.download_file(f"{local_site.url}/abc.zip", str(tmp_path))
+
+    assert (tmp_path / "abc.zip").read_bytes() == ARCHIVE
+    assert "Server ignored the range request" in capsys.readouterr().out
+
+
+def test_download_file_discards_oversized_part(local_site, tmp_path):
+    """Test a .part file larger than the remote file is dropped on a 416."""
+    local_site.add("/abc.zip", ranged(ARCHIVE[:10]))
+    (tmp_path / "abc.zip.part").write_bytes(ARCHIVE[:20])
+
+    crawler.download_file(f"{local_site.url}/abc.zip", str(tmp_path))
+
+    assert (tmp_path / "abc.zip").read_bytes() == ARCHIVE[:10]
+    assert [h.get("Range") for _, _, h in local_site.requests] == ["bytes=20-", None]
+
+
+def test_download_file_resumes_after_dropped_connection(mocker, tmp_path, capsys):
+    """Test a transfer that drops mid-stream resumes from the received bytes."""
+
+    def dropped(chunk_size):
+        yield ARCHIVE[:100]
+        raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+    first = mocker.MagicMock(status_code=200, headers={})
+    first.iter_content.side_effect = dropped
+    second = mocker.MagicMock(
+        status_code=206, headers={"Content-Range": f"bytes 100-{len(ARCHIVE) - 1}/*"}
+    )
+    second.iter_content.return_value = [ARCHIVE[100:]]
+    session = mocker.MagicMock()
+    session.get.side_effect = [first, second]
+
+    path = crawler.download_file("http://x/abc.zip", str(tmp_path), session)
+
+    assert pathlib.Path(path).read_bytes() == ARCHIVE
+    assert session.get.call_args_list[1][1]["headers"]["Range"] == "bytes=100-"
+    assert "interrupted after 100 bytes" in capsys.readouterr().err
+
+
+def test_download_file_gives_up_after_retries(mocker, tmp_path, capsys):
+    """Test the number of resume attempts is bounded."""
+
+    def dropped(chunk_size):
+        yield b"x"
+        raise requests.exceptions.ConnectionError("reset")
+
+    def get(url, stream, headers, timeout):
+        start = headers.get("Range", "bytes=0-")[len("bytes=") : -1]
+        response = mocker.MagicMock(
+            status_code=206, headers={"Content-Range": f"bytes {start}-99/100"}
+        )
+        response.iter_content.side_effect = dropped
+        return response
+
+    session = mocker.MagicMock()
+    session.get.side_effect = get
+
+    assert (
+        crawler.download_file("http://x/a.zip", str(tmp_path), session, retries=2)
+        is None
+    )
+    assert session.get.call_count == 3
+    assert (tmp_path / "a.zip.part").exists()  # Kept for the next run to resume
+    assert "Error: Could not download file" in capsys.readouterr().err
+
+
+def test_chunk_size_for():
+    """Test explicit chunk sizes win and big archives get bigger buffers."""
+    assert crawler._chunk_size_for("10", 4096) == 4096
+    assert crawler._chunk_size_for(None, None) == crawler.DEFAULT_CHUNK_SIZE
+    big = str(crawler.LARGE_DOWNLOAD_THRESHOLD)
+    assert crawler._chunk_size_for(big, None) == crawler.LARGE_DOWNLOAD_CHUNK_SIZE
+
+
+def test_async_download_resumes_part_file(local_site, tmp_path):
+    """Test the async engine resumes .part files the same way."""
+    local_site.add("/abc.zip", ranged(ARCHIVE))
+    local_site.add("/small.zip", ranged(ARCHIVE[:10]))
+    (tmp_path / "abc.zip.part").write_bytes(ARCHIVE[:1000])
+    (tmp_path / "small.zip.part").write_bytes(ARCHIVE[:20])
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            fetcher = crawler.AsyncFetcher(session)
+            return [
+                await fetcher.download(f"{local_site.url}/{name}", str(tmp_path))
+                for name in ("abc.zip", "small.zip", "missing.zip")
+            ]
+
+    paths = asyncio.run(run())
+
+    assert paths == [str(tmp_path / "abc.zip"), str(tmp_path / "small.zip"), None]
+    assert (tmp_path / "abc.zip").read_bytes() == ARCHIVE
+    assert (tmp_path / "small.zip").read_bytes() == ARCHIVE[:10]
+    assert not list(tmp_path.glob("*.part"))
+
+
+# --- Tests for the content-addressed store ---
+def test_download_file_deduplicates_through_store(local_site, tmp_path, capsys):
+    """Test archives land in the store once and repeat fetches skip the network."""
+    local_site.add("/static/crackme/abc.zip", ARCHIVE)
+    url = f"{local_site.url}/static/crackme/abc.zip"
+    store = crawler.BlobStore(str(tmp_path / "store"))
+    first_dir, second_dir = tmp_path / "lab1", tmp_path / "lab2"
+    first_dir.mkdir()
+    second_dir.mkdir()
+
+    crawler.download_file(url, str(first_dir), store=store)
+    # A fresh store instance (e.g. next week's run) reads the persisted index
+    crawler.download_file(url, str(second_dir), store=crawler.BlobStore(store.root))
+
+    digest = crawler.hashlib.sha256(ARCHIVE).hexdigest()
+    blob = pathlib.Path(store.blob_path(digest))
+    assert blob.read_bytes() == ARCHIVE
+    assert os.listdir(blob.parent) == [blob.name]  # No temporary copy left behind
+    assert blob.stat().st_mode & 0o777 == 0o444
+    assert (first_dir / "abc.zip").stat().st_ino == blob.stat().st_ino
+    assert (second_dir / "abc.zip").stat().st_ino == blob.stat().st_ino
+    assert local_site.paths() == ["/static/crackme/abc.zip"]
+    assert f"Reusing stored copy of abc.zip ({digest[:12]})" in capsys.readouterr().out
+
+
+def test_download_file_hashes_resumed_part(local_site, tmp_path):
+    """Test the digest covers bytes from a resumed .part file as well."""
+    local_site.add("/abc.zip", ranged(ARCHIVE))
+    (tmp_path / "abc.zip.part").write_bytes(ARCHIVE[:1000])
+    store = crawler.BlobStore(str(tmp_path / "store"))
+
+    crawler.download_file(f"{local_site.url}/abc.zip", str(tmp_path), store=store)
+
+    digest = crawler.hashlib.sha256(ARCHIVE).hexdigest()
+    assert store.lookup(f"{local_site.url}/abc.zip") == digest
+
+
+def test_blob_store_missing_blob_and_bad_index(tmp_path, capsys):
+    """Test lookups ignore deleted blobs and a corrupt index is tolerated."""
+    (tmp_path / "index.json").write_text("{", encoding="utf-8")
+    store = crawler.BlobStore(str(tmp_path))
+    assert "Ignoring unreadable store index" in capsys.readouterr().err
+
+    archive = tmp_path / "a.zip"
+    archive.write_bytes(b"data")
+    store.add("http://x/a.zip", str(archive), "ab" * 32)
+    assert store.lookup("http://x/a.zip") == "ab" * 32
+
+    os.chmod(store.blob_path("ab" * 32), 0o644)
+    os.remove(store.blob_path("ab" * 32))
+    assert store.lookup("http://x/a.zip") is None
+
+
+def test_link_or_copy_falls_back_to_copy(mocker, tmp_path):
+    """Test files are copied when neither hardlinks nor reflinks are possible."""
+    src = tmp_path / "src"
+    src.write_bytes(b"data")
+    dst = tmp_path / "dst"
+    dst.write_bytes(b"old")
+    mocker.patch("os.link", side_effect=OSError("cross-device link"))
+    mocker.patch("fcntl.ioctl", side_effect=OSError("not supported"))
+
+    crawler._link_or_copy(str(src), str(dst))
+
+    assert dst.read_bytes() == b"data"
+    assert dst.stat().st_ino != src.stat().st_ino
+
+
+def test_async_download_uses_store(local_site, tmp_path):
+    """Test the async engine shares the store with the threaded engine."""
+    local_site.add("/abc.zip", ARCHIVE)
+    url = f"{local_site.url}/abc.zip"
+    store = crawler.BlobStore(str(tmp_path / "store"))
+    crawler.download_file(url, str(tmp_path), store=store)
+    os.remove(tmp_path / "abc.zip")
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            fetcher = crawler.AsyncFetcher(session, cache_only=True)
+            return await fetcher.download(url, str(tmp_path), store=store)
+
+    assert asyncio.run(run()) == str(tmp_path / "abc.zip")
+    assert (tmp_path / "abc.zip").read_bytes() == ARCHIVE
+    assert local_site.paths() == ["/abc.zip"]
+
+
+def test_async_download_adds_to_store(local_site, tmp_path):
+    """Test archives fetched by the async engine are hashed into the store."""
+    local_site.add("/abc.zip", ARCHIVE)
+    store = crawler.BlobStore(str(tmp_path / "store"))
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            fetcher = crawler.AsyncFetcher(session)
+            await fetcher.download(
+                f"{local_site.url}/abc.zip", str(tmp_path), store=store
+            )
+
+    asyncio.run(run())
+
+    digest = crawler.hashlib.sha256(ARCHIVE).hexdigest()
+    assert store.lookup(f"{local_site.url}/abc.zip") == digest
+
+
+def test_main_store_option(mocker, tmp_path):
+    """Test --store is passed on to the scrape as a BlobStore."""
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch("sys.argv", ["crawler.py", "a", "--store", str(tmp_path)])
+
+    crawler.main()
+
+    options = mock_scrape.call_args[0][4]
+    assert options.store.root == str(tmp_path)
+
+
+# --- Tests for single-pass extraction ---
+def test_extract_crackme_provided_page(sample_html_provided_from_file):
+    """Test extract_crackme reads every field from the real page in one pass."""
+    info = crawler.extract_crackme(sample_html_provided_from_file)
+
+    assert info.author == "mirunaf"
+    assert info.title == "Very easy"
+    assert info.details == {
+        "Author": "mirunaf",
+        "Language": "C/C++",
+        "Upload": "4:38 PM 06/16/2025",
+        "Platform": "Multiplatform",
+        "Difficulty": "1.3",
+        "Quality": "3.8",
+        "Arch": "x86-64",
+    }
+    assert info.description.startswith("So, it's very easy.")
+    assert info.download_url == (
+        "https://crackmes.one/static/crackme/685048992b84be7ea7743940.zip"
+    )
+
+
+def test_crackme_strainer_skips_page_chrome(sample_html_provided_from_file):
+    """Test the strainer never builds the navbar, sidebar, scripts or footer."""
+    soup = bs4.BeautifulSoup(
+        sample_html_provided_from_file,
+        crawler.HTML_PARSER,
+        parse_only=crawler._crackme_strainer()(),
+    )
+    assert soup.find("header") is None
+    assert soup.find("script") is None
+    assert soup.find("form") is None
+    assert soup.find("a", href="/search") is None
+    assert soup.find("div", class_="panel-background") is not None
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_extract_crackme_parser_backends(
+    mocker, parser, sample_html_provided_from_file
+):
+    """Test both parser backends extract the same metadata."""
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+    mocker.patch("crawler.HTML_PARSER", parser)
+    info = crawler.extract_crackme(sample_html_provided_from_file)
+    assert info.title == "Very easy"
+    assert len(info.details) == 7
+
+
+# --- Tests for password probing ---
+def write_zip(path, files, password=None):
+    path.write_bytes(make_zip(files, password=password))
+    return str(path)
+
+
+def test_find_zip_password_detects_default(tmp_path):
+    """Test the site's default password is found without extracting."""
+    zip_path = write_zip(tmp_path / "c.zip", {"crackme.exe": b"MZ"}, "crackmes.de")
+
+    assert crawler.find_zip_password(zip_path, ["nope", "crackmes.de"]) == (
+        True,
+        "crackmes.de",
+    )
+    assert os.listdir(tmp_path) == ["c.zip"]
+
+
+def test_find_zip_password_plain_archive(tmp_path):
+    """Test an unencrypted archive needs no password."""
+    zip_path = write_zip(tmp_path / "c.zip", {"crackme.exe": b"MZ"})
+    assert crawler.find_zip_password(zip_path, ["crackmes.one"]) == (True, None)
+
+
+def test_find_zip_password_no_match(tmp_path):
+    """Test (False, None) is returned when no candidate fits."""
+    zip_path = write_zip(
+        tmp_path / "c.zip",
+        {"crackme.exe": b"MZ" * 1000},
+        "hunter2",
+    )
+    assert crawler.find_zip_password(zip_path, ["a", "b", "c"]) == (False, None)
+
+
+def test_find_zip_password_reads_smallest_member(mocker, tmp_path):
+    """Test only the smallest encrypted member is test-read."""
+    zip_path = write_zip(
+        tmp_path / "c.zip",
+        {"big.bin": os.urandom(100_000), "small.txt": b"hi"},
+        "crackmes.one",
+    )
+    open_spy = mocker.spy(zipfile.ZipFile, "open")
+
+    crawler.find_zip_password(zip_path, ["wrong", "crackmes.one"])
+
+    assert {call.args[1].filename for call in open_spy.call_args_list} == {"small.txt"}
+
+
+def test_find_zip_password_skips_empty_members(mocker, tmp_path):
+    """Test empty members, whose CRC can't rule out a password, aren't test-read."""
+    zip_path = write_zip(
+        tmp_path / "c.zip",
+        {"empty.txt": b"", "crackme.exe": b"MZ" * 100},
+        "crackmes.one",
+    )
+    open_spy = mocker.spy(zipfile.ZipFile, "open")
+
+    assert crawler.find_zip_password(zip_path, ["crackmes.one"]) == (
+        True,
+        "crackmes.one",
+    )
+    assert {call.args[1].filename for call in open_spy.call_args_list} == {
+        "crackme.exe"
+    }
+
+
+def test_unzip_with_fallbacks_extracts_once(mocker, tmp_path):
+    """Test a wordlist password is detected and a single extraction runs."""
+    zip_path = write_zip(
+        tmp_path / "c.zip",
+        {"crackme.exe": b"MZ", "notes.txt": b"read me"},
+        "s3cret",
+    )
+    unzip_spy = mocker.spy(crawler, "unzip_file")
+
+    ok, password = crawler.unzip_with_fallbacks(
+        zip_path, password="wrong", wordlist=["s3cret"]
+    )
+
+    assert (ok, password) == (True, "s3cret")
+    unzip_spy.assert_called_once_with(zip_path, password="s3cret", limits=None)
+    assert (tmp_path / "crackme" / "notes.txt").read_bytes() == b"read me"
+
+
+def test_unzip_with_fallbacks_plain_archive(mocker, tmp_path):
+    """Test unencrypted archives are extracted once without a password."""
+    zip_path = write_zip(tmp_path / "c.zip", {"crackme.exe": b"MZ"})
+    unzip_spy = mocker.spy(crawler, "unzip_file")
+
+    assert crawler.unzip_with_fallbacks(zip_path, "unused") == (True, None)
+    unzip_spy.assert_called_once_with(zip_path, limits=None)
+
+
+def test_unzip_with_fallbacks_no_candidate_matches(mocker, tmp_path, capsys):
+    """Test nothing is extracted when no candidate unlocks the archive."""
+    zip_path = write_zip(tmp_path / "c.zip", {"crackme.exe": b"MZ"}, "hunter2")
+    unzip_spy = mocker.spy(crawler, "unzip_file")
+
+    assert crawler.unzip_with_fallbacks(zip_path, wordlist=["x"]) == (False, None)
+    unzip_spy.assert_not_called()
+    assert "None of 3 candidate passwords" in capsys.readouterr().err
+
+
+def test_read_wordlist():
+    """Test wordlist files keep whitespace inside passwords but skip blank lines."""
+    stream = io.StringIO("crackmes.one\n\n pass word \r\n")
+    assert list(crawler.read_wordlist(stream)) == ["crackmes.one", " pass word "]
+
+
+def test_main_wordlist_option(mocker, tmp_path):
+    """Test -w loads the wordlist into the scrape options."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("alpha\nbeta\n")
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch("sys.argv", ["crawler.py", "a", "-w", str(wordlist)])
+
+    crawler.main()
+
+    assert mock_scrape.call_args[0][4].wordlist == ("alpha", "beta")
+
+
+def test_print_summary_shows_password(capsys):
+    """Test the summary reports the password that unlocked each archive."""
+    crawler.print_summary(
+        [crawler.ScrapeResult("a", True, "out/a", password="crackmes.one")]
+    )
+    assert "OK      a -> out/a (password: crackmes.one)" in capsys.readouterr().out
+
+
+# --- Tests for bounded extraction ---
+def test_unzip_file_depth_limit(tmp_path, capsys):
+    """Test zips nested past max_depth are kept as files instead of unpacked."""
+    level3 = make_zip({"flag.txt": b"flag"})
+    level2 = make_zip({"level3.zip": level3})
+    zip_path = tmp_path / "level1.zip"
+    zip_path.write_bytes(make_zip({"level2.zip": level2}))
+
+    limits = crawler.ExtractLimits(max_depth=2)
+    assert crawler.unzip_file(str(zip_path), limits=limits)
+
+    level2_dir = tmp_path / "crackme" / "level2"
+    assert (level2_dir / "level3.zip").read_bytes() == level3
+    assert "nested deeper than 2 levels" in capsys.readouterr().err
+
+
+def test_unzip_keeps_corrupt_nested_zip(tmp_path, capsys):
+    """Test a corrupt nested zip is kept as a file and the rest still extracts."""
+    zip_path = tmp_path / "a.zip"
+    docs = b"PK\x03\x04 not really a zip"
+    zip_path.write_bytes(
+        make_zip({"crackme.exe": b"MZ", "docs.zip": docs}, "crackmes.one")
+    )
+
+    assert crawler.unzip_with_fallbacks(str(zip_path)) == (True, "crackmes.one")
+    assert (tmp_path / "crackme" / "crackme.exe").read_bytes() == b"MZ"
+    assert (tmp_path / "crackme" / "docs.zip").read_bytes() == docs
+    assert "Could not unpack nested zip docs.zip" in capsys.readouterr().err
+
+
+def test_unzip_keeps_nested_zip_with_other_password(tmp_path, capsys):
+    """Test a nested zip under a different password is kept for the user to open."""
+    inner = make_zip({"flag.txt": b"flag"}, "other")
+    zip_path = tmp_path / "a.zip"
+    zip_path.write_bytes(
+        make_zip({"crackme.exe": b"MZ", "inner.zip": inner}, "crackmes.one")
+    )
+
+    assert crawler.unzip_with_fallbacks(str(zip_path)) == (True, "crackmes.one")
+    assert (tmp_path / "crackme" / "crackme.exe").read_bytes() == b"MZ"
+    assert (tmp_path / "crackme" / "inner.zip").read_bytes() == inner
+    assert "Bad password for file 'flag.txt'" in capsys.readouterr().err
+
+
+def test_unzip_file_total_size_limit(tmp_path, capsys):
+    """Test extraction stops once the archive tree unpacks past max_bytes."""
+    inner = make_zip({"b.bin": os.urandom(3000)})
+    zip_path = tmp_path / "c.zip"
+    zip_path.write_bytes(make_zip({"a.bin": os.urandom(3000), "inner.zip": inner}))
+
+    limits = crawler.ExtractLimits(max_bytes=5000)
+    assert not crawler.unzip_file(str(zip_path), limits=limits)
+    assert "more than 5000 bytes uncompressed" in capsys.readouterr().err
+
+
+def test_unzip_file_ratio_limit(mocker, tmp_path, capsys):
+    """Test members that expand suspiciously well are rejected while streaming."""
+    mocker.patch("crawler.ZIP_RATIO_CHECK_THRESHOLD", 1024)
+    zip_path = tmp_path / "bomb.zip"
+    zip_path.write_bytes(
+        make_zip({"zeros.bin": bytes(1024 * 1024)}, compression=zipfile.ZIP_DEFLATED)
+    )
+
+    limits = crawler.ExtractLimits(max_ratio=50)
+    assert not crawler.unzip_file(str(zip_path), limits=limits)
+    assert "zeros.bin expands more than 50x" in capsys.readouterr().err
+    assert (tmp_path / "crackme" / "zeros.bin").stat().st_size < 1024 * 1024
+
+
+def test_unzip_file_ignores_unsafe_member_paths(tmp_path):
+    """Test absolute and parent-relative member names stay inside the folder."""
+    zip_path = tmp_path / "c.zip"
+    zip_path.write_bytes(make_zip({"../escape.txt": b"x", "/abs/file.txt": b"y"}))
+
+    assert crawler.unzip_file(str(zip_path), extract_dir=str(tmp_path / "out"))
+
+    assert (tmp_path / "out" / "crackme" / "escape.txt").read_bytes() == b"x"
+    assert (tmp_path / "out" / "crackme" / "abs" / "file.txt").read_bytes() == b"y"
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_main_extract_limits(mocker):
+    """Test the extraction limit options reach the scrape options."""
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch(
+        "sys.argv",
+        [
+            "crawler.py",
+            "a",
+            "--max-zip-depth",
+            "3",
+            "--max-extract-size",
+            "10",
+            "--max-zip-ratio",
+            "20",
+        ],
+    )
+
+    crawler.main()
+
+    limits = mock_scrape.call_args[0][4].limits
+    assert limits == crawler.ExtractLimits(3, 10 * 1024 * 1024, 20.0)
+
+
+# --- Tests for rate limiting and retries ---
+def flaky(*responses):
+    """Route handler that replays (status, headers, body) tuples, then repeats the last."""
+    remaining = list(responses)
+
+    def handler(request):
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+    return handler
+
+
+def test_rate_limiter_spaces_requests(mocker):
+    """Test tokens beyond the burst are handed out at the configured rate."""
+    mocker.patch("crawler.time.monotonic", return_value=100.0)
+    limiter = crawler.RateLimiter(rate=10, burst=2)
+
+    delays = [limiter.reserve() for _ in range(4)]
+
+    assert delays == pytest.approx([0.0, 0.0, 0.1, 0.2])
+
+
+def test_rate_limiter_backs_off_and_recovers(mocker, capsys):
+    """Test throttling halves the rate and pauses, and successes restore it."""
+    clock = mocker.patch("crawler.time.monotonic", return_value=100.0)
+    limiter = crawler.RateLimiter(rate=4)
+
+    limiter.throttled(5.0)
+
+    assert limiter.rate == 2
+    assert limiter.reserve() == pytest.approx(5.0)
+    assert "slowing down to 2 requests/s" in capsys.readouterr().err
+    clock.return_value = 200.0
+    for _ in range(crawler.RATE_RECOVERY_STEPS):
+        limiter.succeeded()
+    assert limiter.rate == 4
+    assert limiter.reserve() == 0.0
+
+
+def test_rate_limiter_unlimited_still_pauses():
+    """Test a zero rate never waits except for a server-requested pause."""
+    limiter = crawler.RateLimiter(rate=0)
+    assert [limiter.reserve() for _ in range(100)] == [0.0] * 100
+    limiter.throttled(2.0)
+    assert limiter.rate == 0
+    assert 1.5 < limiter.reserve() <= 2.0
+
+
+def test_retry_after_delay():
+    """Test Retry-After is read as seconds or an HTTP date, and capped."""
+    assert crawler.retry_after_delay(None) is None
+    assert crawler.retry_after_delay("7") == 7.0
+    assert crawler.retry_after_delay("999999") == crawler.MAX_RETRY_AFTER
+    assert crawler.retry_after_delay("soon") is None
+    in_ten = email.utils.formatdate(crawler.time.time() + 10, usegmt=True)
+    assert 8 < crawler.retry_after_delay(in_ten) <= 10
+    past = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert crawler.retry_after_delay(past) == 0.0
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    """Test backoff doubles per attempt, stays in the upper half, and is capped."""
+    for attempt in range(3):
+        full = crawler.RETRY_BACKOFF_BASE * 2**attempt
+        assert full / 2 <= crawler.backoff_delay(attempt) <= full
+    assert crawler.backoff_delay(50) <= crawler.RETRY_BACKOFF_MAX
+
+
+def test_session_retries_throttled_pages(local_site, capsys):
+    """Test 429/503 responses are retried after Retry-After and slow the limiter."""
+    local_site.routes["/page"] = (
+        200,
+        {},
+        flaky(
+            (429, {"Retry-After": "0"}, b""),
+            (503, {"Retry-After": "0"}, b""),
+            (200, {}, b"finally"),
+        ),
+    )
+    limiter = crawler.RateLimiter(rate=100)
+    session = crawler.make_session(1, limiter=limiter)
+
+    assert crawler.fetch_html(f"{local_site.url}/page", session) == "finally"
+
+    assert local_site.paths() == ["/page"] * 3
+    assert limiter.rate == pytest.approx(25 + 100 / crawler.RATE_RECOVERY_STEPS)
+    err = capsys.readouterr().err
+    assert "failed (HTTP 429), retrying in 0.0s (attempt 1/4)" in err
+    assert "failed (HTTP 503), retrying in 0.0s (attempt 2/4)" in err
+
+
+def test_session_gives_up_after_retries(mocker, local_site, capsys):
+    """Test persistent server errors fail once the retries are used up."""
+    mocker.patch("crawler.backoff_delay", return_value=0.0)
+    local_site.add("/page", "down", status=500)
+    session = crawler.make_session(1, retries=2)
+
+    assert crawler.fetch_html(f"{local_site.url}/page", session) is None
+
+    assert local_site.paths() == ["/page"] * 3
+    assert "500 Server Error" in capsys.readouterr().err
+
+
+def test_session_retries_connection_errors_with_timeout(mocker):
+    """Test dropped connections are retried and every attempt gets a timeout."""
+    mocker.patch("crawler.time.sleep")
+    ok = requests.Response()
+    ok.status_code = 200
+    send = mocker.patch.object(
+        requests.adapters.HTTPAdapter,
+        "send",
+        side_effect=[requests.exceptions.ConnectionError("reset"), ok],
+    )
+    session = crawler.make_session(1)
+
+    assert session.get("http://example.invalid/") is ok
+    assert send.call_count == 2
+    assert send.call_args.kwargs["timeout"] == crawler.DEFAULT_TIMEOUT
+
+
+def test_make_session_caps_connections_per_host():
+    """Test --max-per-host turns into a blocking connection pool."""
+    limiter = crawler.RateLimiter(max_per_host=2)
+    adapter = crawler.make_session(8, limiter=limiter).get_adapter(crawler.BASE_URL)
+    assert adapter._pool_maxsize == 2
+    assert adapter._pool_block is True
+    assert adapter.limiter is limiter
+
+
+def test_async_fetcher_retries_throttled_responses(local_site, tmp_path):
+    """Test the async engine retries 429s and shares the limiter feedback."""
+    local_site.routes["/page"] = (
+        200,
+        {},
+        flaky((429, {"Retry-After": "0"}, b""), (200, {}, b"page")),
+    )
+    local_site.routes["/a.zip"] = (
+        200,
+        {},
+        flaky((503, {"Retry-After": "0"}, b""), (200, {}, ARCHIVE)),
+    )
+    limiter = crawler.RateLimiter(rate=100)
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            fetcher = crawler.AsyncFetcher(session, limiter=limiter, retries=1)
+            text = await fetcher.fetch_text(f"{local_site.url}/page")
+            path = await fetcher.download(f"{local_site.url}/a.zip", str(tmp_path))
+            return text, path
+
+    text, path = asyncio.run(run())
+
+    assert text == "page"
+    assert pathlib.Path(path).read_bytes() == ARCHIVE
+    assert local_site.paths() == ["/page", "/page", "/a.zip", "/a.zip"]
+    assert limiter.rate < 100
+
+
+def test_async_fetcher_gives_up_on_connection_errors(mocker, capsys):
+    """Test unreachable hosts fail after the configured retries."""
+    mocker.patch("crawler.backoff_delay", return_value=0.0)
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            fetcher = crawler.AsyncFetcher(session, retries=1)
+            return await fetcher.fetch_text("http://127.0.0.1:9/")
+
+    assert asyncio.run(run()) is None
+    err = capsys.readouterr().err
+    assert "retrying in 0.0s (attempt 1/1)" in err
+    assert "Error: Could not fetch URL" in err
+
+
+def test_main_rate_options(mocker):
+    """Test --rate, --max-per-host and --retries configure the shared session."""
+    mock_batch = mocker.patch("crawler.scrape_batch_async", return_value=[])
+    mocker.patch(
+        "sys.argv",
+        [
+            "crawler.py",
+            "a",
+            "b",
+            "--engine",
+            "async",
+            "--rate",
+            "2.5",
+            "--max-per-host",
+            "3",
+            "--retries",
+            "7",
+        ],
+    )
+
+    crawler.main()
+
+    limiter, retries = mock_batch.call_args[0][7:9]
+    assert (limiter.rate, limiter.max_per_host, retries) == (2.5, 3, 7)
+
+
+# --- Tests for the catalog ---
+def catalog_info(title, **details):
+    """Build a CrackmeInfo with the detail fields crackme pages show."""
+    fields = {
+        "Author": "alice",
+        "Language": "C/C++",
+        "Upload": "4:38 PM 06/16/2025",
+        "Platform": "Unix/linux etc.",
+        "Difficulty": "2.0",
+        "Quality": "4.0",
+        "Arch": "x86-64",
+    }
+    fields.update(details)
+    return crawler.CrackmeInfo(title, fields["Author"], fields, f"About {title}")
+
+
+@pytest.fixture
+def filled_catalog(tmp_path):
+    """A catalog holding three crackmes with different details."""
+    catalog = crawler.Catalog(str(tmp_path / "catalog.sqlite"))
+    for crackme_id, info in [
+        ("a1", catalog_info("Easy one", Difficulty="1.0")),
+        ("b2", catalog_info("Hard one", Difficulty="4.5", Author="bob")),
+        ("c3", catalog_info("Win", Platform="Windows", Language=".NET")),
+    ]:
+        result = crawler.ScrapeResult(crackme_id, True, f"out/{crackme_id}")
+        catalog.upsert(crackme_id, info, result)
+    yield catalog
+    catalog.close()
+
+
+def test_catalog_created_on_first_write(tmp_path):
+    """Test a catalog that is never written to leaves no file behind."""
+    catalog = crawler.Catalog(str(tmp_path / "sub" / "catalog.sqlite"))
+    assert catalog.query() == []
+    assert not (tmp_path / "sub").exists()
+
+
+def test_catalog_upsert_and_query(filled_catalog):
+    """Test rows come back hardest first with parsed detail columns."""
+    rows = filled_catalog.query()
+
+    assert [row["id"] for row in rows] == ["b2", "c3", "a1"]
+    row = rows[0]
+    assert (row["author"], row["title"], row["difficulty"]) == ("bob", "Hard one", 4.5)
+    assert row["uploaded_at"] == "2025-06-16T16:38:00"
+    assert crawler.json.loads(row["details"])["Arch"] == "x86-64"
+    assert row["directory"] == os.path.abspath("out/b2")
+
+
+def test_catalog_filters(filled_catalog):
+    """Test text filters are case-insensitive, with * as a wildcard."""
+
+    def ids(**kwargs):
+        return [row["id"] for row in filled_catalog.query(**kwargs)]
+
+    assert ids(filters={"language": "c/c++"}) == ["b2", "a1"]
+    assert ids(filters={"platform": "*LINUX*"}, min_difficulty=2) == ["b2"]
+    assert ids(max_difficulty=2.0, min_quality=4) == ["c3", "a1"]
+    assert ids(limit=1) == ["b2"]
+    with pytest.raises(ValueError):
+        filled_catalog.query({"description": "x"})
+
+
+def test_catalog_query_uses_indexes(filled_catalog):
+    """Test filters are answered from an index rather than a table scan."""
+    plan = filled_catalog._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM crackmes WHERE language = ?", ["C/C++"]
+    )
+    assert "crackmes_language" in " ".join(str(tuple(row)) for row in plan)
+
+
+def test_catalog_upsert_replaces_row(filled_catalog):
+    """Test rescraping a crackme updates its existing row."""
+    info = catalog_info("Easy one v2", Difficulty="n/a", Upload="yesterday")
+    result = crawler.ScrapeResult("a1", True, "out/a1", password="crackmes.one")
+
+    filled_catalog.upsert("a1", info, result, "ab" * 32)
+
+    rows = filled_catalog.query({"author": "alice"})
+    row = next(row for row in rows if row["id"] == "a1")
+    assert len(filled_catalog.query()) == 3
+    assert (row["title"], row["difficulty"]) == ("Easy one v2", None)
+    assert row["uploaded_at"] == "yesterday"
+    assert (row["password"], row["archive_digest"]) == ("crackmes.one", "ab" * 32)
+
+
+def test_scrape_records_catalog_row(local_site, sample_html_complete, tmp_path):
+    """Test both engines record the scrape, including the archive digest."""
+    archive = make_zip({"crackme.bin": b"\x7fELF"})
+    local_site.add("/crackme/123", sample_html_complete)
+    local_site.add("/download/12345", archive)
+    catalog = crawler.Catalog(str(tmp_path / "catalog.sqlite"))
+    options = crawler.ScrapeOptions(catalog=catalog)
+
+    crawler.scrape_crackme("123", str(tmp_path / "threads"), options=options)
+    crawler.scrape_batch_async(["123"], str(tmp_path / "async"), options=options)
+
+    [row] = catalog.query()
+    assert row["id"] == "123"
+    assert row["archive_digest"] == crawler.hashlib.sha256(archive).hexdigest()
+    assert row["download_url"] == f"{local_site.url}/download/12345"
+    assert row["directory"] == str(tmp_path / "async" / "testuser_Test_Crackme")
+
+
+def test_query_command(filled_catalog, mocker, capsys):
+    """Test the query subcommand prints tables, bare IDs and JSON."""
+    path = filled_catalog.path
+    base = ["crawler.py", "query", "--catalog", path, "--language", "C/C++"]
+
+    mocker.patch("sys.argv", base)
+    crawler.main()
+    table = capsys.readouterr().out.splitlines()
+    assert table[0].startswith("b2   4.5  4.0  C/C++")
+    assert table[0].endswith("bob: Hard one")
+
+    mocker.patch("sys.argv", [*base, "--format", "ids", "--min-difficulty", "2"])
+    crawler.main()
+    assert capsys.readouterr().out == "b2\n"
+
+    mocker.patch("sys.argv", [*base, "--format", "json", "--limit", "1"])
+    crawler.main()
+    record = crawler.json.loads(capsys.readouterr().out)
+    assert record["details"]["Platform"] == "Unix/linux etc."
+
+
+def test_query_command_missing_catalog(mocker, tmp_path, capsys):
+    """Test querying an output directory that has no catalog yet fails cleanly."""
+    mocker.patch("sys.argv", ["crawler.py", "query", "-o", str(tmp_path)])
+    with pytest.raises(SystemExit) as excinfo:
+        crawler.main()
+    assert excinfo.value.code == 1
+    assert "No catalog at" in capsys.readouterr().err
+
+
+def test_main_no_catalog(mocker):
+    """Test --no-catalog turns recording off and --catalog moves it."""
+    mock_scrape = mocker.patch("crawler.scrape_crackme")
+    mocker.patch("sys.argv", ["crawler.py", "a", "--no-catalog"])
+    crawler.main()
+    assert mock_scrape.call_args[0][4].catalog is None
+
+    mocker.patch("sys.argv", ["crawler.py", "a", "--catalog", "elsewhere.db"])
+    crawler.main()
+    assert mock_scrape.call_args[0][4].catalog.path == "elsewhere.db"
+
+
+def test_main_closes_catalog(mocker, tmp_path):
+    """Test the single-ID and batch paths both close the catalog when done."""
+    result = crawler.ScrapeResult("a", True)
+    mocker.patch("crawler.scrape_crackme", return_value=result)
+    mocker.patch("crawler._scrape_crackme", return_value=result)
+    close = mocker.spy(crawler.Catalog, "close")
+    output = str(tmp_path)
+    mocker.patch("sys.argv", ["crawler.py", "a", "-o", output])
+    crawler.main()
+    assert close.call_count == 1
+
+    mocker.patch("sys.argv", ["crawler.py", "a", "b", "-o", output])
+    crawler.main()
+    assert close.call_count == 2
+
+
+# --- Tests for full-text search ---
+def test_extract_crackme_comments(sample_html_provided_from_file):
+    """Test comments are read with their author, date and de-indented text."""
+    info = crawler.extract_crackme(sample_html_provided_from_file)
+
+    assert [c.author for c in info.comments] == [
+        "nxveed", "c4droid", "Sallos", "kaster"
+    ]  # fmt: skip
+    first = info.comments[1]
+    assert first.posted == "8:27 AM 06/18/2025"
+    assert (
+        first.text == "I\nsolved it, it is very simple, just a simple math calculation."
+    )
+
+
+def search_ids(catalog, terms):
+    return [row["id"] for row in catalog.search(terms)]
+
+
+def test_catalog_search_ranks_and_highlights(filled_catalog):
+    """Test title hits outrank description hits and snippets mark the match."""
+    info = catalog_info("Keygen me", Author="carol")
+    info.comments = [crawler.CrackmeComment("dave", "today", "Solved it with angr")]
+    result = crawler.ScrapeResult("d4", True, "out/d4")
+    filled_catalog.upsert("d4", info, result)
+    info = catalog_info("Other", Author="erin")
+    info.description = "Write a keygen for this one"
+    filled_catalog.upsert("e5", info, crawler.ScrapeResult("e5", True, "out/e5"))
+
+    rows = filled_catalog.search("keygen")
+
+    assert [row["id"] for row in rows] == ["d4", "e5"]
+    assert rows[1]["snippet"] == "Write a [keygen] for this one"
+    assert search_ids(filled_catalog, "SOLV* angr") == ["d4"]
+    assert search_ids(filled_catalog, "key*") == ["d4", "e5"]
+    assert search_ids(filled_catalog, "keygen carol") == ["d4"]
+    assert search_ids(filled_catalog, "keygen nothing") == []
+
+
+def test_catalog_search_quotes_punctuation(filled_catalog):
+    """Test terms with FTS5 operator characters are searched literally."""
+    info = catalog_info("Plus plus")
+    info.description = 'Pure C++ (no "STL"), x86-64 AND NOT obfuscated'
+    filled_catalog.upsert("f6", info, crawler.ScrapeResult("f6", True, "out/f6"))
+
+    assert search_ids(filled_catalog, 'C++ "STL" x86-64 NOT') == ["f6"]
+    with pytest.raises(ValueError):
+        crawler._fts_query(" * ")
+
+
+def test_catalog_search_updates_incrementally(filled_catalog):
+    """Test rescraping replaces a crackme's indexed text instead of adding to it."""
+    assert search_ids(filled_catalog, "easy") == ["a1"]
+
+    info = catalog_info("Renamed")
+    filled_catalog.upsert("a1", info, crawler.ScrapeResult("a1", True, "out/a1"))
+
+    assert search_ids(filled_catalog, "easy") == []
+    assert search_ids(filled_catalog, "renamed") == ["a1"]
+    count = filled_catalog._connect().execute("SELECT count(*) FROM crackmes_fts")
+    assert count.fetchone()[0] == 3
+
+
+def test_catalog_search_rescrape_looks_up_by_rowid(filled_catalog):
+    """Test replacing a crackme's indexed text doesn't scan the search index."""
+    conn = filled_catalog._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    filled_catalog.upsert("b2", catalog_info("Again"), crawler.ScrapeResult("b2", True))
+    conn.set_trace_callback(None)
+
+    (delete,) = [sql for sql in statements if sql.startswith("DELETE")]
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {delete}").fetchall()
+    assert [row[3] for row in plan] == ["SCAN crackmes_fts VIRTUAL TABLE INDEX 0:="]
+
+
+def test_search_command(filled_catalog, mocker, capsys):
+    """Test the search subcommand prints ranked matches with snippets."""
+    path = filled_catalog.path
+    mocker.patch("sys.argv", ["crawler.py", "search", "--catalog", path, "hard"])
+    crawler.main()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("b2 ")
+    assert lines[1] == "    [Hard] one"
+
+    mocker.patch(
+        "sys.argv",
+        ["crawler.py", "search", "--catalog", path, "one", "--format", "json"],
+    )
+    crawler.main()
+    records = [
+        crawler.json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert len(records) == 2
+    assert records[0]["comments"] == []
+
+
+def test_search_command_needs_terms(mocker, tmp_path, capsys):
+    """Test searching for nothing is a usage error."""
+    mocker.patch("sys.argv", ["crawler.py", "search", "--catalog", "x.db", "*"])
+    with pytest.raises(SystemExit) as excinfo:
+        crawler.main()
+    assert excinfo.value.code == 2
+    assert "no search terms given" in capsys.readouterr().err
+
+
+# --- Tests for phase timings and profiling ---
+def test_scrape_batch_records_phase_timings(local_site, sample_html_complete, tmp_path):
+    """Test every phase of a threaded scrape is timed, connection setup included."""
+    archive = make_zip({"crackme.bin": b"\x7fELF" * 100})
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add("/download/12345", archive)
+
+    [result] = crawler.scrape_batch(["1"], str(tmp_path), jobs=1)
+
+    phases = result.timings.phases
+    for phase in ("connect", "fetch", "parse", "extract", "download", "unzip"):
+        assert phase in phases
+    assert phases["connect"] > 0
+    assert phases["total"] >= phases["fetch"] + phases["download"]
+    assert result.timings.download_bytes == len(archive)
+
+
+def test_scrape_batch_async_records_phase_timings(
+    local_site, sample_html_complete, tmp_path
+):
+    """Test the async engine reports the same phases, per crackme."""
+    archive = make_zip({"crackme.bin": b"\x7fELF"})
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add("/download/12345", archive)
+
+    ok, failed = crawler.scrape_batch_async(["1", "missing"], str(tmp_path), jobs=2)
+
+    assert ok.timings.phases["connect"] > 0
+    assert {"fetch", "parse", "extract", "download", "write"} <= set(ok.timings.phases)
+    assert ok.timings.download_bytes == len(archive)
+    assert not failed.ok
+    assert failed.timings.download_bytes == 0
+    assert "download" not in failed.timings.phases
+
+
+def test_failed_worker_result_has_total(mocker):
+    """Test a scrape that raises still reports how long it took."""
+    mocker.patch("crawler._scrape_crackme", side_effect=RuntimeError("boom"))
+
+    [result] = crawler.scrape_batch(["1"], "out", jobs=1)
+
+    assert not result.ok
+    assert result.error == "boom"
+    assert "total" in result.timings.phases
+
+
+def test_percentile_nearest_rank():
+    """Test percentiles pick an observed value by nearest rank."""
+    values = [float(v) for v in range(1, 11)]
+    assert crawler._percentile(values, 50) == 5.0
+    assert crawler._percentile(values, 90) == 9.0
+    assert crawler._percentile(values, 99) == 10.0
+    assert crawler._percentile([3.0], 50) == 3.0
+
+
+def test_metrics_records_aggregate():
+    """Test one record per crackme followed by per-phase percentiles."""
+    results = [
+        crawler.ScrapeResult(
+            str(i),
+            ok=i != 3,
+            error="boom" if i == 3 else None,
+            timings=crawler.PhaseTimings(
+                {"total": float(i), "fetch": i / 10}, download_bytes=100
+            ),
+        )
+        for i in range(1, 5)
+    ]
+
+    *records, aggregate = crawler.metrics_records(results)
+
+    assert [r["crackme_id"] for r in records] == ["1", "2", "3", "4"]
+    assert records[2]["error"] == "boom"
+    assert records[0]["phases"] == {"total": 1.0, "fetch": 0.1}
+    summary = aggregate["aggregate"]
+    assert summary["count"] == 4
+    assert summary["failed"] == 1
+    assert summary["download_bytes"] == 400
+    assert list(summary["phases"]) == ["fetch", "total"]
+    assert summary["phases"]["total"] == {
+        "p50": 2.0,
+        "p90": 4.0,
+        "p99": 4.0,
+        "max": 4.0,
+        "sum": 10.0,
+    }
+
+
+def test_main_writes_metrics_file(mocker, tmp_path):
+    """Test --metrics json writes JSON lines to --metrics-file."""
+    timings = crawler.PhaseTimings({"total": 0.5})
+    mocker.patch(
+        "crawler.scrape_batch",
+        return_value=[crawler.ScrapeResult("a", ok=True, timings=timings)],
+    )
+    metrics = tmp_path / "metrics.jsonl"
+    mocker.patch(
+        "sys.argv",
+        ["crawler.py", "a", "b", "--metrics", "json", "--metrics-file", str(metrics)],
+    )
+
+    crawler.main()
+
+    lines = [json.loads(line) for line in metrics.read_text().splitlines()]
+    assert lines[0]["crackme_id"] == "a"
+    assert lines[1]["aggregate"]["phases"]["total"]["p50"] == 0.5
+
+
+def test_main_single_failure_writes_metrics(mocker, tmp_path):
+    """Test a failed single-ID run still writes its metrics before exiting 1."""
+    mocker.patch("crawler.fetch_html", return_value=None)
+    metrics = tmp_path / "metrics.jsonl"
+
+    with pytest.raises(SystemExit) as excinfo:
+        crawler._dispatch(
+            ["abc", "-o", str(tmp_path), "--metrics", "json"]
+            + ["--metrics-file", str(metrics)]
+        )
+
+    assert excinfo.value.code == 1
+    record = json.loads(metrics.read_text().splitlines()[0])
+    assert record["crackme_id"] == "abc"
+    assert record["ok"] is False
+
+
+def test_main_profile_includes_worker_threads(
+    local_site, sample_html_complete, tmp_path, mocker, capsys
+):
+    """Test --profile merges the worker threads' profiles into one stats file."""
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add("/download/12345", make_zip({"crackme.bin": b"\x7fELF"}))
+    stats_path = tmp_path / "run.prof"
+    mocker.patch(
+        "sys.argv",
+        [
+            "crawler.py",
+            "1",
+            "2",
+            "-o",
+            str(tmp_path / "out"),
+            "--no-catalog",
+            "--profile",
+            str(stats_path),
+        ],
+    )
+
+    with pytest.raises(SystemExit):
+        crawler.main()  # Crackme 2 does not exist
+
+    stats = pstats.Stats(str(stats_path))
+    functions = {name for _, _, name in stats.stats}
+    assert "_scrape_phases" in functions
+    assert "parse_crackme" in functions
+    assert "--- Profile" in capsys.readouterr().err
+
+
+# --- Tests for the benchmark suite ---
+def test_benchmarks_compare_flags_regressions():
+    """Test only slowdowns past both the relative and absolute floor are flagged."""
+
+    def doc(**medians):
+        return {"results": {k: {"median_s": v} for k, v in medians.items()}}
+
+    baseline = doc(slow=0.100, noisy=0.001, same=0.050, gone=0.1)
+    current = doc(slow=0.150, noisy=0.002, same=0.055, new=1.0)
+
+    [(name, ratio)] = bench_crawler.compare(baseline, current)
+    assert name == "slow"
+    assert ratio == pytest.approx(1.5)
+    assert bench_crawler.compare(baseline, current, threshold=0.6) == []
+
+
+# --- Tests for the replay server and load test ---
+@pytest.fixture
+def replay_site():
+    """A small synthetic site with unencrypted archives, to keep tests fast."""
+    return replay_server.ReplaySite.synthetic(5, per_page=2, password=None)
+
+
+def test_main_crawl_against_replay_server(replay_site, tmp_path, mocker):
+    """Test an open-ended crawl with --base-url scrapes every replayed crackme."""
+    with replay_server.ReplayServer(replay_site) as server:
+        mocker.patch(
+            "sys.argv",
+            ["crawler.py", "crawl", "--pages", "1..", "-o", str(tmp_path)]
+            + ["--base-url", server.url + "/", "-j", "3", "--rate", "0"],
+        )
+        crawler.main()
+
+    assert crawler.BASE_URL == "https://crackmes.one"  # Not rewritten
+    assert len(list(tmp_path.glob("replay*_Replay_crackme_*/crackme/crackme.bin"))) == 5
+    assert server.stats.requests == {
+        "listing": 4,
+        "page": 5,
+        "archive": 5,
+        "writeup": 25,  # Five on the sample page
+    }
+
+
+def test_replay_server_injects_throttling(replay_site):
+    """Test injected 429s carry a Retry-After header and are counted."""
+    faults = replay_server.Faults(error_rate=1.0, error_statuses=(429,))
+    with replay_server.ReplayServer(replay_site, faults) as server:
+        response = requests.get(f"{server.url}/lasts/1", timeout=5)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert server.stats.injected == 1
+
+
+def test_replay_server_counts_only_injected_errors(replay_site):
+    """Test the site's own 404s aren't counted as injected errors."""
+    with replay_server.ReplayServer(replay_site) as server:
+        response = requests.get(f"{server.url}/lasts/99", timeout=5)
+
+    assert response.status_code == 404
+    assert server.stats.statuses[404] == 1
+    assert server.stats.injected == 0
+
+
+def test_replay_server_latency_and_bandwidth():
+    """Test responses are delayed and their bodies paced to the bandwidth cap."""
+    site = replay_server.ReplaySite({"/a.zip": ("application/zip", bytes(64 * 1024))})
+    faults = replay_server.Faults(latency=0.05, bandwidth=512 * 1024)
+    with replay_server.ReplayServer(site, faults) as server:
+        started = time.perf_counter()
+        body = requests.get(f"{server.url}/a.zip", timeout=5).content
+        elapsed = time.perf_counter() - started
+        missing = requests.get(f"{server.url}/b.zip", timeout=5)
+
+    assert len(body) == 64 * 1024
+    assert elapsed >= 0.05 + 0.1  # 64 KiB at 512 KiB/s
+    assert missing.status_code == 404
+    assert server.stats.bytes_sent == 64 * 1024 + len(b"not found")
+
+
+def test_replay_site_from_cache(tmp_path, sample_html_complete):
+    """Test recorded cache entries are replayed, with archives for their links."""
+    cache = crawler.ResponseCache(str(tmp_path))
+    cache.store("https://crackmes.one/crackme/123", sample_html_complete.encode())
+
+    site = replay_server.ReplaySite.from_cache(str(tmp_path), 1024, password=None)
+
+    assert site.crackme_ids == ["123"]
+    assert site.routes["/crackme/123"][1] == sample_html_complete.encode()
+    archive = site.routes["/download/12345"][1]
+    assert zipfile.ZipFile(io.BytesIO(archive)).namelist() == ["crackme.bin"]
+
+
+def test_run_load_reports_throughput(replay_site):
+    """Test a load run counts pages, bytes and injected errors."""
+    faults = replay_server.Faults(error_rate=0.2, error_statuses=(500,))
+    with replay_server.ReplayServer(replay_site, faults, seed=3) as server:
+        result = load_test.run_load(server, jobs=2, retries=8)
+        crawler_base_url = crawler.BASE_URL
+
+    assert crawler_base_url == "https://crackmes.one"
+    assert (result.crackmes, result.failed) == (5, 0)
+    assert result.pages == 5 + 4
+    archive = replay_site.routes[f"/static/crackme/{replay_site.crackme_ids[0]}.zip"]
+    writeups = [
+        body for path, (_, body) in replay_site.routes.items() if "/solution/" in path
+    ]
+    assert result.download_bytes == 5 * (len(archive[1]) + sum(map(len, writeups)))
+    assert result.errors > 0
+    assert result.requests == result.pages + 5 * (1 + len(writeups)) + result.errors
+    assert result.as_record()["pages_per_s"] > 0
+
+
+def test_parse_size():
+    """Test human-readable sizes for the replay server options."""
+    assert replay_server.parse_size("512") == 512
+    assert replay_server.parse_size("64KiB") == 64 * 1024
+    assert replay_server.parse_size("1.5m") == 3 * 512 * 1024
+    with pytest.raises(argparse.ArgumentTypeError):
+        replay_server.parse_size("fast")
+
+
+def test_load_test_main_writes_json(tmp_path, capsys):
+    """Test the load-test command prints a row per run and saves JSON."""
+    output = tmp_path / "load.json"
+
+    load_test.main(
+        ["--crackmes", "2", "--plain-archives", "-j", "1", "2", "--json", str(output)]
+    )
+
+    rows = capsys.readouterr().out.splitlines()
+    assert rows[0].split()[:3] == ["engine", "jobs", "rate"]
+    assert len(rows) == 3
+    records = json.loads(output.read_text())
+    assert [r["jobs"] for r in records] == [1, 2]
+    assert all(r["crackmes"] == 2 and r["failed"] == 0 for r in records)
+
+
+# --- Tests for the staged engine ---
+def test_scrape_batch_staged_same_layout(local_site, sample_html_complete, tmp_path):
+    """Test the staged engine writes the same layout, timing every phase."""
+    archive = make_zip({"crackme.bin": b"\x7fELF"})
+    local_site.add("/crackme/123", sample_html_complete)
+    local_site.add("/download/12345", archive)
+
+    results = crawler.scrape_batch_staged(
+        ["123", "missing"], str(tmp_path), jobs=2, processes=1
+    )
+
+    assert [r.crackme_id for r in results] == ["123", "missing"]
+    ok, failed = results
+    crackme_dir = tmp_path / "testuser_Test_Crackme"
+    assert ok.ok and ok.directory == str(crackme_dir)
+    assert "# Test Crackme" in (crackme_dir / "README.md").read_text(encoding="utf-8")
+    assert (crackme_dir / "crackme" / "crackme.bin").read_bytes() == b"\x7fELF"
+    phases = ok.timings.phases
+    for phase in ("fetch", "parse", "extract", "download", "probe", "unzip", "write"):
+        assert phase in phases
+    assert phases["total"] >= phases["fetch"] + phases["parse"]
+    assert ok.timings.download_bytes == len(archive)
+    assert not failed.ok
+    assert "Could not fetch" in failed.error
+    assert "total" in failed.timings.phases
+
+
+def test_scrape_batch_staged_keeps_going_after_errors(
+    local_site, sample_html_complete, tmp_path, mocker, capsys
+):
+    """Test an unexpected error in a stage fails only that crackme."""
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add(
+        "/crackme/2",
+        sample_html_complete.replace("btn-download", "x").replace("Test", "Other"),
+    )
+    real_write = crawler.write_readme
+
+    def write_readme(crackme_dir, info):
+        if info.title == "Other Crackme":
+            raise OSError("disk full")
+        return real_write(crackme_dir, info)
+
+    mocker.patch("crawler.write_readme", side_effect=write_readme)
+
+    first, second = crawler.scrape_batch_staged(["1", "2"], str(tmp_path), processes=1)
+
+    assert first.ok  # Its download failed, which isn't fatal
+    assert not second.ok
+    assert second.error == "disk full"
+    err = capsys.readouterr().err
+    assert "Error: Unexpected failure for 2: disk full" in err
+    assert "Warning: Could not find download link." in err
+
+
+def test_scrape_batch_staged_backpressure(mocker, tmp_path):
+    """Test IDs are pulled lazily while the fetch stage is stuck."""
+    release = threading.Event()
+    mocker.patch("crawler.fetch_html", side_effect=lambda url, session: release.wait())
+    pulled = []
+
+    def ids():
+        for n in range(1000):
+            pulled.append(n)
+            yield f"{n:x}"
+
+    runner = threading.Thread(
+        target=crawler.scrape_batch_staged,
+        args=(ids(), str(tmp_path)),
+        kwargs={"jobs": 2, "processes": 1},
+    )
+    runner.start()
+    time.sleep(0.3)
+    # Two IDs being fetched, four queued, one waiting to be put
+    assert len(pulled) <= 2 + 4 + 1
+    release.set()
+    runner.join(timeout=30)
+    assert len(pulled) == 1000
+
+
+def test_staged_pool_functions(sample_html_complete, tmp_path):
+    """Test the functions run in pool processes return their phase times."""
+    info, phases = crawler._parse_page(sample_html_complete, "http://mirror.test")
+    assert info.title == "Test Crackme"
+    assert info.download_url.startswith("http://mirror.test/")
+    assert set(phases) == {"parse", "extract"}
+
+    zip_path = tmp_path / "a.zip"
+    zip_path.write_bytes(make_zip({"a.bin": b"x"}, password="crackmes.one"))
+    ok, password, phases = crawler._unzip_archive(
+        str(zip_path), None, (), crawler.ExtractLimits()
+    )
+    assert (ok, password) == (True, "crackmes.one")
+    assert set(phases) == {"probe", "unzip"}
+
+
+def test_main_staged_engine(mocker):
+    """Test --engine staged routes even a single ID through the staged batch."""
+    mock_staged = mocker.patch(
+        "crawler.scrape_batch_staged",
+        return_value=[crawler.ScrapeResult("a", ok=True, directory="d")],
+    )
+    mocker.patch(
+        "sys.argv",
+        ["crawler.py", "a", "--engine", "staged", "--processes", "3", "--no-catalog"],
+    )
+
+    crawler.main()
+
+    args = mock_staged.call_args[0]
+    assert list(args[0]) == ["a"]
+    assert args[4] == 3
+
+
+# --- Tests for the daemon ---
+@pytest.fixture
+def daemon(mocker):
+    """A CrawlDaemon serving on a short socket path from a background thread."""
+    socket_dir = tempfile.mkdtemp(prefix="gc-")  # Socket paths are length-limited
+    server = crawler.CrawlDaemon(os.path.join(socket_dir, "d.sock"))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    assert server.ready.wait(5)
+    yield server
+    server.shutdown()
+    thread.join(5)
+    os.rmdir(socket_dir)
+
+
+def test_daemon_runs_jobs_with_warm_sessions(
+    daemon, local_site, sample_html_complete, tmp_path, monkeypatch, capsys
+):
+    """Test jobs run in the daemon's working directory copy and reuse its session."""
+    local_site.add("/crackme/1", sample_html_complete)
+    local_site.add("/download/12345", make_zip({"crackme.bin": b"\x7fELF"}))
+    monkeypatch.chdir(tmp_path)
+    argv = ["1", "2", "-o", "out", "--no-catalog", "--base-url", local_site.url]
+
+    assert crawler.run_in_daemon(argv, daemon.socket_path) == 1  # 2 is missing
+    assert crawler.run_in_daemon(argv[:1] + argv[2:], daemon.socket_path) == 0
+
+    out, err = capsys.readouterr()
+    assert "Successfully created markdown file: out/testuser_Test_Crackme" in out
+    assert "1 succeeded, 1 failed." in out
+    assert "Could not fetch crackme page" in err
+    assert (tmp_path / "out" / "testuser_Test_Crackme" / "README.md").exists()
+    assert len(daemon.sessions) == 1
+    assert os.getcwd() == str(tmp_path)
+    assert sys.stdout is not None and not isinstance(sys.stdout, crawler._JobStream)
+
+
+def test_daemon_reports_usage_errors(daemon, capsys):
+    """Test argparse errors come back with their exit status."""
+    assert crawler.run_in_daemon(["crawl", "--pages", "x"], daemon.socket_path) == 2
+    assert "invalid page range" in capsys.readouterr().err
+    assert crawler.run_in_daemon(["serve"], daemon.socket_path) == 2
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [{"cwd": "/tmp"}, {"argv": "abc", "cwd": "/"}, {"argv": [1]}, {"argv": []}, []],
+)
+def test_daemon_rejects_malformed_requests(daemon, capsys, request_):
+    """Test requests without a list of str argv and a str cwd get an answer."""
+    assert crawler._daemon_request(request_, daemon.socket_path) == 2
+    assert "Malformed request" in capsys.readouterr().err
+    assert not daemon.jobs.qsize() and not daemon.running
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["-i", "-"],
+        ["--input=-"],
+        ["-i-"],
+        ["abc", "-w", "-"],
+        ["crawl", "--wordlist=-"],
+        ["sync", "-w-"],
+    ],
+)
+def test_daemon_skipped_when_reading_stdin(daemon, argv):
+    """Test commands reading stdin run locally however the '-' is spelled."""
+    assert crawler.run_in_daemon(argv, daemon.socket_path) is None
+    assert not daemon.jobs.qsize() and not daemon.running
+
+
+def test_reads_stdin_opens_no_files(tmp_path, capsys):
+    """Test the stdin check neither creates output files nor prints usage."""
+    metrics = tmp_path / "m.jsonl"
+    assert not crawler._reads_stdin(["abc", "--metrics-file", str(metrics)])
+    assert not metrics.exists()
+    assert not crawler._reads_stdin(["crawl", "--pages", "x"])
+    assert not crawler._reads_stdin(["query", "-"])
+    assert capsys.readouterr() == ("", "")
+
+
+def test_daemon_socket_of_another_user_is_ignored(daemon, mocker, capsys):
+    """Test jobs aren't handed to a socket some other user put in place."""
+    mocker.patch("crawler.os.getuid", return_value=os.getuid() + 1)
+    assert crawler.run_in_daemon(["query", "a"], daemon.socket_path) is None
+    assert "belongs to another user" in capsys.readouterr().err
+    assert not daemon.jobs.qsize() and not daemon.running
+
+
+def test_daemon_queues_concurrent_jobs(daemon, mocker, tmp_path):
+    """Test a second client waits for the running job instead of overlapping it."""
+    started, release = threading.Event(), threading.Event()
+    running = []
+
+    def query_command(argv):
+        running.append(argv[0])
+        assert len(running) == 1  # Never two jobs at once
+        started.set()
+        release.wait(5)
+        running.pop()
+
+    mocker.patch.dict(crawler.COMMANDS, {"query": query_command})
+    first = threading.Thread(
+        target=crawler.run_in_daemon, args=(["query", "a"], daemon.socket_path)
+    )
+    first.start()
+    assert started.wait(5)
+    output = io.StringIO()
+    mocker.patch("sys.stderr", output)
+    second = threading.Thread(
+        target=crawler.run_in_daemon, args=(["query", "b"], daemon.socket_path)
+    )
+    second.start()
+    time.sleep(0.2)
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert "Queued behind 1 job(s)." in output.getvalue()
+
+
+def test_serve_stop_and_stale_socket(tmp_path, mocker):
+    """Test --stop shuts a daemon down and a dead socket is neither used nor kept."""
+    socket_dir = tempfile.mkdtemp(prefix="gc-")
+    path = os.path.join(socket_dir, "d.sock")
+    stale = crawler.socket.socket(crawler.socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()  # Leaves the socket file with nobody listening
+
+    assert crawler.run_in_daemon(["1"], path) is None
+    thread = threading.Thread(target=crawler.serve_command, args=(["--socket", path],))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while crawler.run_in_daemon(["query", "--help"], path) is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    with pytest.raises(SystemExit):
+        crawler.serve_command(["--socket", path])  # Already running
+    crawler.serve_command(["--socket", path, "--stop"])
+    thread.join(5)
+    assert not os.path.exists(path)
+    with pytest.raises(SystemExit):
+        crawler.serve_command(["--socket", path, "--stop"])
+    os.rmdir(socket_dir)
+
+
+def test_main_hands_jobs_to_daemon(mocker, monkeypatch):
+    """Test main() exits with the daemon's status, unless told to run in-process."""
+    mock_run = mocker.patch("crawler.run_in_daemon", return_value=3)
+    mock_get = mocker.patch("crawler.get_command")
+    mocker.patch("sys.argv", ["crawler.py", "abc"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        crawler.main()
+
+    assert excinfo.value.code == 3
+    mock_run.assert_called_once_with(["abc"])
+    mock_get.assert_not_called()
+
+    mocker.stopall()
+    monkeypatch.setenv("GET_CRACKME_NO_DAEMON", "1")
+    assert crawler.run_in_daemon(["abc"]) is None
+    monkeypatch.delenv("GET_CRACKME_NO_DAEMON")
+    assert crawler.run_in_daemon(["-i", "-"]) is None  # stdin can't be forwarded
+
+
+# --- Tests for startup time ---
+HEAVY_MODULES = (
+    "aiohttp",
+    "asyncio",
+    "bs4",
+    "concurrent.futures",
+    "multiprocessing",
+    "requests",
+    "socketserver",
+    "sqlite3",
+    "urllib3",
+    "zipfile",
+)
+
+
+def _modules_loaded_by(*argv):
+    """
+    Heavy modules a fresh `get-crackme argv...` imports. The interpreter runs
+    with -S, so .pth files in site-packages can't import any beforehand.
+    """
+    script = (
+        "import json, runpy, site, sys\n"
+        "sys.path.extend(site.getsitepackages())\n"
+        "before = set(sys.modules)\n"
+        f"sys.argv = ['get_crackme.py', *{list(argv)!r}]\n"
+        "try:\n"
+        "    runpy.run_path('get_crackme.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r}\n"
+        "         if m in sys.modules and m not in before]\n"
+        "print(json.dumps(heavy), file=sys.stderr)\n"
+    )
+    stderr = bench_crawler._python("-S", "-c", script).stderr
+    return json.loads(stderr.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [["--help"], ["--no-such-flag"], ["query", "--help"], ["serve", "--stop"]],
+)
+def test_fast_paths_skip_heavy_imports(argv):
+    assert _modules_loaded_by(*argv) == []
+
+
+def test_launcher_imports_crawler_as_a_cached_module():
+    """Test get-crackme imports crawler, so its bytecode is cached, not recompiled."""
+    stderr = bench_crawler._python("-X", "importtime", "get_crackme.py", "-h").stderr
+    assert any(line.endswith("| crawler") for line in stderr.splitlines())
+
+
+@pytest.mark.parametrize("engine", crawler.ENGINES)
+def test_fresh_process_batch_imports_safely(engine, tmp_path):
+    """Test a -j batch whose workers are the first to need the network modules."""
+    site = replay_server.ReplaySite.synthetic(16, per_page=8, password=None)
+    with replay_server.ReplayServer(site) as server:
+        completed = bench_crawler._python(
+            "get_crackme.py",
+            *site.crackme_ids,
+            *["-j", "8", "--engine", engine, "--processes", "2", "--rate", "0"],
+            *["--base-url", server.url, "--no-catalog", "-o", str(tmp_path)],
+        )
+    assert "16 succeeded, 0 failed." in completed.stdout
+    assert "Error" not in completed.stderr
+    assert len(list(tmp_path.glob("*/README.md"))) == 16
+
+
+def test_deferred_classes_are_built_once():
+    """Test the factories of classes with deferred bases build them once."""
+    assert issubclass(crawler._caching_adapter(), crawler._retrying_adapter())
+    assert issubclass(crawler._retrying_adapter(), requests.adapters.HTTPAdapter)
+    assert issubclass(crawler._crackme_strainer(), bs4.SoupStrainer)
+    assert crawler._caching_adapter() is crawler._caching_adapter()
+
+
+# --- Tests for the sharded layout ---
+def test_make_crackme_dir_sharded_links_aliases(tmp_path):
+    """Test sharded dirs are keyed by ID and same-named crackmes get distinct aliases."""
+    info = crawler.CrackmeInfo("Same name", "bob", {}, "")
+    first = crawler.make_crackme_dir(str(tmp_path), "aaa", info, "sharded")
+    second = crawler.make_crackme_dir(str(tmp_path), "bbb", info, "sharded")
+
+    for crackme_id, path in (("aaa", first), ("bbb", second)):
+        relative = pathlib.Path(path).relative_to(tmp_path)
+        assert relative.parts[0] == crawler.SHARDS_DIR
+        assert len(relative.parts[1]) == 2
+        assert relative.parts[2] == crackme_id
+    assert (tmp_path / "bob_Same_name").resolve() == pathlib.Path(first).resolve()
+    assert (tmp_path / "bob_Same_name_bbb").resolve() == pathlib.Path(second).resolve()
+
+    # Scraping again reuses the directory and its alias
+    assert crawler.make_crackme_dir(str(tmp_path), "aaa", info, "sharded") == first
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "bob_Same_name",
+        "bob_Same_name_bbb",
+        crawler.SHARDS_DIR,
+    ]
+    assert sorted(crawler.crackme_dirs(str(tmp_path))) == sorted([first, second])
+
+
+def test_make_crackme_dir_warns_without_symlinks(mocker, tmp_path, capsys):
+    """Test a failing symlink leaves the sharded directory usable."""
+    mocker.patch("os.symlink", side_effect=OSError("not permitted"))
+    info = crawler.CrackmeInfo("T", "a", {}, "")
+    path = crawler.make_crackme_dir(str(tmp_path), "aaa", info, "sharded")
+    assert os.path.isdir(path)
+    assert "Could not link" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("value, expected", [("1/1", (1, 1)), (" 2/4 ", (2, 4))])
+def test_parse_shard(value, expected):
+    assert crawler.parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/2", "3/2", "1", "1/0", "a/b"])
+def test_parse_shard_invalid(value):
+    with pytest.raises(crawler.argparse.ArgumentTypeError):
+        crawler.parse_shard(value)
+
+
+def test_iter_shard_ids_partitions_stream():
+    """Test the shards are disjoint, cover every ID and are reasonably even."""
+    ids = [f"{n:024x}" for n in range(300)]
+    shards = [list(crawler.iter_shard_ids(ids, (i, 3))) for i in (1, 2, 3)]
+    assert sorted(sum(shards, [])) == ids
+    assert all(60 < len(shard) < 140 for shard in shards)
+    assert shards[0] == list(crawler.iter_shard_ids(iter(ids), (1, 3)))
+
+
+def test_main_crawl_shards_merge_without_conflicts(replay_site, tmp_path, mocker):
+    """Test two sharded nodes split a crawl and their trees merge cleanly."""
+    with replay_server.ReplayServer(replay_site) as server:
+        for shard in ("1/2", "2/2"):
+            mocker.patch(
+                "sys.argv",
+                ["crawler.py", "crawl", "--pages", "1..", "--rate", "0"]
+                + ["--base-url", server.url, "--layout", "sharded"]
+                + ["--shard", shard, "-o", str(tmp_path / shard[0])],
+            )
+            crawler.main()
+
+    known = [crawler.SyncState.load(str(tmp_path / node)).known_ids for node in "12"]
+    assert not known[0] & known[1]
+    assert known[0] | known[1] == set(replay_site.crackme_ids)
+    by_id = [
+        {p.relative_to(tmp_path / node) for p in (tmp_path / node).glob("by-id/*/*")}
+        for node in "12"
+    ]
+    assert not by_id[0] & by_id[1]
+    assert server.stats.requests["page"] == 5
+
+
+# --- Tests for the structured export ---
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_export_record_fields():
+    """Test export records carry the page fields, archive outcome and timings."""
+    info = crawler.CrackmeInfo(
+        "T",
+        "a",
+        {"Language": "C"},
+        "desc",
+        "https://x/dl",
+        [crawler.CrackmeComment("bob", "1:02 PM 06/17/2025", "nice")],
+    )
+    result = crawler.ScrapeResult(
+        "123", ok=True, directory="d", password="pw", info=info, extracted=True
+    )
+    result.digest = "ab" * 32
+    result.timings.add("fetch", 0.25)
+    result.timings.download_bytes = 10
+
+    record = crawler.export_record(result)
+
+    assert record["title"] == "T" and record["details"] == {"Language": "C"}
+    assert record["comments"] == [
+        {"author": "bob", "posted": "1:02 PM 06/17/2025", "text": "nice"}
+    ]
+    assert record["extracted"] is True and record["password"] == "pw"
+    assert record["phases"] == {"fetch": 0.25} and record["download_bytes"] == 10
+
+    failed = crawler.export_record(crawler.ScrapeResult("9", ok=False, error="boom"))
+    assert failed["error"] == "boom" and failed["title"] is None
+    assert failed["details"] == {} and failed["comments"] == []
+
+
+@pytest.mark.parametrize("engine", crawler.ENGINES)
+def test_main_crawl_exports_jsonl(replay_site, tmp_path, mocker, engine):
+    """Test every engine appends one record per crackme as it finishes."""
+    export = tmp_path / "export" / "crackmes.jsonl"
+    with replay_server.ReplayServer(replay_site) as server:
+        mocker.patch(
+            "sys.argv",
+            ["crawler.py", "crawl", "--pages", "1..", "--rate", "0"]
+            + ["--engine", engine, "--processes", "1", "--no-catalog"]
+            + ["--base-url", server.url, "--export", str(export)]
+            + ["-o", str(tmp_path / "out")],
+        )
+        crawler.main()
+
+    records = _read_jsonl(export)
+    assert sorted(r["id"] for r in records) == sorted(replay_site.crackme_ids)
+    for record in records:
+        assert record["ok"] and record["extracted"]
+        assert len(record["digest"]) == 64
+        assert record["phases"]["total"] >= record["phases"]["fetch"] > 0
+        assert record["download_bytes"] > 0
+
+
+def test_main_get_export_appends_failures(local_site, sample_html_complete, tmp_path):
+    """Test a failed single scrape is still exported and runs append."""
+    local_site.add("/crackme/123", sample_html_complete)
+    export = tmp_path / "crackmes.jsonl"
+    argv = ["-o", str(tmp_path), "--no-catalog", "--export", str(export)]
+
+    crawler._dispatch(["123", *argv])
+    with pytest.raises(SystemExit):
+        crawler._dispatch(["missing", *argv])
+
+    first, second = _read_jsonl(export)
+    assert first["id"] == "123" and first["title"] == "Test Crackme"
+    assert first["extracted"] is None  # The download 404s
+    assert second["id"] == "missing" and not second["ok"] and second["error"]
+
+
+def test_export_write_errors_are_warnings(tmp_path, capsys):
+    """Test an unwritable export doesn't fail the scrape."""
+    (tmp_path / "file").write_text("", encoding="utf-8")
+    writer = crawler.ExportWriter(str(tmp_path / "file" / "export.jsonl"))
+    options = crawler.ScrapeOptions(export=writer)
+    crawler._export_result(options, crawler.ScrapeResult("1", ok=True))
+    writer.close()
+    assert "Could not export 1" in capsys.readouterr().err
+
+
+def test_main_crawl_exports_parquet(replay_site, tmp_path, mocker):
+    """Test a .parquet export holds every crackme across several row groups."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    mocker.patch("crawler.PARQUET_ROW_GROUP", 2)
+    export = tmp_path / "crackmes.parquet"
+    with replay_server.ReplayServer(replay_site) as server:
+        mocker.patch(
+            "sys.argv",
+            ["crawler.py", "crawl", "--pages", "1..", "--rate", "0", "--no-catalog"]
+            + ["--base-url", server.url, "--export", str(export)]
+            + ["-o", str(tmp_path / "out")],
+        )
+        crawler.main()
+
+    parquet = pq.ParquetFile(export)
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert sorted(table.column("id").to_pylist()) == sorted(replay_site.crackme_ids)
+    assert table.schema == crawler.ParquetExportWriter.schema()
+    assert dict(table.column("phases")[0].as_py())["total"] > 0
+    assert not (tmp_path / "crackmes.parquet.tmp").exists()
+
+
+def test_parquet_export_needs_pyarrow(mocker, tmp_path, capsys):
+    """Test a .parquet export without pyarrow is a clear error."""
+    find_spec = crawler.importlib.util.find_spec
+    mocker.patch(
+        "importlib.util.find_spec",
+        side_effect=lambda name, *a: None if name == "pyarrow" else find_spec(name, *a),
+    )
+    with pytest.raises(SystemExit):
+        crawler._dispatch(["123", "-o", str(tmp_path), "--export", "x.parquet"])
+    assert "needs pyarrow" in capsys.readouterr().err
+
+
+# --- Tests for re-rendering ---
+@pytest.fixture
+def scraped_tree(replay_site, tmp_path, mocker):
+    """An output tree and page cache from crawling the replay site."""
+    with replay_server.ReplayServer(replay_site) as server:
+        crawler._dispatch(
+            ["crawl", "--pages", "1..", "--rate", "0", "--base-url", server.url]
+            + ["--cache", str(tmp_path / "cache"), "-o", str(tmp_path / "out")]
+        )
+    return tmp_path / "out", tmp_path / "cache"
+
+
+def _readmes(out):
+    return sorted(out.glob("*/README.md"))
+
+
+def test_render_from_catalog_skips_unchanged(scraped_tree, mocker, capsys):
+    """Test render rewrites only READMEs whose content changed."""
+    out, _ = scraped_tree
+    readmes = _readmes(out)
+    original = readmes[0].read_text(encoding="utf-8")
+    readmes[0].write_text("stale", encoding="utf-8")
+    crawler.shutil.rmtree(readmes[1].parent)
+    capsys.readouterr()
+
+    with pytest.raises(SystemExit) as excinfo:
+        crawler._dispatch(["render", "-o", str(out), "--processes", "1"])
+
+    assert excinfo.value.code == 1
+    assert readmes[0].read_text(encoding="utf-8") == original
+    captured = capsys.readouterr()
+    assert "1 written, 3 unchanged, 1 missing, 0 failed" in captured.out
+    assert f"{readmes[1].parent} is missing" in captured.err
+
+    mocker.patch("crawler.readme_markdown", return_value="new format")
+    counts = crawler.render_all(crawler.Catalog(str(out / crawler.CATALOG_FILE)))
+    assert counts == {"written": 4, "unchanged": 0, "missing": 1, "failed": 0}
+    assert readmes[2].read_text(encoding="utf-8") == "new format"
+
+
+def test_render_reparses_cached_pages_in_processes(scraped_tree, capsys):
+    """Test render --cache parses the cached pages again on a process pool."""
+    out, cache = scraped_tree
+    readmes = _readmes(out)
+    expected = [path.read_text(encoding="utf-8") for path in readmes]
+    for path in readmes[:2]:
+        path.unlink()
+    capsys.readouterr()
+
+    crawler._dispatch(
+        ["render", "-o", str(out), "--cache", str(cache), "--processes", "2"]
+    )
+
+    assert [path.read_text(encoding="utf-8") for path in readmes] == expected
+    assert "2 written, 3 unchanged" in capsys.readouterr().out
+
+
+def test_render_from_another_directory(replay_site, tmp_path, monkeypatch, capsys):
+    """Test a tree crawled with a relative -o renders from any working directory."""
+    monkeypatch.chdir(tmp_path)
+    with replay_server.ReplayServer(replay_site) as server:
+        crawler._dispatch(
+            ["crawl", "--pages", "1..", "--rate", "0", "--base-url", server.url]
+            + ["-o", "out"]
+        )
+    readmes = _readmes(tmp_path / "out")
+    readmes[0].unlink()
+    (tmp_path / "elsewhere").mkdir()
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    capsys.readouterr()
+
+    crawler._dispatch(["render", "-o", str(tmp_path / "out"), "--processes", "1"])
+
+    assert readmes[0].exists()
+    assert "1 written, 4 unchanged, 0 missing" in capsys.readouterr().out
+
+
+def test_render_reports_failures(tmp_path, capsys):
+    """Test unparseable cached pages and unwritable READMEs count as failures."""
+    page = tmp_path / "page.html"
+    page.write_text("<html></html>", encoding="utf-8")
+    assert crawler.render_readme(str(tmp_path), html_path=str(page)) == "failed"
+    assert crawler.render_readme(str(tmp_path)) == "failed"
+    assert "Could not render" in capsys.readouterr().err
+
+
+def test_render_command_errors(tmp_path, capsys):
+    """Test render needs a catalog and an existing cache directory."""
+    with pytest.raises(SystemExit) as excinfo:
+        crawler._dispatch(["render", "-o", str(tmp_path)])
+    assert excinfo.value.code == 1
+    assert "No catalog" in capsys.readouterr().err
+    with pytest.raises(SystemExit) as excinfo:
+        crawler._dispatch(["render", "--cache", str(tmp_path / "nope")])
+    assert excinfo.value.code == 2
+
+
+# --- Tests for comments and writeups ---
+def test_parse_writeups(sample_html_provided_from_file):
+    """Test the writeups tab yields each author, text and attachment."""
+    writeups = crawler.extract_crackme(sample_html_provided_from_file).writeups
+    assert [w.author for w in writeups] == [
+        "wallet_addresses",
+        "jaghut_chad",
+        "authand",
+        "Meloch",
+        "dollhead",
+    ]
+    assert writeups[0] == crawler.CrackmeWriteup(
+        "wallet_addresses",
+        "check",
+        "https://crackmes.one/static/solution/6851ea0a2b84be7ea774399e.zip",
+    )
+    assert writeups[1].text == ""
+    assert writeups[4].text.startswith("The program takes input twice")
+
+
+def test_generate_markdown_comments_and_writeups():
+    """Test comments and writeups get their own sections linking saved attachments."""
+    markdown = crawler.generate_markdown(
+        "T",
+        {},
+        "d",
+        [crawler.CrackmeComment("bob", "1:02 PM 06/17/2025", "nice\nwork")],
+        [
+            crawler.CrackmeWriteup("amy", "keygen", "https://x/static/solution/a.zip"),
+            crawler.CrackmeWriteup("bea", "", "https://x/static/solution/b.zip"),
+            crawler.CrackmeWriteup("cid", ""),
+        ],
+        {"a.zip"},
+    )
+    assert "## Comments\n\n**bob** on 1:02 PM 06/17/2025:\n\n> nice\n> work\n" in (
+        markdown
+    )
+    assert "## Writeups\n\n**amy** ([a.zip](writeups/a.zip)):\n\n> keygen\n" in (
+        markdown
+    )
+    assert "**bea** ([b.zip](https://x/static/solution/b.zip))\n" in markdown
+    assert markdown.endswith("**cid**\n")
+    assert "## Comments" not in crawler.generate_markdown("T", {}, "d")
+
+
+@pytest.mark.parametrize("engine", crawler.ENGINES)
+def test_writeups_downloaded_by_every_engine(replay_site, tmp_path, mocker, engine):
+    """Test each engine saves the writeup attachments and lists them in the README."""
+    with replay_server.ReplayServer(replay_site) as server:
+        crawler._dispatch(
+            ["crawl", "--pages", "1", "--rate", "0", "--base-url", server.url]
+            + ["--engine", engine, "--processes", "1", "-o", str(tmp_path)]
+            + ["--metrics", "json", "--metrics-file", str(tmp_path / "m.jsonl")]
+        )
+
+    crackme_dirs = list(tmp_path.glob("replay*"))
+    assert len(crackme_dirs) == 2
+    for crackme_dir in crackme_dirs:
+        assert len(list((crackme_dir / "writeups").glob("*.zip"))) == 5
+        readme = (crackme_dir / "README.md").read_text(encoding="utf-8")
+        assert "## Comments" in readme and "**nxveed** on" in readme
+        assert "(writeups/6851ea0a2b84be7ea774399e.zip)" in readme
+    records = _read_jsonl(tmp_path / "m.jsonl")
+    assert all(record["phases"]["writeups"] > 0 for record in records[:-1])
+    writeup_bytes = sum(
+        len(body)
+        for path, (_, body) in replay_site.routes.items()
+        if "/solution/" in path
+    )
+    assert all(record["download_bytes"] > writeup_bytes for record in records[:-1])
+
+
+def test_writeups_download_alongside_archive(local_site, mocker, tmp_path):
+    """Test the archive download doesn't wait for the writeups, or vice versa."""
+    with open(
+        crawler.os.path.join(bench_crawler.SAMPLES_DIR, "sample_provided.html")
+    ) as f:
+        local_site.add("/crackme/abc", f.read())
+    writeup_started = threading.Event()
+
+    def fake_download(url, directory=".", session=None, **kwargs):
+        if "/solution/" in url:
+            writeup_started.set()
+        else:
+            assert writeup_started.wait(5), "writeups only started after the archive"
+        return None
+
+    mocker.patch("crawler.download_file", side_effect=fake_download)
+    crawler.scrape_crackme("abc", str(tmp_path), options=crawler.ScrapeOptions())
+    assert crawler.download_file.call_count == 6
+
+
+def test_no_writeups_option(replay_site, tmp_path, mocker):
+    """Test --no-writeups keeps the README sections, linking to the site instead."""
+    with replay_server.ReplayServer(replay_site) as server:
+        crawler._dispatch(
+            ["crawl", "--pages", "1", "--rate", "0", "--base-url", server.url]
+            + ["--no-writeups", "-o", str(tmp_path)]
+        )
+    assert "writeup" not in server.stats.requests
+    assert not list(tmp_path.glob("*/writeups"))
+    readmes = [p.read_text(encoding="utf-8") for p in tmp_path.glob("*/README.md")]
+    assert readmes and all("## Writeups" in readme for readme in readmes)
+    assert all("](writeups/" not in readme for readme in readmes)
+    assert all(f"]({server.url}/static/solution/" in readme for readme in readmes)
+
+
+def test_render_links_only_saved_writeups(scraped_tree):
+    """Test render links the site for writeup attachments that aren't on disk."""
+    out, _ = scraped_tree
+    readme = _readmes(out)[0]
+    attachments = sorted((readme.parent / crawler.WRITEUPS_DIR).iterdir())
+    attachments[0].unlink()
+
+    crawler._dispatch(["render", "-o", str(out), "--processes", "1"])
+
+    content = readme.read_text(encoding="utf-8")
+    assert f"(writeups/{attachments[0].name})" not in content
+    assert f"/static/solution/{attachments[0].name})" in content
+    assert f"(writeups/{attachments[1].name})" in content
+
+
+# --- Tests for crackme filters ---
+def test_parse_listing_entries_reads_row_fields(sample_listing_html):
+    """Test each listing entry carries its row's cells keyed by column heading."""
+    soup = bs4.BeautifulSoup(sample_listing_html, "html.parser")
+    entries = crawler.parse_listing_entries(soup)
+    assert [entry.crackme_id for entry in entries] == LISTING_IDS
+    assert entries[1].fields["Name"] == "WinCrack"
+    assert entries[1].fields["Author"] == "kaster"
+    assert entries[1].fields["Language"] == "C/C++"
+    assert entries[1].fields["Platform"] == "Windows"
+    assert entries[1].fields["Difficulty"] == "2.1"
+    loose = bs4.BeautifulSoup('<a href="/crackme/abc123">x</a>', "html.parser")
+    assert crawler.parse_listing_entries(loose) == [crawler.ListingEntry("abc123")]
+
+
+@pytest.mark.parametrize(
+    "crackme_filter, reason",
+    [
+        (crawler.CrackmeFilter(), None),
+        (crawler.CrackmeFilter(platform="*LINUX*"), None),
+        (crawler.CrackmeFilter(platform="windows"), "platform is 'Unix/linux etc.'"),
+        (crawler.CrackmeFilter(language="C/C++"), "language is 'Rust'"),
+        (crawler.CrackmeFilter(author="doll*"), None),
+        (crawler.CrackmeFilter(min_difficulty=3.0, max_difficulty=3.0), None),
+        (crawler.CrackmeFilter(min_difficulty=3.5), "difficulty is 3"),
+        (crawler.CrackmeFilter(max_difficulty=2), "difficulty is 3"),
+        (crawler.CrackmeFilter(min_quality=4.6), "quality is 4.5"),
+        (crawler.CrackmeFilter(arch="arm*"), None),  # Not shown, left to the page
+    ],
+)
+def test_crackme_filter_rejects(crackme_filter, reason):
+    """Test filters check the fields present and let missing ones through."""
+    fields = {
+        "Author": "dollhead",
+        "Language": "Rust",
+        "Platform": "Unix/linux etc.",
+        "Difficulty": "3.0",
+        "Quality": "4.5",
+    }
+    assert crackme_filter.rejects(fields) == reason
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_main_crawl_filters_on_listing(
+    local_site, sample_listing_html, sample_html_complete, tmp_path, engine
+):
+    """Test listing rows that fail a filter never have their crackme page fetched."""
+    local_site.add("/lasts/1", sample_listing_html)
+    for crackme_id in LISTING_IDS:
+        local_site.add(f"/crackme/{crackme_id}", sample_html_complete)
+
+    crawler._dispatch(
+        ["crawl", "--engine", engine, "--rate", "0", "-o", str(tmp_path)]
+        + ["--platform", "*linux*", "--min-quality", "4", "--no-catalog"]
+    )
+
+    fetched = [path for path in local_site.paths() if path.startswith("/crackme/")]
+    assert fetched == [f"/crackme/{LISTING_IDS[0]}"]
+    assert (tmp_path / "testuser_Test_Crackme" / "README.md").exists()
+
+
+@pytest.mark.parametrize("engine", ["threads", "async", "staged"])
+def test_filter_falls_back_to_crackme_page(
+    local_site, sample_html_complete, tmp_path, engine, capsys
+):
+    """Test IDs without a listing row are filtered on their page, before downloading."""
+    local_site.add("/crackme/a1", sample_html_complete)
+    local_site.add("/crackme/b2", sample_html_complete.replace("Linux", "Windows"))
+
+    crawler._dispatch(
+        ["a1", "b2", "--engine", engine, "--processes", "1", "--rate", "0"]
+        + ["--platform", "linux", "--export", str(tmp_path / "out.jsonl")]
+        + ["-o", str(tmp_path)]
+    )
+
+    assert local_site.paths().count("/download/12345") == 1
+    assert [path.name for path in tmp_path.iterdir() if path.is_dir()] == [
+        "testuser_Test_Crackme"
+    ]
+    out = capsys.readouterr().out
+    assert "Skipping b2: platform is 'Windows'." in out
+    assert "SKIPPED b2: platform is 'Windows'" in out
+    assert "1 succeeded, 1 skipped, 0 failed." in out
+    records = (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in records] == ["a1"]
+
+
+# --- Tests for size-aware scheduling ---
+def test_download_file_max_bytes(local_site, tmp_path, capsys):
+    """Test archives announced as too large are not downloaded."""
+    local_site.add("/big.zip", b"x" * 2048)
+    url = f"{local_site.url}/big.zip"
+
+    assert crawler.download_file(url, str(tmp_path), max_bytes=1024) is None
+    assert list(tmp_path.iterdir()) == []
+    assert "big.zip is over the 1024 byte limit" in capsys.readouterr().err
+    assert crawler.download_file(url, str(tmp_path), max_bytes=2048)
+
+
+def test_download_file_max_bytes_without_length(mocker, tmp_path):
+    """Test a download without Content-Length stops once it passes the limit."""
+    response = mocker.MagicMock(status_code=200, headers={})
+    response.iter_content.return_value = [b"x" * 600] * 3
+    session = mocker.MagicMock()
+    session.get.return_value = response
+
+    path = crawler.download_file("http://x/a.zip", str(tmp_path), session, 600)
+    assert path is not None
+    assert (
+        crawler.download_file("http://x/b.zip", str(tmp_path), session, max_bytes=1024)
+        is None
+    )
+    assert sorted(os.listdir(tmp_path)) == ["a.zip"]
+
+
+def test_download_file_bandwidth(mocker, tmp_path):
+    """Test --large-archive-rate style caps pace the download by sleeping."""
+    response = mocker.MagicMock(status_code=200, headers={"Content-Length": "4000"})
+    response.iter_content.return_value = [b"x" * 1000] * 4
+    session = mocker.MagicMock()
+    session.get.return_value = response
+    sleep = mocker.patch("crawler.time.sleep")
+
+    crawler.download_file("http://x/a.zip", str(tmp_path), session, bandwidth=1000)
+    assert [round(call.args[0]) for call in sleep.call_args_list] == [1, 2, 3, 4]
+
+
+def test_probe_size(local_site):
+    """Test probe_size reads Content-Length from a HEAD request."""
+    local_site.add("/a.zip", b"x" * 321)
+    assert crawler.probe_size(f"{local_site.url}/a.zip") == 321
+    assert crawler.probe_size(f"{local_site.url}/missing.zip") is None
+    assert [command for command, _, _ in local_site.requests] == ["HEAD", "HEAD"]
+
+
+def test_size_scheduler_orders_windows(local_site):
+    """Test each window comes out smallest first, with large archives held back."""
+    sizes = {"a1": 300, "b2": 100, "d4": 5000, "e5": 9000}  # c3 has no archive
+    for crackme_id, size in sizes.items():
+        local_site.add(f"/static/crackme/{crackme_id}.zip", b"x" * size)
+    scheduler = crawler.SizeScheduler(
+        requests.Session(), large_bytes=1000, max_bytes=8000, jobs=2, window=3
+    )
+
+    ids = ["a1", "b2", "c3", "d4", "e5"]
+    # e5 is over max_bytes, so only its page will be fetched
+    assert list(scheduler.small_ids(ids)) == ["b2", "a1", "c3", "e5"]
+    scheduler.close()
+    assert list(scheduler.large_ids()) == ["d4"]
+    assert scheduler.sizes == {**sizes, "c3": None}
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_main_schedule_by_size(
+    local_site, sample_html_complete, tmp_path, engine, capsys
+):
+    """Test --schedule size scrapes small archives first and large ones in a lane."""
+    sizes = {"a1": 3000, "b2": 100, "c3": 600, "d4": 6000}
+    for crackme_id, size in sizes.items():
+        path = f"/static/crackme/{crackme_id}.zip"
+        local_site.add(
+            f"/crackme/{crackme_id}",
+            sample_html_complete.replace("/download/12345", path).replace(
+                "Test Crackme", crackme_id
+            ),
+        )
+        local_site.add(path, make_zip({"crackme.bin": os.urandom(size)}))
+
+    crawler._dispatch(
+        ["a1", "b2", "c3", "d4", "--engine", engine, "-j", "1", "--rate", "0"]
+        + ["--schedule", "size", "--large-archive-size", "0.002"]
+        + ["--large-archive-rate", "1024", "--max-archive-size", "0.005"]
+        + ["-o", str(tmp_path), "--no-writeups"]
+    )
+
+    out = capsys.readouterr().out
+    summary = [
+        line.split()[1] for line in out.split("--- Summary ---")[1].splitlines()[1:-1]
+    ]
+    assert summary == ["d4", "b2", "c3", "a1"]
+    assert "Leaving a1 (" in out
+    assert (tmp_path / "testuser_d4" / "README.md").exists()
+    assert not (tmp_path / "testuser_d4" / "d4.zip").exists()
+    assert (tmp_path / "testuser_a1" / "crackme" / "crackme.bin").exists()
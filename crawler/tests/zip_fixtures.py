@@ -0,0 +1,108 @@
+"""
+Helpers that build zip archives for tests and benchmarks, including
+ZipCrypto password-protected ones, which the zipfile module can read but
+not write.
+"""
+
+import io
+import os
+import struct
+import zipfile
+import zlib
+from typing import Dict, Optional
+
+_MASK = 0xFFFFFFFF
+
+
+def _crc_update(crc: int, byte: int) -> int:
+    """One step of the raw (non-inverted) CRC-32 used by ZipCrypto's key schedule."""
+    return zlib.crc32(bytes([byte]), crc ^ _MASK) ^ _MASK
+
+
+class _ZipCrypto:
+    """Traditional PKWARE encryption, as described in APPNOTE.TXT section 6.1."""
+
+    def __init__(self, password: bytes) -> None:
+        self.keys = [0x12345678, 0x23456789, 0x34567890]
+        for byte in password:
+            self._update(byte)
+
+    def _update(self, byte: int) -> None:
+        k0, k1, k2 = self.keys
+        k0 = _crc_update(k0, byte)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & _MASK
+        k2 = _crc_update(k2, (k1 >> 24) & 0xFF)
+        self.keys = [k0, k1, k2]
+
+    def encrypt(self, data: bytes) -> bytes:
+        out = bytearray()
+        for byte in data:
+            temp = (self.keys[2] | 2) & 0xFFFF
+            out.append(byte ^ (((temp * (temp ^ 1)) >> 8) & 0xFF))
+            self._update(byte)
+        return bytes(out)
+
+
+def make_zip(
+    files: Dict[str, bytes],
+    password: Optional[str] = None,
+    compression: int = zipfile.ZIP_STORED,
+) -> bytes:
+    """Build a zip archive from a {name: bytes} mapping, optionally encrypted."""
+    if password is None:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression) as zf:
+            for name, data in files.items():
+                zf.writestr(name, data)
+        return buffer.getvalue()
+
+    body = bytearray()
+    central = bytearray()
+    dos_time, dos_date = 0, (2025 - 1980) << 9 | 1 << 5 | 1
+    for name, data in files.items():
+        crc = zlib.crc32(data)
+        if compression == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(wbits=-15)
+            payload = compressor.compress(data) + compressor.flush()
+        else:
+            payload = data
+        header = os.urandom(11) + bytes([crc >> 24])
+        payload = _ZipCrypto(password.encode("utf-8")).encrypt(header + payload)
+        raw_name = name.encode("utf-8")
+        offset = len(body)
+        fields = (0x1, compression, dos_time, dos_date, crc, len(payload), len(data))
+        body += struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, *fields, len(raw_name), 0)
+        body += raw_name + payload
+        central += struct.pack(
+            "<4s6H3L5H2L",
+            b"PK\x01\x02",
+            20,
+            20,
+            *fields,
+            len(raw_name),
+            0,
+            0,
+            0,
+            0,
+            0,
+            offset,
+        )
+        central += raw_name
+    end = struct.pack(
+        "<4s4H2LH",
+        b"PK\x05\x06",
+        0,
+        0,
+        len(files),
+        len(files),
+        len(central),
+        len(body),
+        0,
+    )
+    return bytes(body + central + end)
+
+
+def make_payload(size: int) -> bytes:
+    """`size` bytes of half random, half zero data, compressing roughly like a binary."""
+    chunk = os.urandom(512) + bytes(512)
+    return (chunk * (size // len(chunk) + 1))[:size]